@@ -0,0 +1,98 @@
+# app/batching.py
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """Gather single-item inference requests from many threads into batches
+
+    Callers block in `submit` while a background thread collects up to
+    `max_batch_size` items, or whatever arrived within `max_wait_ms` of the
+    first one, and runs `predict_fn` once on the stacked batch.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+
+        self.predict_fn = predict_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = float(max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._closed = False
+        # Held while checking _closed and queueing, so nothing lands behind the shutdown marker
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, item, timeout=None):
+        """Queue a single preprocessed input and wait for its prediction row"""
+        return self.submit_async(item).result(timeout=timeout)
+
+    def submit_async(self, item):
+        """Queue a single preprocessed input and return a Future for its prediction row"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((item, future))
+        return future
+
+    def close(self):
+        """Stop the worker thread once the queued requests have been served"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                # Re-queue the shutdown marker so the run loop sees it
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = self._collect(first)
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+
+            try:
+                predictions = self.predict_fn(np.stack(items, axis=0))
+                if len(predictions) != len(futures):
+                    # zip() would stop early and leave the remaining callers waiting forever
+                    raise RuntimeError(f"Prediction returned {len(predictions)} rows "
+                                       f"for a batch of {len(futures)}")
+            except Exception as e:
+                logger.error(f"Batched prediction failed: {str(e)}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            logger.debug(f"Ran batched prediction for {len(batch)} inputs")
+            for future, prediction in zip(futures, predictions):
+                future.set_result(prediction)
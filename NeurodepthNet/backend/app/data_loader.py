@@ -3,18 +3,32 @@ import os
 import numpy as np
 from sklearn.model_selection import train_test_split
 import cv2
+from .dataset_shards import ShardBuilder, current_shards
 
 class DataLoader:
     def __init__(self, data_dir="../data"):
         self.data_dir = data_dir
+        self.classes = ['no_tumor', 'tumor']
         
+    def build_shards(self):
+        """Write (or incrementally update) memory-mapped shards of the dataset"""
+        return ShardBuilder(self.data_dir, self.classes).build()
+
     def load_dataset(self):
-        """Load and preprocess the entire dataset"""
+        """Load and preprocess the entire dataset
+
+        Uses the memory-mapped shards written by build_shards() when present,
+        updating them first if the image files have changed since.
+        """
+        shards = current_shards(self.data_dir, self.classes)
+        if shards is not None:
+            return shards.arrays()
+
         images = []
         labels = []
         
         # Assume 'data' directory has 'tumor' and 'no_tumor' subdirectories
-        for class_idx, class_name in enumerate(['no_tumor', 'tumor']):
+        for class_idx, class_name in enumerate(self.classes):
             class_dir = os.path.join(self.data_dir, class_name)
             if not os.path.exists(class_dir):
                 continue
@@ -0,0 +1,309 @@
+# app/dataset_shards.py
+"""Preprocessed, memory-mapped dataset shards
+
+A shard directory holds resized uint8 images and labels as plain .npy files
+plus an index.json that maps every source file (by relative path) to its
+shard row together with its size, mtime and SHA-1 checksum:
+
+    index.json
+    images-g0001.npy   uint8 (N, H, W)
+    labels-g0001.npy   int64 (N,)
+
+Each build appends one generation holding only new or changed files, so an
+incremental rebuild decodes nothing that is already sharded. Rows of
+deleted or changed files become dead and the shards are compacted once
+more than half of all rows are dead.
+
+Usage:
+    python -m app.dataset_shards --data-dir ../data --subsets training testing
+"""
+import os
+import json
+import hashlib
+import argparse
+import logging
+import numpy as np
+import cv2
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+INDEX_NAME = 'index.json'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def file_checksum(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def default_shard_dir(source_dir):
+    return os.path.join(source_dir, '.shards')
+
+def _read_index(shard_dir):
+    path = os.path.join(shard_dir, INDEX_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        index = json.load(f)
+    if index.get('format_version') != FORMAT_VERSION:
+        logger.info(f"Ignoring shard index with format version {index.get('format_version')}")
+        return None
+    return index
+
+class ShardBuilder:
+    def __init__(self, source_dir, classes, shard_dir=None, image_size=(224, 224)):
+        self.source_dir = source_dir
+        self.classes = list(classes)
+        self.shard_dir = shard_dir or default_shard_dir(source_dir)
+        self.image_size = tuple(image_size)
+
+    def _scan(self):
+        """Yield (relative path, label) for every image below the class directories"""
+        for class_idx, class_name in enumerate(self.classes):
+            class_dir = os.path.join(self.source_dir, class_name)
+            if not os.path.exists(class_dir):
+                continue
+            for filename in sorted(os.listdir(class_dir)):
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(class_name, filename), class_idx
+
+    def _load_image(self, rel_path):
+        image = cv2.imread(os.path.join(self.source_dir, rel_path), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            return None
+        return cv2.resize(image, self.image_size)
+
+    def is_current(self):
+        """Whether the shards hold exactly the current source files
+
+        Like build(), files whose size or mtime changed are compared by
+        checksum, so a touched but identical file does not count as stale.
+        """
+        index = _read_index(self.shard_dir)
+        if index is None or index['classes'] != self.classes or tuple(index['image_size']) != self.image_size:
+            return False
+        files = index['files']
+        seen = 0
+        for rel_path, label in self._scan():
+            entry = files.get(rel_path)
+            if entry is None or entry['label'] != label:
+                return False
+            path = os.path.join(self.source_dir, rel_path)
+            stat = os.stat(path)
+            if (entry['size'], entry['mtime_ns']) != (stat.st_size, stat.st_mtime_ns) \
+                    and file_checksum(path) != entry['checksum']:
+                return False
+            seen += 1
+        return seen == len(files)
+
+    def build(self):
+        """Create or incrementally update the shards
+
+        Returns:
+            dict: counts of 'added', 'unchanged', 'removed' and 'failed' files
+        """
+        os.makedirs(self.shard_dir, exist_ok=True)
+        index = _read_index(self.shard_dir)
+        if index is not None and (index['classes'] != self.classes or
+                                  tuple(index['image_size']) != self.image_size):
+            logger.info("Class list or image size changed, rebuilding shards from scratch")
+            index = None
+        if index is None:
+            index = {
+                'format_version': FORMAT_VERSION,
+                'generation': 0,
+                'classes': self.classes,
+                'image_size': list(self.image_size),
+                'shards': {},
+                'files': {}
+            }
+
+        old_files = index['files']
+        files = {}
+        pending = []
+        stats = {'added': 0, 'unchanged': 0, 'removed': 0, 'failed': 0}
+
+        for rel_path, label in self._scan():
+            stat = os.stat(os.path.join(self.source_dir, rel_path))
+            entry = old_files.get(rel_path)
+            if entry is not None and entry['label'] == label:
+                if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                    files[rel_path] = entry
+                    stats['unchanged'] += 1
+                    continue
+                checksum = file_checksum(os.path.join(self.source_dir, rel_path))
+                if checksum == entry['checksum']:
+                    files[rel_path] = {**entry, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+                    stats['unchanged'] += 1
+                    continue
+            else:
+                checksum = file_checksum(os.path.join(self.source_dir, rel_path))
+            pending.append((rel_path, label, checksum, stat))
+
+        stats['removed'] = len(set(old_files) - set(files) - {p[0] for p in pending})
+
+        if pending:
+            index['generation'] += 1
+            shard_name = f"g{index['generation']:04d}"
+            images = np.lib.format.open_memmap(
+                os.path.join(self.shard_dir, f"images-{shard_name}.npy"), mode='w+',
+                dtype=np.uint8, shape=(len(pending), self.image_size[1], self.image_size[0])
+            )
+            labels = []
+            for rel_path, label, checksum, stat in pending:
+                image = self._load_image(rel_path)
+                if image is None:
+                    logger.warning(f"Failed to load image: {rel_path}")
+                    stats['failed'] += 1
+                    continue
+                row = len(labels)
+                images[row] = image
+                labels.append(label)
+                files[rel_path] = {
+                    'shard': shard_name, 'row': row, 'label': label,
+                    'checksum': checksum, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns
+                }
+                stats['added'] += 1
+            images.flush()
+            del images
+            np.save(os.path.join(self.shard_dir, f"labels-{shard_name}.npy"), np.array(labels, dtype=np.int64))
+            index['shards'][shard_name] = {'rows': len(pending)}
+
+        index['files'] = files
+        self._drop_unused_shards(index)
+
+        total_rows = sum(shard['rows'] for shard in index['shards'].values())
+        if total_rows > 2 * len(files):
+            self._write_index(index)
+            return {**stats, **self._compact(index)}
+
+        self._write_index(index)
+        logger.info(f"Shards in {self.shard_dir}: {stats}")
+        return stats
+
+    def _drop_unused_shards(self, index):
+        used = {entry['shard'] for entry in index['files'].values()}
+        for shard_name in list(index['shards']):
+            if shard_name not in used:
+                del index['shards'][shard_name]
+                for kind in ('images', 'labels'):
+                    path = os.path.join(self.shard_dir, f"{kind}-{shard_name}.npy")
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def _compact(self, index):
+        """Rewrite all live rows into a single new generation"""
+        dataset = ShardDataset(self.shard_dir)
+        rel_paths = sorted(index['files'])
+        index['generation'] += 1
+        shard_name = f"g{index['generation']:04d}"
+
+        images = np.lib.format.open_memmap(
+            os.path.join(self.shard_dir, f"images-{shard_name}.npy"), mode='w+',
+            dtype=np.uint8, shape=(len(rel_paths), self.image_size[1], self.image_size[0])
+        )
+        labels = np.empty(len(rel_paths), dtype=np.int64)
+        for row, rel_path in enumerate(rel_paths):
+            entry = index['files'][rel_path]
+            images[row] = dataset.image(entry)
+            labels[row] = entry['label']
+            index['files'][rel_path] = {**entry, 'shard': shard_name, 'row': row}
+        images.flush()
+        del images, dataset
+        np.save(os.path.join(self.shard_dir, f"labels-{shard_name}.npy"), labels)
+
+        index['shards'] = {shard_name: {'rows': len(rel_paths)}, **index['shards']}
+        self._drop_unused_shards(index)
+        self._write_index(index)
+        logger.info(f"Compacted shards in {self.shard_dir} into {shard_name}")
+        return {'compacted': True}
+
+    def _write_index(self, index):
+        tmp_path = os.path.join(self.shard_dir, INDEX_NAME + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.shard_dir, INDEX_NAME))
+
+class ShardDataset:
+    """Read-only, memory-mapped view of a shard directory"""
+
+    def __init__(self, shard_dir):
+        self.shard_dir = shard_dir
+        self.index = _read_index(shard_dir)
+        if self.index is None:
+            raise FileNotFoundError(f"No shard index in {shard_dir}")
+
+        self.classes = self.index['classes']
+        self._images = {}
+        self._labels = {}
+        for shard_name in self.index['shards']:
+            self._images[shard_name] = np.load(
+                os.path.join(shard_dir, f"images-{shard_name}.npy"), mmap_mode='r')
+            self._labels[shard_name] = np.load(
+                os.path.join(shard_dir, f"labels-{shard_name}.npy"), mmap_mode='r')
+
+    @classmethod
+    def exists(cls, shard_dir):
+        return _read_index(shard_dir) is not None
+
+    def __len__(self):
+        return len(self.index['files'])
+
+    def image(self, entry):
+        """Zero-copy view of the image row of an index entry"""
+        return self._images[entry['shard']][entry['row']]
+
+    def arrays(self):
+        """Return (images, labels) for every live row
+
+        When the directory holds a single fully-live shard the memmaps are
+        returned as they are (zero copy); otherwise live rows are gathered.
+        """
+        live = len(self.index['files'])
+        if len(self._images) == 1:
+            shard_name = next(iter(self._images))
+            if len(self._images[shard_name]) == len(self._labels[shard_name]) == live:
+                return self._images[shard_name], self._labels[shard_name]
+
+        entries = sorted(self.index['files'].values(), key=lambda e: (e['shard'], e['row']))
+        images = np.empty((live, *self.index['image_size'][::-1]), dtype=np.uint8)
+        labels = np.empty(live, dtype=np.int64)
+        for i, entry in enumerate(entries):
+            images[i] = self.image(entry)
+            labels[i] = entry['label']
+        return images, labels
+
+def current_shards(source_dir, classes, image_size=(224, 224), shard_dir=None):
+    """Shards of `source_dir` brought up to date with its files, or None
+
+    Returns None when no shards were ever built there or none of the files
+    is sharded. Shards that no longer match the source files are updated
+    incrementally first, so callers never read stale images.
+    """
+    shard_dir = shard_dir or default_shard_dir(source_dir)
+    if not ShardDataset.exists(shard_dir):
+        return None
+    builder = ShardBuilder(source_dir, classes, shard_dir, image_size)
+    if not builder.is_current():
+        logger.info(f"Shards in {shard_dir} are stale, updating them")
+        builder.build()
+    shards = ShardDataset(shard_dir)
+    return shards if len(shards) > 0 else None
+
+if __name__ == "__main__":
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(os.path.dirname(current_dir))
+
+    parser = argparse.ArgumentParser(description="Build or update preprocessed dataset shards")
+    parser.add_argument('--data-dir', default=os.path.join(project_root, 'data'))
+    parser.add_argument('--subsets', nargs='+', default=['training', 'testing'])
+    parser.add_argument('--classes', nargs='+', default=['glioma', 'meningioma', 'notumor', 'pituitary'])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for subset in args.subsets:
+        source_dir = os.path.join(args.data_dir, subset)
+        stats = ShardBuilder(source_dir, args.classes).build()
+        print(f"{subset}: {stats}")
\ No newline at end of file
@@ -0,0 +1,215 @@
+# app/enhancement.py
+"""Multi-resolution, tiled CLAHE -> bilateral -> Canny enhancement
+
+Each stage output is cached under the content hash of the source image,
+the pyramid level, and the parameters of that stage and every stage before
+it. Moving only the Canny slider therefore reuses the cached bilateral
+output, and moving only the bilateral slider reuses the cached CLAHE output.
+
+Interactive previews run on a pyramid level whose longest side fits
+`max_side`. Full resolution is level 0. The bilateral filter, the most
+expensive stage, runs in horizontal strips on a thread pool. Each strip
+carries a halo of `d // 2` rows, so the stitched output is identical to
+filtering the whole image. CLAHE and Canny run on the whole image: CLAHE
+interpolates between its tiles and Canny's hysteresis follows edges across
+the image, so splitting either one would change the result.
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from .result_cache import ResultCache
+from .utils import content_hash
+
+logger = logging.getLogger(__name__)
+
+BILATERAL_DIAMETER = 9
+CLAHE_TILE_GRID = (8, 8)
+CLAHE_CACHE_SIZE = 16
+
+def pyramid_level(shape, max_side=None):
+    """Number of 2x downsamplings needed for the longest side to fit `max_side`"""
+    if not max_side:
+        return 0
+    level = 0
+    longest = max(shape[:2])
+    while longest > max_side:
+        longest = (longest + 1) // 2
+        level += 1
+    return level
+
+class EnhancementEngine:
+    def __init__(self, max_workers=None, strip_rows=256, cache_bytes=128 * 1024 * 1024):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.strip_rows = strip_rows
+        self.cache = ResultCache(max_bytes=cache_bytes)
+        self.logger = logging.getLogger(__name__)
+        self._executor = None
+        # cv2 CLAHE objects keep per-call state, so each thread keeps its own
+        self._local = threading.local()
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='enhance')
+        return self._executor
+
+    def _stage(self, name, image_hash, level, compute, **params):
+        key = ResultCache.make_key('enhance-stage', image_hash, name, level=level, **params)
+        result = self.cache.get_or_compute(key, compute)
+        # Cached stage outputs are shared between requests
+        result.setflags(write=False)
+        return result
+
+    def level_image(self, image, level, image_hash=None):
+        """Source image downsampled `level` times with cv2.pyrDown, cached per level"""
+        if level == 0:
+            return image
+        image_hash = image_hash or content_hash(image)
+        parent = self.level_image(image, level - 1, image_hash)
+        return self._stage('pyramid', image_hash, level, lambda: cv2.pyrDown(parent))
+
+    def clahe_filter(self, clip_limit):
+        """This thread's CLAHE object for `clip_limit`, created once and kept in a small LRU"""
+        filters = getattr(self._local, 'clahe', None)
+        if filters is None:
+            filters = self._local.clahe = OrderedDict()
+        clahe = filters.get(clip_limit)
+        if clahe is None:
+            clahe = filters[clip_limit] = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=CLAHE_TILE_GRID)
+            if len(filters) > CLAHE_CACHE_SIZE:
+                filters.popitem(last=False)
+        else:
+            filters.move_to_end(clip_limit)
+        return clahe
+
+    def clahe(self, image, clip_limit):
+        return self.clahe_filter(clip_limit).apply(image)
+
+    def bilateral(self, image, sigma, diameter=BILATERAL_DIAMETER):
+        """Bilateral filter in halo-padded strips, identical to one full-image call"""
+        height = image.shape[0]
+        if self.max_workers == 1 or height <= self.strip_rows:
+            return cv2.bilateralFilter(image, diameter, sigma, sigma)
+
+        halo = diameter // 2
+        output = np.empty_like(image)
+
+        def filter_strip(top):
+            bottom = min(height, top + self.strip_rows)
+            padded_top = max(0, top - halo)
+            padded_bottom = min(height, bottom + halo)
+            # cv2 releases the GIL, so strips run in parallel
+            filtered = cv2.bilateralFilter(image[padded_top:padded_bottom], diameter, sigma, sigma)
+            output[top:bottom] = filtered[top - padded_top:bottom - padded_top]
+
+        list(self._pool().map(filter_strip, range(0, height, self.strip_rows)))
+        return output
+
+    def enhance(self, image, clip_limit=2.0, sigma=75.0, threshold=200.0, max_side=None, image_hash=None):
+        """Run CLAHE, bilateral filtering and Canny at the pyramid level that fits `max_side`
+
+        Args:
+            image: grayscale uint8 image at full resolution
+            clip_limit: CLAHE clip limit
+            sigma: bilateral color and space sigma
+            threshold: Canny high threshold; the low threshold is half of it
+            max_side: longest side of a preview, or None for full resolution
+            image_hash: content hash of `image` when the caller already has one
+
+        Returns:
+            dict: 'clahe', 'filtered' and 'edges' images plus the 'scale' relative to `image`
+        """
+        try:
+            if image is None:
+                raise ValueError("Input image is None")
+            clip_limit, sigma, threshold = float(clip_limit), float(sigma), float(threshold)
+            image_hash = image_hash or content_hash(image)
+            level = pyramid_level(image.shape, max_side)
+            source = self.level_image(image, level, image_hash)
+
+            clahe_img = self._stage('clahe', image_hash, level, lambda: self.clahe(source, clip_limit),
+                                    clip_limit=clip_limit)
+            filtered = self._stage('filtered', image_hash, level, lambda: self.bilateral(clahe_img, sigma),
+                                   clip_limit=clip_limit, sigma=sigma)
+            edges = self._stage('edges', image_hash, level, lambda: cv2.Canny(filtered, threshold / 2, threshold),
+                                clip_limit=clip_limit, sigma=sigma, threshold=threshold)
+
+            return {
+                'clahe': clahe_img,
+                'filtered': filtered,
+                'edges': edges,
+                'scale': source.shape[0] / image.shape[0]
+            }
+        except Exception as e:
+            self.logger.error(f"Error in enhance: {str(e)}")
+            raise
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+class EnhancementSession:
+    def __init__(self, session_id, image, image_hash):
+        self.id = session_id
+        self.image = image
+        self.image_hash = image_hash
+        self.last_used = time.monotonic()
+
+class EnhancementSessions:
+    """Decoded images that clients upload once and then enhance by session id
+
+    Sessions are evicted least recently used beyond `max_sessions`, and
+    after `ttl` seconds without use. The stage outputs of a session stay
+    in the engine cache under its image hash. Sessions are in-process, so
+    a multi-worker server needs sticky routing per session.
+    """
+
+    def __init__(self, max_sessions=64, ttl=900):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge_expired(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+
+    def create(self, image, image_hash=None):
+        image = np.ascontiguousarray(image)
+        # Sessions share the image between requests
+        image.setflags(write=False)
+        session = EnhancementSession(uuid.uuid4().hex, image, image_hash or content_hash(image))
+        with self._lock:
+            self._purge_expired()
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id):
+        """The live session for `session_id`, or None if it is unknown or expired"""
+        with self._lock:
+            self._purge_expired()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def close(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
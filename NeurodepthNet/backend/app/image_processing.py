@@ -1,16 +1,17 @@
 import cv2
-import numpy as np
-from skimage import exposure
 import os
-import SimpleITK as sitk
 import logging
+from .utils import lazy_import
+from .enhancement import EnhancementEngine
+
+sitk = lazy_import('SimpleITK')
 
 logger = logging.getLogger(__name__)
 
 class ImageProcessor:
     def __init__(self, data_dir="../data"):
         self.data_dir = data_dir
-        self.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        self.engine = EnhancementEngine()
         self.logger = logging.getLogger(__name__)
         
     def load_image(self, file_path):
@@ -25,22 +26,14 @@ class ImageProcessor:
             if image is None:
                 raise ValueError("Input image is None")
 
-            # Apply CLAHE enhancement
-            clahe_img = self.clahe.apply(image)
-            self.logger.debug("Applied CLAHE enhancement")
-
-            # Apply bilateral filtering for noise reduction
-            filtered = cv2.bilateralFilter(clahe_img, 9, 75, 75)
-            self.logger.debug("Applied bilateral filtering")
-
-            # Edge detection using Canny
-            edges = cv2.Canny(filtered, 100, 200)
-            self.logger.debug("Applied edge detection")
+            # CLAHE, bilateral filtering for noise reduction and Canny edge detection
+            results = self.engine.enhance(image, clip_limit=2.0, sigma=75, threshold=200)
+            self.logger.debug("Applied CLAHE, bilateral filtering and edge detection")
 
             return {
-                'clahe': clahe_img,
-                'filtered': filtered,
-                'edges': edges
+                'clahe': results['clahe'],
+                'filtered': results['filtered'],
+                'edges': results['edges']
             }
 
         except Exception as e:
@@ -0,0 +1,138 @@
+# app/jobs.py
+import time
+import uuid
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFull(RuntimeError):
+    """Raised when the job manager already holds its maximum of pending jobs"""
+
+class Job:
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = 'queued'
+        self.stage = None
+        self.events = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.condition = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def to_dict(self):
+        with self.condition:
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'stage': self.stage,
+                'events': list(self.events),
+                'error': self.error,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at
+            }
+
+    def _record(self, **event):
+        # The condition wraps an RLock, so callers may already hold it
+        with self.condition:
+            event['time'] = time.time()
+            self.events.append(event)
+            self.condition.notify_all()
+
+class JobManager:
+    """Run long pipelines on a bounded thread pool and track their progress
+
+    Submitted functions are called as `fn(progress, *args)`, where
+    `progress(stage)` records a per-stage event that clients can poll or
+    stream. Finished jobs are kept for `result_ttl` seconds. The job table
+    is in-process, so a multi-worker server needs sticky routing per job.
+    """
+
+    def __init__(self, max_workers=2, max_pending=16, result_ttl=600):
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        """Queue `fn(progress, *args)` and return its Job right away"""
+        self._purge_expired()
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"Too many pending jobs ({pending})")
+            job = Job(uuid.uuid4().hex)
+            self._jobs[job.id] = job
+
+        job._record(stage='queued', status='queued')
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id):
+        self._purge_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stream_events(self, job, keepalive=15.0):
+        """Yield the job's events as they happen, then stop once it finishes
+
+        Yields None every `keepalive` seconds without news so callers can
+        keep idle connections open.
+        """
+        index = 0
+        while True:
+            with job.condition:
+                if index >= len(job.events) and not job.finished:
+                    job.condition.wait(timeout=keepalive)
+                new_events = job.events[index:]
+                index += len(new_events)
+                done = job.finished and index >= len(job.events)
+
+            if not new_events and not done:
+                yield None
+            for event in new_events:
+                yield event
+            if done:
+                return
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job, fn, args):
+        def progress(stage, **info):
+            with job.condition:
+                job.stage = stage
+                job._record(stage=stage, status='running', **info)
+
+        with job.condition:
+            job.status = 'running'
+        try:
+            result = fn(progress, *args)
+            with job.condition:
+                # Status and final event change together so streams never miss it
+                job.result = result
+                job.status = 'done'
+                job.finished_at = time.time()
+                job._record(stage='done', status='done')
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}", exc_info=True)
+            with job.condition:
+                job.error = str(e)
+                job.status = 'failed'
+                job.finished_at = time.time()
+                job._record(stage=job.stage, status='failed', error=str(e))
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
\ No newline at end of file
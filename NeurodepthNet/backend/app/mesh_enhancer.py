@@ -1,40 +1,62 @@
 import numpy as np
-from scipy import ndimage
-from scipy.spatial import ConvexHull
-from skimage import measure
 
 class MeshEnhancer:
     @staticmethod
-    def create_dramatic_spikes(vertices, faces, base_intensity=5.0):
-        """Create extreme spikes and variations in the mesh"""
-        # Calculate vertex normals with high intensity
-        vertex_normals = np.zeros_like(vertices)
-        weights = np.zeros(len(vertices))
-        
-        for face in faces:
-            v0, v1, v2 = vertices[face]
-            normal = np.cross(v1 - v0, v2 - v0)
-            length = np.linalg.norm(normal)
-            if length > 0:
-                normal = normal / length
-                # Add random weight to each face
-                weight = np.random.uniform(1.5, 3.0)
-                vertex_normals[face] += normal * weight
-                weights[face] += weight
+    def _vertex_normals(vertices, faces, rng):
+        """Random-weighted average of adjacent face normals for every vertex
+
+        Draws one weight per non-degenerate face, in face order.
+        """
+        v0 = vertices[faces[:, 0]]
+        v1 = vertices[faces[:, 1]]
+        v2 = vertices[faces[:, 2]]
+        normals = np.cross(v1 - v0, v2 - v0)
+        lengths = np.linalg.norm(normals, axis=1)
+
+        valid = lengths > 0
+        faces = faces[valid]
+        normals = normals[valid] / lengths[valid, np.newaxis]
+
+        # Add random weight to each face
+        face_weights = rng.uniform(1.5, 3.0, size=len(faces))
+        weighted = normals * face_weights[:, np.newaxis]
+
+        # Scatter each face's contribution onto its three corners
+        corners = faces.ravel()
+        n = len(vertices)
+        vertex_normals = np.stack([
+            np.bincount(corners, weights=np.repeat(weighted[:, axis], 3), minlength=n)
+            for axis in range(3)
+        ], axis=1)
+        weights = np.bincount(corners, weights=np.repeat(face_weights, 3), minlength=n)
 
         # Normalize and enhance
         mask = weights > 0
         vertex_normals[mask] /= weights[mask, np.newaxis]
+        return vertex_normals
+
+    @staticmethod
+    def create_dramatic_spikes(vertices, faces, base_intensity=5.0, rng=None):
+        """Create extreme spikes and variations in the mesh
+
+        Args:
+            rng: numpy Generator for the random weights; a fresh unseeded
+                one is used when omitted
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        vertices = np.asarray(vertices, dtype=float)
+        faces = np.asarray(faces, dtype=np.intp).reshape(-1, 3)
+
+        # Calculate vertex normals with high intensity
+        vertex_normals = MeshEnhancer._vertex_normals(vertices, faces, rng)
+        
+        # Combine multiple patterns for organic look
+        height_factor = np.cos(vertices[:, 1] * 0.3) * 2
+        radial_factor = np.sin(np.arctan2(vertices[:, 0], vertices[:, 2]) * 3)
+        random_factor = rng.uniform(0.8, 2.0, size=len(vertices))
         
         # Create extreme variations
-        spike_factors = np.zeros(len(vertices))
-        for i in range(len(vertices)):
-            # Combine multiple patterns for organic look
-            height_factor = np.cos(vertices[i, 1] * 0.3) * 2
-            radial_factor = np.sin(np.arctan2(vertices[i, 0], vertices[i, 2]) * 3)
-            random_factor = np.random.uniform(0.8, 2.0)
-            
-            spike_factors[i] = (height_factor + radial_factor + random_factor) * base_intensity
+        spike_factors = (height_factor + radial_factor + random_factor) * base_intensity
 
         # Apply dramatic displacement
         enhanced_vertices = vertices.copy()
@@ -43,32 +65,34 @@ class MeshEnhancer:
         return enhanced_vertices
 
     @staticmethod
-    def enhance_features(vertices, faces):
-        """Apply dramatic feature enhancement"""
-        # Calculate mesh properties
-        edges = set()
-        for face in faces:
-            for i in range(3):
-                edge = tuple(sorted([face[i], face[(i + 1) % 3]]))
-                edges.add(edge)
-        
-        # Create sharp features along edges
-        edge_vertices = set()
-        for edge in edges:
-            edge_vertices.update(edge)
-        
+    def enhance_features(vertices, faces, rng=None):
+        """Apply dramatic feature enhancement
+
+        Args:
+            rng: numpy Generator for the random factors; a fresh unseeded
+                one is used when omitted
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        vertices = np.asarray(vertices, dtype=float)
+        faces = np.asarray(faces, dtype=np.intp).reshape(-1, 3)
+
+        # Every vertex referenced by a face lies on a mesh edge
+        is_edge = np.zeros(len(vertices), dtype=bool)
+        is_edge[faces.ravel()] = True
+
+        # One draw per vertex in index order: edges use [1.5, 2.5), others [0.8, 1.2)
+        low = np.where(is_edge, 1.5, 0.8)
+        high = np.where(is_edge, 2.5, 1.2)
+        factors = rng.uniform(low, high)
+
         # Enhanced vertex positions
         enhanced_vertices = vertices.copy()
-        
-        # Apply dramatic transformations
-        for i in range(len(vertices)):
-            if i in edge_vertices:
-                # Enhance edge features
-                factor = np.random.uniform(1.5, 2.5)
-                enhanced_vertices[i] += (vertices[i] - np.mean(vertices, axis=0)) * factor
-            else:
-                # Add subtle variation to non-edge vertices
-                factor = np.random.uniform(0.8, 1.2)
-                enhanced_vertices[i] *= factor
+        center = np.mean(vertices, axis=0)
+
+        # Enhance edge features
+        enhanced_vertices[is_edge] += (vertices[is_edge] - center) * factors[is_edge, np.newaxis]
+
+        # Add subtle variation to non-edge vertices
+        enhanced_vertices[~is_edge] *= factors[~is_edge, np.newaxis]
 
         return enhanced_vertices
\ No newline at end of file
@@ -0,0 +1,102 @@
+# app/mesh_transport.py
+"""Binary encodings for triangle meshes
+
+Two formats are supported next to the JSON fallback:
+
+'bin' (application/vnd.neurodepth.mesh), little-endian:
+    header    4s magic b'NDMH', uint16 version, uint16 flags (reserved, 0),
+              uint32 vertex count, uint32 face count, uint32 metadata length
+    metadata  UTF-8 JSON, space padded to a multiple of 4 bytes
+    vertices  float32[vertex count * 3]
+    faces     uint32[face count * 3]
+
+'glb' (model/gltf-binary): a glTF 2.0 binary container with one indexed
+triangle mesh; the metadata is stored in the asset `extras`.
+"""
+import json
+import struct
+import numpy as np
+
+MESH_MAGIC = b'NDMH'
+MESH_VERSION = 1
+MESH_HEADER = struct.Struct('<4sHHIII')
+
+MESH_CONTENT_TYPES = {
+    'bin': 'application/vnd.neurodepth.mesh',
+    'glb': 'model/gltf-binary',
+}
+
+def _pad(data, fill=b' '):
+    return data + fill * (-len(data) % 4)
+
+def mesh_arrays(vertices, faces):
+    """Return contiguous float32 (N, 3) vertices and uint32 (M, 3) faces"""
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+    faces = np.ascontiguousarray(faces, dtype=np.uint32).reshape(-1, 3)
+    return vertices, faces
+
+def pack_mesh(vertices, faces, metadata=None):
+    """Encode a mesh in the 'bin' format"""
+    vertices, faces = mesh_arrays(vertices, faces)
+    meta = _pad(json.dumps(metadata or {}).encode('utf-8'))
+    header = MESH_HEADER.pack(MESH_MAGIC, MESH_VERSION, 0, len(vertices), len(faces), len(meta))
+    return b''.join([header, meta, vertices.tobytes(), faces.tobytes()])
+
+def unpack_mesh(data):
+    """Decode a 'bin' mesh into (vertices, faces, metadata)"""
+    magic, version, _, n_vertices, n_faces, meta_len = MESH_HEADER.unpack_from(data, 0)
+    if magic != MESH_MAGIC:
+        raise ValueError("Not a NeuroDepthNet mesh buffer")
+    if version != MESH_VERSION:
+        raise ValueError(f"Unsupported mesh buffer version: {version}")
+
+    offset = MESH_HEADER.size
+    metadata = json.loads(bytes(data[offset:offset + meta_len]).decode('utf-8'))
+    offset += meta_len
+    vertices = np.frombuffer(data, dtype=np.float32, count=n_vertices * 3, offset=offset).reshape(-1, 3)
+    offset += vertices.nbytes
+    faces = np.frombuffer(data, dtype=np.uint32, count=n_faces * 3, offset=offset).reshape(-1, 3)
+    return vertices, faces, metadata
+
+def pack_glb(vertices, faces, metadata=None):
+    """Encode a mesh as a single-buffer glTF 2.0 binary (GLB)"""
+    vertices, faces = mesh_arrays(vertices, faces)
+    vertex_bytes = vertices.tobytes()
+    index_bytes = faces.tobytes()
+    binary = _pad(vertex_bytes + index_bytes, b'\x00')
+
+    bounds_min = vertices.min(axis=0).tolist() if len(vertices) else [0.0, 0.0, 0.0]
+    bounds_max = vertices.max(axis=0).tolist() if len(vertices) else [0.0, 0.0, 0.0]
+    gltf = {
+        'asset': {'version': '2.0', 'generator': 'NeuroDepthNet', 'extras': metadata or {}},
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{'mesh': 0}],
+        'meshes': [{'primitives': [{'attributes': {'POSITION': 0}, 'indices': 1, 'mode': 4}]}],
+        'buffers': [{'byteLength': len(binary)}],
+        'bufferViews': [
+            {'buffer': 0, 'byteOffset': 0, 'byteLength': len(vertex_bytes), 'target': 34962},
+            {'buffer': 0, 'byteOffset': len(vertex_bytes), 'byteLength': len(index_bytes), 'target': 34963},
+        ],
+        'accessors': [
+            {'bufferView': 0, 'componentType': 5126, 'count': len(vertices), 'type': 'VEC3',
+             'min': bounds_min, 'max': bounds_max},
+            {'bufferView': 1, 'componentType': 5125, 'count': faces.size, 'type': 'SCALAR'},
+        ],
+    }
+    json_chunk = _pad(json.dumps(gltf, separators=(',', ':')).encode('utf-8'))
+
+    total_length = 12 + 8 + len(json_chunk) + 8 + len(binary)
+    return b''.join([
+        struct.pack('<4sII', b'glTF', 2, total_length),
+        struct.pack('<I4s', len(json_chunk), b'JSON'), json_chunk,
+        struct.pack('<I4s', len(binary), b'BIN\x00'), binary,
+    ])
+
+def encode_mesh(fmt, vertices, faces, metadata=None):
+    """Encode a mesh as 'bin' or 'glb'"""
+    if fmt == 'bin':
+        return pack_mesh(vertices, faces, metadata)
+    if fmt == 'glb':
+        return pack_glb(vertices, faces, metadata)
+    raise ValueError(f"Unknown mesh format: {fmt}")
\ No newline at end of file
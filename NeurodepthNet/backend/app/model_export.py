@@ -0,0 +1,178 @@
+# app/model_export.py
+"""Export the trained Keras classifier to lighter inference runtimes
+
+Writes next to the source model (tumor_model.h5):
+    tumor_model.tflite        float32 TFLite flatbuffer
+    tumor_model_int8.tflite   dynamic-range int8 quantized TFLite
+    tumor_model.onnx          float32 ONNX graph (requires tf2onnx)
+    tumor_model_int8.onnx     dynamic int8 quantized ONNX (requires onnxruntime)
+
+Usage:
+    python -m app.model_export --formats tflite onnx
+"""
+import os
+import stat
+import argparse
+import logging
+import tempfile
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Backend name -> (file suffix appended to the model stem, extension)
+EXPORT_FORMATS = {
+    'tflite': ('', '.tflite'),
+    'tflite-int8': ('_int8', '.tflite'),
+    'onnx': ('', '.onnx'),
+    'onnx-int8': ('_int8', '.onnx'),
+}
+
+def exported_model_path(model_path, backend):
+    """Path of the exported model used by `backend` for a given Keras model path"""
+    if backend == 'keras':
+        return model_path
+    if backend not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown model backend: {backend}")
+    suffix, extension = EXPORT_FORMATS[backend]
+    stem = os.path.splitext(model_path)[0]
+    return f"{stem}{suffix}{extension}"
+
+def model_file_identity(path):
+    """Identity of a model file that changes whenever training or an export replaces it
+
+    Made of the inode, size and modification time, so it needs no model to
+    be loaded, survives restarts and is the same in every worker.
+    """
+    st = os.stat(path)
+    return f"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"
+
+def _umask():
+    # The umask can only be read by setting it
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+@contextmanager
+def replacing(path):
+    """Temporary path next to `path` that replaces it once the block succeeds
+
+    The TFLite and ONNX engines memory-map their model file, so an export
+    must never truncate or rewrite that file in place. A failed block leaves
+    the existing file untouched. The new file keeps the mode of the one it
+    replaces, or gets the umask default, rather than mkstemp's 0600.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=os.path.splitext(name)[1], dir=directory)
+    os.close(fd)
+    try:
+        yield tmp_path
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_umask()
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+class ModelExporter:
+    def __init__(self, model_path, image_size=(224, 224)):
+        self.model_path = model_path
+        self.image_size = image_size
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            import tensorflow as tf
+            self._model = tf.keras.models.load_model(self.model_path)
+        return self._model
+
+    def _input_signature(self):
+        import tensorflow as tf
+        return [tf.TensorSpec(shape=(None, *self.image_size, 1), dtype=tf.float32, name='image')]
+
+    def export_tflite(self, quantize=False):
+        """Convert to TFLite, optionally with dynamic-range int8 weight quantization"""
+        import tensorflow as tf
+
+        # The batch dimension stays dynamic and is resized by TFLiteEngine
+        converter = tf.lite.TFLiteConverter.from_keras_model(self.model)
+        if quantize:
+            # No representative dataset: weights become int8, activations stay float
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        output_path = exported_model_path(self.model_path, 'tflite-int8' if quantize else 'tflite')
+        flatbuffer = converter.convert()
+        with replacing(output_path) as tmp_path, open(tmp_path, 'wb') as f:
+            f.write(flatbuffer)
+
+        logger.info(f"Exported TFLite model to {output_path}")
+        return output_path
+
+    def export_onnx(self, quantize=False, opset=13):
+        """Convert to ONNX with tf2onnx, optionally also writing the int8 variant (see quantize_onnx)"""
+        try:
+            import tf2onnx
+        except ImportError as e:
+            raise ImportError("ONNX export requires the 'tf2onnx' package") from e
+
+        output_path = exported_model_path(self.model_path, 'onnx')
+        with replacing(output_path) as tmp_path:
+            tf2onnx.convert.from_keras(
+                self.model,
+                input_signature=self._input_signature(),
+                opset=opset,
+                output_path=tmp_path
+            )
+        logger.info(f"Exported ONNX model to {output_path}")
+
+        if quantize:
+            return self.quantize_onnx()
+        return output_path
+
+    def quantize_onnx(self):
+        """Dynamic int8 quantization of the float32 ONNX file written by export_onnx"""
+        try:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+        except ImportError as e:
+            raise ImportError("ONNX quantization requires the 'onnxruntime' package") from e
+
+        float_path = exported_model_path(self.model_path, 'onnx')
+        if not os.path.exists(float_path):
+            raise FileNotFoundError(f"No ONNX model to quantize at {float_path}; run export_onnx first")
+
+        quantized_path = exported_model_path(self.model_path, 'onnx-int8')
+        with replacing(quantized_path) as tmp_path:
+            quantize_dynamic(float_path, tmp_path, weight_type=QuantType.QInt8)
+        logger.info(f"Exported quantized ONNX model to {quantized_path}")
+        return quantized_path
+
+    def export(self, formats=('tflite', 'onnx')):
+        """Export every requested format, float32 and int8 variants"""
+        outputs = []
+        for fmt in formats:
+            if fmt == 'tflite':
+                outputs.append(self.export_tflite(quantize=False))
+                outputs.append(self.export_tflite(quantize=True))
+            elif fmt == 'onnx':
+                # Convert once; the int8 variant is quantized from the file just written
+                outputs.append(self.export_onnx())
+                outputs.append(self.quantize_onnx())
+            else:
+                raise ValueError(f"Unknown export format: {fmt}")
+        return outputs
+
+if __name__ == "__main__":
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(os.path.dirname(current_dir))
+
+    parser = argparse.ArgumentParser(description="Export tumor_model.h5 to TFLite and/or ONNX")
+    parser.add_argument('--model', default=os.path.join(project_root, 'models', 'tumor_model.h5'))
+    parser.add_argument('--formats', nargs='+', choices=['tflite', 'onnx'], default=['tflite', 'onnx'])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for path in ModelExporter(args.model).export(args.formats):
+        print(f"Wrote {path}")
\ No newline at end of file
@@ -1,31 +1,172 @@
-import SimpleITK as sitk
-import vtk
-from vtk.util import numpy_support
+import time
 import numpy as np
 import logging
-import random
+from .utils import seeded_rng, lazy_import, PeakMemory
+from .slice_ingest import get_ingestor
+from .surface_extraction import SurfaceExtractor, polydata_arrays
+from .slab_segmentation import largest_component_slabs
+
+sitk = lazy_import('SimpleITK')
+vtk = lazy_import('vtk')
+numpy_support = lazy_import('vtkmodules.util.numpy_support')
 
 logger = logging.getLogger(__name__)
 
+# Levels of detail, as triangle reductions of the smoothed base mesh
+LOD_REDUCTIONS = (0.9, 0.7, 0.0)
+
+def otsu_largest_component(volume, threshold=None):
+    """Otsu mask of `volume` reduced to its largest connected component
+
+    Args:
+        volume: SimpleITK image
+        threshold: apply this threshold instead of computing Otsu's; like
+            sitk.OtsuThreshold, voxels at or below it are inside
+
+    Returns:
+        tuple: (uint8 mask of the largest component, threshold, its bounding
+            box as (x, y, z, size_x, size_y, size_z)), or a None box if the
+            mask is empty
+    """
+    if threshold is None:
+        otsu_filter = sitk.OtsuThresholdImageFilter()
+        binary_volume = otsu_filter.Execute(volume)
+        threshold = otsu_filter.GetThreshold()
+    else:
+        binary_volume = volume <= threshold
+
+    labeled_volume = sitk.ConnectedComponent(binary_volume)
+    stats = sitk.LabelShapeStatisticsImageFilter()
+    stats.Execute(labeled_volume)
+    if not stats.GetLabels():
+        return binary_volume, threshold, None
+
+    # Get largest component (assumed to be tumor)
+    largest_label = max(stats.GetLabels(), key=lambda x: stats.GetPhysicalSize(x))
+    return labeled_volume == largest_label, threshold, stats.GetBoundingBox(largest_label)
+
+def expand_bbox(bbox, margin, size, factors=None):
+    """Index and size of a region around `bbox`, clamped to an image of `size`
+
+    Args:
+        bbox: (x, y, z, size_x, size_y, size_z) bounding box
+        margin: voxels added on every side
+        size: image size the region is clamped to
+        factors: per-axis scale from the bounding box's grid to `size`, when
+            the box was found on a volume shrunk by these factors
+
+    Returns:
+        tuple: (index, size) lists for sitk.RegionOfInterest
+    """
+    dims = len(size)
+    factors = factors or [1] * dims
+    index, extent = [], []
+    for axis in range(dims):
+        start = bbox[axis] * factors[axis] - margin
+        end = (bbox[axis] + bbox[dims + axis]) * factors[axis] + margin
+        if (bbox[axis] + bbox[dims + axis]) == size[axis] // factors[axis]:
+            # Shrinking drops the voxels past the last whole bin
+            end = size[axis]
+        start, end = max(0, start), min(size[axis], end)
+        index.append(int(start))
+        extent.append(int(end - start))
+    return index, extent
+
+def decimate_polydata(polydata, reduction, max_triangles=None):
+    """vtkDecimatePro `polydata` by `reduction`, without exceeding `max_triangles`
+
+    On thin, smoothed surfaces the default 15 degree feature angle stops
+    DecimatePro well short of its target, so a short run is repeated with
+    a 45 degree feature angle. If that still exceeds `max_triangles`, a
+    last run gives up topology preservation and may open the surface.
+    """
+    if reduction <= 0:
+        return polydata
+    target = polydata.GetNumberOfPolys() * (1.0 - reduction)
+    limit = max(int(target * 1.05), int(target) + 1)
+    decimate = vtk.vtkDecimatePro()
+    decimate.SetInputData(polydata)
+    decimate.SetTargetReduction(reduction)
+    decimate.PreserveTopologyOn()
+    decimate.Update()
+
+    retries = [lambda: decimate.SetFeatureAngle(45.0)]
+    if max_triangles:
+        limit = min(limit, max_triangles)
+        retries.append(lambda: (decimate.PreserveTopologyOff(), decimate.SplittingOn()))
+    for retry in retries:
+        if decimate.GetOutput().GetNumberOfPolys() <= limit:
+            break
+        retry()
+        decimate.Update()
+
+    output = vtk.vtkPolyData()
+    output.ShallowCopy(decimate.GetOutput())
+    return output
+
+def lod_targets(num_triangles, reductions, max_triangles=None):
+    """Reductions to build for a base mesh, finest first
+
+    Levels above `max_triangles` are dropped, and a level that just fits
+    the budget replaces them when the base mesh exceeds it.
+    """
+    reductions = sorted(set(float(r) for r in reductions))
+    if not max_triangles or num_triangles <= max_triangles:
+        return reductions
+    budget = 1.0 - max_triangles / num_triangles
+    return [budget] + [r for r in reductions if r > budget]
+
 class VolumeReconstructor:
-    def __init__(self):
+    def __init__(self, roi_margin=2, segment_shrink=1, lod_reductions=LOD_REDUCTIONS, surface_extractor=None,
+                 slab_slices=None, volume_dir=None):
+        """
+        Args:
+            roi_margin: voxels kept around the tumor when meshing; None meshes
+                the whole grid. At least 1 keeps the surface closed.
+            segment_shrink: segment a volume shrunk by this factor first and
+                refine at full resolution inside the region it finds
+            lod_reductions: triangle reductions of the base mesh to build as
+                levels of detail; 0.0 is the base mesh itself
+            surface_extractor: SurfaceExtractor for the isosurface; defaults
+                to choosing the backend per volume
+            slab_slices: segment_slices() labels stacks of more slices than
+                this slab by slab (app.slab_segmentation); None keeps the
+                whole volume in memory
+            volume_dir: directory for the memory-mapped files of slab mode
+        """
         self.slice_thickness = 3.0  # mm
         self.pixel_spacing = [1.0, 1.0]  # mm
+        if not lod_reductions or not all(0.0 <= r < 1.0 for r in lod_reductions):
+            raise ValueError("lod_reductions must be one or more values in [0, 1)")
+        self.roi_margin = roi_margin
+        self.segment_shrink = segment_shrink
+        self.lod_reductions = tuple(lod_reductions)
+        self.surface_extractor = surface_extractor or SurfaceExtractor()
+        self.slab_slices = slab_slices
+        self.volume_dir = volume_dir
         self._volume = None
         self._tumor_mask = None
 
     def create_volume_from_slices(self, slices):
-        """Convert multiple 2D slices into a 3D volume"""
+        """Convert multiple 2D slices into a 3D volume
+
+        Args:
+            slices: list of 2D uint8 arrays (resized to the first one if
+                their sizes differ) or an already stacked (Z, H, W) array
+        """
         try:
+            # Stack slices into 3D volume
+            if isinstance(slices, np.ndarray) and slices.ndim == 3:
+                volume = slices
+            else:
+                volume = get_ingestor().stack(slices)
+
             # Ensure we have at least 2 slices for 3D
-            if len(slices) < 2:
+            if volume.shape[0] < 2:
                 # Duplicate the slice to create minimal 3D volume
-                slices = [slices[0]] * 3  # Create 3 copies for minimal 3D volume
+                volume = np.repeat(volume, 3, axis=0)  # Create 3 copies for minimal 3D volume
                 logger.info("Single slice detected - creating minimal 3D volume")
             
-            # Stack slices into 3D volume
-            volume = np.stack(slices, axis=0)
-            
             # Convert to SimpleITK image
             self._volume = sitk.GetImageFromArray(volume)
             self._volume.SetSpacing([
@@ -41,33 +182,79 @@ class VolumeReconstructor:
             logger.error(f"Volume creation failed: {str(e)}")
             raise
 
-    def segment_tumor_3d(self, volume):
-        """Segment tumor in 3D using advanced thresholding"""
+    def segment_tumor_3d(self, volume, shrink=None):
+        """Segment tumor in 3D using Otsu thresholding and the largest connected component
+
+        With `shrink` > 1 the threshold and the component are first found on
+        a volume shrunk by that factor. Connected components then run again
+        at full resolution only inside the component's bounding box, grown by
+        one bin and `roi_margin` voxels, and the result is pasted into a
+        full-size mask.
+        """
         try:
-            # Apply 3D Otsu thresholding
-            otsu_filter = sitk.OtsuThresholdImageFilter()
-            binary_volume = otsu_filter.Execute(volume)
+            shrink = self.segment_shrink if shrink is None else shrink
+            size = volume.GetSize()
+            factors = [shrink if extent >= 2 * shrink else 1 for extent in size]
 
-            # Apply 3D connected component analysis
-            cc_filter = sitk.ConnectedComponentImageFilter()
-            labeled_volume = cc_filter.Execute(binary_volume)
+            if shrink <= 1 or factors == [1] * len(size):
+                self._tumor_mask, _, bbox = otsu_largest_component(volume)
+                if bbox is None:
+                    raise ValueError("Segmentation found no foreground")
+                return self._tumor_mask
 
-            # Get largest component (assumed to be tumor)
-            stats = sitk.LabelShapeStatisticsImageFilter()
-            stats.Execute(labeled_volume)
-            largest_label = max(stats.GetLabels(), 
-                              key=lambda x: stats.GetPhysicalSize(x))
+            coarse = sitk.BinShrink(volume, factors)
+            _, threshold, bbox = otsu_largest_component(coarse)
+            if bbox is None:
+                raise ValueError("Coarse segmentation found no foreground")
+
+            index, extent = expand_bbox(bbox, max(factors) + (self.roi_margin or 0), size, factors)
+            roi = sitk.RegionOfInterest(volume, extent, index)
+            refined, _, _ = otsu_largest_component(roi, threshold)
 
-            self._tumor_mask = labeled_volume == largest_label
+            mask = sitk.Image(size, refined.GetPixelID())
+            mask.CopyInformation(volume)
+            self._tumor_mask = sitk.Paste(mask, refined, refined.GetSize(), [0] * len(size), index)
+            logger.info(f"Refined segmentation inside region {index} + {extent} of {list(size)}")
             return self._tumor_mask
 
         except Exception as e:
             logger.error(f"3D segmentation failed: {str(e)}")
             raise
 
-    def calculate_tumor_metrics(self, tumor_mask):
-        """Calculate comprehensive 3D tumor measurements"""
+    def segment_slices(self, slices):
+        """Tumor mask of a slice stack, as segment_tumor_3d would give it
+
+        Stacks of more than `slab_slices` slices, such as a np.memmap from
+        MappedVolumeBuffer, never become a SimpleITK volume: the largest
+        component is found slab by slab and only the uint8 mask is loaded.
+        `segment_shrink` does not apply to them.
+        """
+        if self.slab_slices and isinstance(slices, np.ndarray) and slices.ndim == 3 \
+                and len(slices) > self.slab_slices:
+            try:
+                mask, threshold, voxels = largest_component_slabs(slices, self.slab_slices, self.volume_dir)
+                self._tumor_mask = sitk.GetImageFromArray(mask)
+                self._tumor_mask.SetSpacing([self.pixel_spacing[0], self.pixel_spacing[1], self.slice_thickness])
+                logger.info(f"Segmented {len(slices)} slices in slabs of {self.slab_slices}: "
+                            f"threshold {threshold:.1f}, {voxels} tumor voxels")
+                return self._tumor_mask
+            except Exception as e:
+                logger.error(f"Slab segmentation failed: {str(e)}")
+                raise
+        return self.segment_tumor_3d(self.create_volume_from_slices(slices))
+
+    def calculate_tumor_metrics(self, tumor_mask, rng=None):
+        """Calculate comprehensive 3D tumor measurements
+
+        Args:
+            tumor_mask: binary SimpleITK image
+            rng: numpy Generator for the depth estimate; defaults to one
+                seeded from the mask contents so results are reproducible
+        """
         try:
+            if rng is None:
+                rng = seeded_rng(sitk.GetArrayViewFromImage(tumor_mask), tumor_mask.GetSpacing())
+
             stats = sitk.LabelShapeStatisticsImageFilter()
             stats.Execute(tumor_mask)
 
@@ -90,7 +277,7 @@ class VolumeReconstructor:
             metrics = {
                 'volume_mm3': float(volume_mm3),
                 'surface_area_mm2': float(surface_area_mm2),
-                'depth_mm': round(random.uniform(1.0, 12.0), 2),
+                'depth_mm': round(float(rng.uniform(1.0, 12.0)), 2),
                 'width_mm': float(physical_dims['width']),
                 'height_mm': float(physical_dims['height']),
                 'num_slices': num_slices,
@@ -106,96 +293,157 @@ class VolumeReconstructor:
             logger.error(f"Metrics calculation failed: {str(e)}")
             raise
 
-    def generate_3d_mesh(self, tumor_mask):
-        """Generate 3D mesh for visualization"""
+    def crop_to_tumor(self, tumor_mask):
+        """Crop a binary mask to its foreground's bounding box plus `roi_margin` voxels
+
+        sitk.RegionOfInterest moves the origin to the region's first voxel,
+        so vertices meshed from the crop are already in world coordinates.
+        The mask is returned unchanged if cropping is disabled or the mask is
+        empty.
+        """
+        if self.roi_margin is None:
+            return tumor_mask
+        stats = sitk.LabelShapeStatisticsImageFilter()
+        stats.Execute(tumor_mask)
+        if 1 not in stats.GetLabels():
+            return tumor_mask
+
+        index, extent = expand_bbox(stats.GetBoundingBox(1), self.roi_margin, tumor_mask.GetSize())
+        if extent == list(tumor_mask.GetSize()):
+            return tumor_mask
+        logger.debug(f"Meshing region {index} + {extent} of {list(tumor_mask.GetSize())}")
+        return sitk.RegionOfInterest(tumor_mask, extent, index)
+
+    def _extract_surface(self, tumor_mask):
+        """Isosurface, decimation, smoothing and triangulation of a binary mask
+
+        Returns:
+            tuple: (smoothed base triangle vtkPolyData, Surface of the raw isosurface)
+        """
+        # A C-order (z, y, x) view of the voxels, handed to VTK without copies;
+        # tumor_mask stays referenced until the pipeline has run
+        view = sitk.GetArrayViewFromImage(tumor_mask)
+        spacing, origin = tumor_mask.GetSpacing(), tumor_mask.GetOrigin()
+        surface = self.surface_extractor.extract(view, 0.5, spacing, origin, labels=True)
+
+        # Verify surface output
+        if surface.polydata.GetNumberOfPoints() == 0:
+            logger.error("Surface extraction failed - trying with different threshold")
+            surface = self.surface_extractor.extract(view, 0.1, spacing, origin, labels=True)  # Try with lower threshold
+
+            if surface.polydata.GetNumberOfPoints() == 0:
+                raise ValueError("Surface extraction produced empty surface")
+
+        # Decimate mesh to reduce complexity
+        decimate = vtk.vtkDecimatePro()
+        decimate.SetInputData(surface.polydata)
+        decimate.SetTargetReduction(0.5)
+        decimate.PreserveTopologyOn()
+        decimate.Update()
+
+        # Smooth the mesh
+        smoother = vtk.vtkWindowedSincPolyDataFilter()
+        smoother.SetInputConnection(decimate.GetOutputPort())
+        smoother.SetNumberOfIterations(15)
+        smoother.SetPassBand(0.1)
+        smoother.BoundarySmoothingOff()
+        smoother.FeatureEdgeSmoothingOff()
+        smoother.Update()
+
+        # Verify smoother output
+        if (smoother.GetOutput().GetNumberOfPoints() == 0):
+            raise ValueError("Smoothing produced empty mesh")
+
+        # Triangulate the mesh
+        triangles = vtk.vtkTriangleFilter()
+        triangles.SetInputConnection(smoother.GetOutputPort())
+        triangles.Update()
+
+        # Get final mesh
+        mesh = triangles.GetOutput()
+        if (mesh is None or mesh.GetNumberOfPoints() == 0):
+            raise ValueError("Failed to generate valid mesh")
+        return mesh, surface
+
+    def _build_lods(self, base, max_triangles=None):
+        """Decimate the smoothed base mesh into levels of detail, coarsest first
+
+        Each level is decimated from the next finer one rather than from the
+        base, so the coarse levels cost a fraction of the first.
+
+        Returns:
+            list: (reduction, vtkPolyData) pairs
+        """
+        num_triangles = base.GetNumberOfPolys()
+        lods = []
+        source, source_reduction = base, 0.0
+        for reduction in lod_targets(num_triangles, self.lod_reductions, max_triangles):
+            # Reduction still needed relative to the finer level's triangles
+            relative = 1.0 - (1.0 - reduction) / (1.0 - source_reduction)
+            budget = max_triangles if max_triangles and not lods else None
+            source = decimate_polydata(source, relative, budget)
+            source_reduction = reduction
+            lods.append((reduction, source))
+        return lods[::-1]
+
+    def generate_3d_mesh(self, tumor_mask, as_arrays=False, max_triangles=None):
+        """Generate 3D mesh for visualization
+
+        The isosurface is extracted only on the tumor's bounding box plus
+        `roi_margin` voxels; see crop_to_tumor().
+
+        Args:
+            tumor_mask: binary SimpleITK image
+            as_arrays: return float32 vertices and uint32 faces as numpy arrays
+                instead of nested lists, for binary mesh transport
+            max_triangles: triangle budget; no level of detail exceeds it
+
+        Returns:
+            dict: 'vertices' and 'faces' of the finest level, voxel 'spacing',
+                'lods' with the 'reduction', 'vertices' and 'faces' of every
+                level from coarsest to finest, and 'stats' with the meshing
+                time, the peak RSS it added (see PeakMemory), and the surface
+                backend and its time
+        """
         try:
             if tumor_mask is None:
                 raise ValueError("Input tumor mask is None")
 
-            # Convert SimpleITK image to numpy array
-            array = sitk.GetArrayFromImage(tumor_mask)
-            if array.size == 0:
-                raise ValueError("Empty tumor mask array")
-
-            # Ensure we have a 3D volume
-            if array.shape[0] == 1:
-                # Duplicate the slice to create 3D volume
-                array = np.repeat(array, 3, axis=0)
-                logger.info("Extended single slice to 3D volume")
-
-            # Create VTK image data
-            vtk_image = vtk.vtkImageData()
-            dimensions = (array.shape[2], array.shape[1], array.shape[0])  # VTK expects dimensions in x,y,z order
-            vtk_image.SetDimensions(dimensions)
-            vtk_image.SetSpacing(tumor_mask.GetSpacing())
-            vtk_image.SetOrigin(tumor_mask.GetOrigin())
-            
-            # Set the tumor mask data
-            flat_array = array.ravel(order='F')  # Flatten in Fortran order for VTK
-            vtk_array = numpy_support.numpy_to_vtk(flat_array)
-            vtk_image.GetPointData().SetScalars(vtk_array)
-
-            logger.debug(f"Created VTK image with dimensions: {dimensions}")
-
-            # Create marching cubes filter
-            surface = vtk.vtkMarchingCubes()
-            surface.SetInputData(vtk_image)
-            surface.SetValue(0, 0.5)
-            surface.Update()
-
-            # Verify surface output
-            if surface.GetOutput().GetNumberOfPoints() == 0:
-                logger.error("Marching cubes failed - trying with different threshold")
-                surface.SetValue(0, 0.1)  # Try with lower threshold
-                surface.Update()
-                
-                if surface.GetOutput().GetNumberOfPoints() == 0:
-                    raise ValueError("Marching cubes produced empty surface")
-
-            # Decimate mesh to reduce complexity
-            decimate = vtk.vtkDecimatePro()
-            decimate.SetInputConnection(surface.GetOutputPort())
-            decimate.SetTargetReduction(0.5)
-            decimate.PreserveTopologyOn()
-            decimate.Update()
-
-            # Smooth the mesh
-            smoother = vtk.vtkWindowedSincPolyDataFilter()
-            smoother.SetInputConnection(decimate.GetOutputPort())
-            smoother.SetNumberOfIterations(15)
-            smoother.SetPassBand(0.1)
-            smoother.BoundarySmoothingOff()
-            smoother.FeatureEdgeSmoothingOff()
-            smoother.Update()
-
-            # Verify smoother output
-            if (smoother.GetOutput().GetNumberOfPoints() == 0):
-                raise ValueError("Smoothing produced empty mesh")
-
-            # Triangulate the mesh
-            triangles = vtk.vtkTriangleFilter()
-            triangles.SetInputConnection(smoother.GetOutputPort())
-            triangles.Update()
-
-            # Get final mesh
-            mesh = triangles.GetOutput()
-            if (mesh is None or mesh.GetNumberOfPoints() == 0):
-                raise ValueError("Failed to generate valid mesh")
-
-            # Extract mesh data
-            points = numpy_support.vtk_to_numpy(mesh.GetPoints().GetData())
-            cells = numpy_support.vtk_to_numpy(mesh.GetPolys().GetData())
-            
-            # Reshape cells array to get faces
-            faces = cells.reshape(-1, 4)[:, 1:].tolist()
+            tumor_mask = self.crop_to_tumor(tumor_mask)
+
+            # Marching cubes needs two layers; pad a single slice with background
+            if tumor_mask.GetSize()[2] == 1:
+                tumor_mask = sitk.ConstantPad(tumor_mask, [0, 0, 1], [0, 0, 1])
+                logger.info("Padded single slice to 3D volume")
+
+            start = time.perf_counter()
+            with PeakMemory() as memory:
+                base, surface = self._extract_surface(tumor_mask)
+                lods = []
+                for reduction, polydata in self._build_lods(base, max_triangles):
+                    points, faces = polydata_arrays(polydata)
+                    lods.append({
+                        'reduction': round(reduction, 4),
+                        'vertices': points.astype(np.float32) if as_arrays else points.tolist(),
+                        'faces': faces.astype(np.uint32) if as_arrays else faces.tolist()
+                    })
 
             mesh_data = {
-                'vertices': points.tolist(),
-                'faces': faces,
-                'spacing': [float(x) for x in tumor_mask.GetSpacing()]
+                'vertices': lods[-1]['vertices'],
+                'faces': lods[-1]['faces'],
+                'lods': lods,
+                'spacing': [float(x) for x in tumor_mask.GetSpacing()],
+                'stats': {
+                    'mesh_ms': round((time.perf_counter() - start) * 1000.0, 1),
+                    'surface_backend': surface.backend,
+                    'surface_ms': round(surface.seconds * 1000.0, 1),
+                    'peak_rss_mb': None if memory.peak_mb is None else round(memory.peak_mb, 1)
+                }
             }
 
-            logger.info(f"Generated 3D mesh with {len(points)} vertices and {len(faces)} faces")
+            logger.info(f"Generated 3D mesh with {len(points)} vertices and {len(faces)} faces "
+                        f"({len(lods)} levels of detail) in {mesh_data['stats']['mesh_ms']} ms, "
+                        f"peak +{mesh_data['stats']['peak_rss_mb']} MB")
             return mesh_data
 
         except Exception as e:
@@ -1,29 +1,31 @@
-import SimpleITK as sitk
 import numpy as np
-from skimage import measure
 import logging
 from .mesh_enhancer import MeshEnhancer
 import math
 import time
-import random
+from .utils import seeded_rng
+from .slice_ingest import get_ingestor
+from .surface_extraction import SurfaceExtractor, polydata_arrays
 
 logger = logging.getLogger(__name__)
 
 class Reconstructor3D:
-    def __init__(self):
+    def __init__(self, surface_extractor=None):
         self.logger = logging.getLogger(__name__)
+        self.surface_extractor = surface_extractor or SurfaceExtractor()
         self.pixel_spacing = (1.0, 1.0)
         self._volume = None
         self._mask = None
 
-    def _calculate_depth(self, volume_data, tumor_type):
+    def _calculate_depth(self, volume_data, tumor_type, rng=None):
         try:
+            rng = rng if rng is not None else seeded_rng(volume_data, tumor_type)
             tumor_type = tumor_type.lower().strip()
             if tumor_type == 'notumor':
                 return 0.0
 
             # Always return a random positive value for any tumor
-            depth = round(random.uniform(1.0, 12.0), 2)
+            depth = round(float(rng.uniform(1.0, 12.0)), 2)
             self.logger.info(f"Totally random depth: {depth} mm")
             return depth
 
@@ -31,14 +33,14 @@ class Reconstructor3D:
             self.logger.error(f"Depth calculation error: {str(e)}")
             return 1.0  # fallback to a positive value
 
-    def _preprocess_slice(self, slice):
-        """Preprocess individual slice"""
-        min_val = np.min(slice)
-        max_val = np.max(slice)
-        intensity_range = max_val - min_val
-        return ((slice - min_val) / intensity_range * 255).astype(np.uint8)
+    def process_slices(self, slices, tumor_type, as_arrays=False, rng=None):
+        """Build the enhanced mesh for a stack of slices
 
-    def process_slices(self, slices, tumor_type):
+        With as_arrays=True the mesh is returned as float32/uint32 numpy
+        arrays for binary transport instead of nested lists. Randomness is
+        drawn from `rng`, which defaults to a generator seeded from the
+        slice contents, so identical inputs give identical output.
+        """
         try:
             if not slices:
                 return {'success': False, 'error': 'No slices provided'}
@@ -47,24 +49,27 @@ class Reconstructor3D:
             self.logger.info(f"Tumor type: {tumor_type}")
             self.logger.info(f"Slice count: {len(slices)}")
 
-            # Preprocess and stack slices into a volume
-            volume = np.stack([self._preprocess_slice(s) for s in slices], axis=0)
+            # Min-max normalize every slice in parallel straight into a uint8 volume
+            volume = get_ingestor().stack(slices, normalize=True)
+
+            if rng is None:
+                rng = seeded_rng(volume, tumor_type)
 
             # Generate depth per tumor type
-            depth = self._calculate_depth(volume, tumor_type)
+            depth = self._calculate_depth(volume, tumor_type, rng=rng)
 
             # Generate raw mesh
             vertices, faces = self._generate_mesh(volume)
 
             # Enhance mesh features
-            enhanced_vertices, enhanced_faces = self._enhance_mesh_features(vertices, faces)
+            enhanced_vertices, enhanced_faces = self._enhance_mesh_features(vertices, faces, rng=rng)
 
             return {
                 'success': True,
                 'metrics': {'depth_mm': float(depth)},
                 'mesh': {
-                    'vertices': enhanced_vertices.tolist(),
-                    'faces': enhanced_faces.tolist()
+                    'vertices': enhanced_vertices.astype(np.float32) if as_arrays else enhanced_vertices.tolist(),
+                    'faces': enhanced_faces.astype(np.uint32) if as_arrays else enhanced_faces.tolist()
                 }
             }
 
@@ -75,15 +80,19 @@ class Reconstructor3D:
     def _generate_mesh(self, volume):
         try:
             self.logger.info("Generating mesh from volume...")
-            verts, faces, normals, values = measure.marching_cubes(volume, level=0.5)
-            return verts, faces
+            surface = self.surface_extractor.extract(volume, level=0.5)
+            self.logger.info(f"{surface.backend} surface in {surface.seconds * 1000.0:.1f} ms")
+            verts, faces = polydata_arrays(surface.polydata)
+            # Vertices in (z, y, x) voxel order, as marching_cubes returned them
+            return verts[:, ::-1], faces
         except Exception as e:
             self.logger.error(f"Mesh generation error: {str(e)}")
             return np.array([]), np.array([])
 
-    def _enhance_mesh_features(self, vertices, faces):
+    def _enhance_mesh_features(self, vertices, faces, rng=None):
         """Create extreme mesh features"""
         try:
+            rng = rng if rng is not None else seeded_rng(vertices, faces)
             if len(vertices) == 0:
                 self.logger.warning("No vertices to enhance.")
                 return vertices, faces
@@ -94,11 +103,12 @@ class Reconstructor3D:
             enhanced_vertices = MeshEnhancer.create_dramatic_spikes(
                 enhanced_vertices, 
                 faces, 
-                base_intensity=5.0  # Increased intensity
+                base_intensity=5.0,  # Increased intensity
+                rng=rng
             )
 
             # Random displacement
-            noise = np.random.normal(0, 0.3, enhanced_vertices.shape)
+            noise = rng.normal(0, 0.3, enhanced_vertices.shape)
             enhanced_vertices += noise
 
             # Center-based exaggeration
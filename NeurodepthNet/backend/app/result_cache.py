@@ -0,0 +1,204 @@
+# app/result_cache.py
+import os
+import sys
+import pickle
+import tempfile
+import threading
+import logging
+from collections import OrderedDict
+import numpy as np
+from .utils import content_hash
+
+logger = logging.getLogger(__name__)
+
+def estimate_size(value):
+    """Approximate memory footprint of a cached value in bytes"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_size(k) + estimate_size(v) for k, v in value.items()) + 64
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value) + 56
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """Size-bounded LRU cache for per-upload results, with an optional disk tier
+
+    Keys are content hashes of the raw upload bytes plus the processing
+    parameters (see `make_key`), so identical uploads share entries across
+    endpoints. When `disk_dir` is set, entries are also pickled there and
+    survive worker restarts. The bytes on disk are counted as entries are
+    written; once they pass `disk_max_bytes` the directory is scanned and
+    trimmed oldest-first, which also picks up files other workers wrote.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, disk_dir=None, disk_max_bytes=2 * 1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._disk_bytes = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._trim_disk()
+
+    @staticmethod
+    def make_key(namespace, *parts, **params):
+        """Key for `namespace` from upload bytes/hashes and keyword processing parameters"""
+        return f"{namespace}-{content_hash(*parts, tuple(sorted(params.items())))}"
+
+    def get(self, key, default=None, disk=True):
+        """Cached value for `key`; disk=False skips the disk tier"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+
+        value = self._disk_get(key) if disk else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return default
+            self.disk_hits += 1
+        self._memory_put(key, value)
+        return value
+
+    def put(self, key, value, disk=True):
+        """Cache `value`; disk=False keeps it in memory only"""
+        if value is None:
+            return
+        self._memory_put(key, value)
+        if disk:
+            self._disk_put(key, value)
+
+    def get_or_compute(self, key, compute, disk=True):
+        """Return the cached value for `key`, calling `compute()` on a miss
+
+        None results are returned but never cached. disk=False keeps the
+        entry out of the disk tier, for values cheaper to recompute than to
+        unpickle.
+        """
+        value = self.get(key, disk=disk)
+        if value is None:
+            value = compute()
+            self.put(key, value, disk=disk)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'disk_enabled': bool(self.disk_dir),
+                'disk_bytes': self._disk_bytes
+            }
+
+    def _memory_put(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            logger.debug(f"Not caching {key} in memory: {size} bytes exceeds cache size")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)  # Refresh recency for trimming
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache file {path}: {str(e)}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _disk_put(self, key, value):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            # Write to a temporary file first so readers never see partial entries
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write cache entry {key} to disk: {str(e)}")
+            return
+
+        with self._lock:
+            self._disk_bytes += size - replaced
+            over_budget = self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self._trim_disk()
+
+    def _trim_disk(self):
+        """Scan the disk tier, remove the oldest entries beyond the budget and recount its bytes"""
+        files = []
+        total = 0
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+        with self._lock:
+            self._disk_bytes = total
\ No newline at end of file
@@ -2,36 +2,44 @@
 from flask import request, jsonify
 from flask_cors import CORS, cross_origin
 from .image_processing import ImageProcessor
+from .enhancement import EnhancementSessions
 from .tumor_classification import TumorClassifier
+from .model_export import exported_model_path, model_file_identity
 from .tumor_segmentation import TumorSegmentation
 from .reconstruction import VolumeReconstructor
 from .reconstruction3d import Reconstructor3D
+from .surface_extraction import SurfaceExtractor, surface_timings
+from .result_cache import ResultCache
+from .utils import content_hash, seeded_rng, preload_modules, LazyInstance
+from .mesh_transport import MESH_CONTENT_TYPES, encode_mesh
+from .image_encoding import ImageEncoder, build_multipart
+from .jobs import JobManager, JobQueueFull
+from .training_worker import TrainingWorker, TrainingInProgress
+from .slice_ingest import get_ingestor, iter_multipart_files, MappedVolumeBuffer
 import numpy as np
 import cv2
 import logging
 import os
+import gc
 import base64
+import gzip
+import json
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Heavy libraries the endpoints import lazily on first use, TensorFlow first
+PRELOAD_MODULES = ('tensorflow', 'vtk', 'vtkmodules.util.numpy_support', 'SimpleITK', 'skimage.measure')
+
+# Smallest ?max_triangles= accepted; decimation cannot reliably go lower
+MIN_TRIANGLE_BUDGET = 100
+
 def encode_image(image_array):
     try:
-        if image_array is None:
-            return None
-            
-        # Ensure image is in uint8 format
-        if image_array.dtype != np.uint8:
-            image_array = (image_array * 255).astype(np.uint8)
-            
-        # Encode to png
-        success, encoded_image = cv2.imencode('.png', image_array)
-        if not success:
-            return None
-            
-        # Convert to base64
-        return base64.b64encode(encoded_image.tobytes()).decode('utf-8')
+        # PNG at the default compression, as base64
+        encoded = ImageEncoder().encode(image_array)
+        return encoded.base64() if encoded is not None else None
     except Exception as e:
         print(f"Error encoding image: {str(e)}")
         return None
@@ -44,19 +52,290 @@ def setup_routes(app):
     current_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(os.path.dirname(current_dir))
     model_path = os.path.join(project_root, 'models', 'tumor_model.h5')
+
+    # Classifier runtime: keras (default), tflite, tflite-int8, onnx or onnx-int8.
+    # Non-Keras backends need the files written by `python -m app.model_export`.
+    model_backend = os.environ.get('NEURODEPTH_MODEL_BACKEND', 'keras')
+    model_threads = int(os.environ.get('NEURODEPTH_MODEL_THREADS', '0')) or None
+    backend_model_path = exported_model_path(model_path, model_backend)
     
     # Verify model exists at startup
-    if not os.path.exists(model_path):
-        logger.error(f"Model file not found at {model_path}")
-        raise FileNotFoundError(f"Model file not found at {model_path}")
+    if not os.path.exists(backend_model_path):
+        logger.error(f"Model file not found at {backend_model_path}")
+        raise FileNotFoundError(f"Model file not found at {backend_model_path}")
     
-    logger.info(f"Using model from: {model_path}")
+    logger.info(f"Using {model_backend} model from: {backend_model_path}")
     
+    # Concurrent classify() calls are merged into one forward pass of up to
+    # NEURODEPTH_BATCH_MAX_SIZE images, waiting at most NEURODEPTH_BATCH_MAX_WAIT_MS
+    batch_max_size = int(os.environ.get('NEURODEPTH_BATCH_MAX_SIZE', '16'))
+    batch_max_wait_ms = float(os.environ.get('NEURODEPTH_BATCH_MAX_WAIT_MS', '5'))
+
+    def build_classifier():
+        classifier = TumorClassifier(
+            model_path=model_path,
+            backend=model_backend,
+            num_threads=model_threads,
+            batching=batch_max_size > 1,
+            max_batch_size=batch_max_size,
+            max_wait_ms=batch_max_wait_ms
+        )
+        classifier.warmup()
+        return classifier
+
+    # The classifier is loaded by the first request that needs it, so workers
+    # that only serve e.g. /api/enhance never import TensorFlow
     image_processor = ImageProcessor()
-    tumor_classifier = TumorClassifier(model_path=model_path)
+    tumor_classifier = LazyInstance(build_classifier)
     tumor_segmentation = TumorSegmentation()
-    reconstructor = VolumeReconstructor()
-    reconstructor_3d = Reconstructor3D()
+
+    # Isosurface backend shared by both reconstructors: NEURODEPTH_SURFACE_BACKEND
+    # is 'auto' (flying edges) or one of SURFACE_BACKENDS. Under 'auto', volumes
+    # above NEURODEPTH_SURFACE_COARSE_VOXELS (0 = never) are meshed by skimage
+    # every NEURODEPTH_SURFACE_STEP voxels.
+    surface_step = int(os.environ.get('NEURODEPTH_SURFACE_STEP', '2'))
+    surface_extractor = SurfaceExtractor(
+        backend=os.environ.get('NEURODEPTH_SURFACE_BACKEND', 'auto'),
+        step_size=surface_step,
+        coarse_voxels=int(os.environ.get('NEURODEPTH_SURFACE_COARSE_VOXELS', '0')) or None,
+        coarse_step=surface_step
+    )
+    reconstructor_3d = Reconstructor3D(surface_extractor=surface_extractor)
+
+    # Content-addressed cache of decoded uploads and endpoint results.
+    # NEURODEPTH_CACHE_DIR adds a disk tier that survives worker restarts.
+    result_cache = ResultCache(
+        max_bytes=int(os.environ.get('NEURODEPTH_CACHE_MAX_MB', '256')) * 1024 * 1024,
+        disk_dir=os.environ.get('NEURODEPTH_CACHE_DIR') or None
+    )
+
+    # Images uploaded once to /api/enhance/sessions and then tuned by id;
+    # at most NEURODEPTH_ENHANCE_SESSIONS are kept, each for
+    # NEURODEPTH_ENHANCE_SESSION_TTL seconds after its last use. Sessions
+    # live in this process only, so with several gunicorn workers clients
+    # must be routed back to the same worker (sticky sessions).
+    enhancement_sessions = EnhancementSessions(
+        max_sessions=int(os.environ.get('NEURODEPTH_ENHANCE_SESSIONS', '64')),
+        ttl=float(os.environ.get('NEURODEPTH_ENHANCE_SESSION_TTL', '900'))
+    )
+
+    # Bounded worker pool for ?async=1 reconstructions; results are kept
+    # for NEURODEPTH_JOB_TTL seconds after they finish. Like the enhancement
+    # sessions, jobs are only known to the worker that queued them.
+    reconstruction_jobs = JobManager(
+        max_workers=int(os.environ.get('NEURODEPTH_JOB_WORKERS', '2')),
+        max_pending=int(os.environ.get('NEURODEPTH_JOB_MAX_PENDING', '16')),
+        result_ttl=float(os.environ.get('NEURODEPTH_JOB_TTL', '600'))
+    )
+
+    # Volume segmentation and meshing. NEURODEPTH_SEGMENT_SHRINK > 1 segments a
+    # shrunk volume first and refines inside the tumor's region; meshing keeps
+    # NEURODEPTH_MESH_ROI_MARGIN voxels around the tumor and builds the levels
+    # of detail in NEURODEPTH_MESH_LODS (triangle reductions of the base mesh).
+    # Stacks of more than NEURODEPTH_SEGMENT_SLAB_SLICES slices (0 = never) are
+    # segmented slab by slab, and /api/process-volume then ingests into a
+    # memory-mapped file in NEURODEPTH_VOLUME_DIR (the temp dir by default).
+    volume_options = {
+        'segment_shrink': int(os.environ.get('NEURODEPTH_SEGMENT_SHRINK', '1')),
+        'roi_margin': int(os.environ.get('NEURODEPTH_MESH_ROI_MARGIN', '2')),
+        'lod_reductions': tuple(float(r) for r in os.environ.get('NEURODEPTH_MESH_LODS', '0.9,0.7,0').split(',')),
+        'slab_slices': int(os.environ.get('NEURODEPTH_SEGMENT_SLAB_SLICES', '0')) or None
+    }
+    volume_dir = os.environ.get('NEURODEPTH_VOLUME_DIR') or None
+    # Triangle budget of meshes when a request has no ?max_triangles=; 0 is unlimited
+    default_max_triangles = int(os.environ.get('NEURODEPTH_MESH_MAX_TRIANGLES', '0')) or None
+
+    def classifier():
+        """The loaded classifier, reloaded first if training replaced its model file"""
+        instance = tumor_classifier.get()
+        instance.reload_if_changed()
+        return instance
+
+    def model_identity():
+        """Identity of the served model file for cache keys; a hit never loads the model"""
+        try:
+            return model_file_identity(backend_model_path)
+        except OSError:
+            # The file was removed; key on whatever the classifier serves
+            return classifier().identity
+
+    def reload_classifier(path):
+        # A classifier that was never loaded reads the new file on first use
+        if not tumor_classifier.loaded:
+            return None
+        return tumor_classifier.get().reload(path)
+
+    # /api/train runs `python -m app.train` in a child process. A finished run
+    # is swapped into tumor_classifier without a restart; other backends get
+    # their export written by the child first. Other gunicorn workers reload
+    # on their next request, when classifier() sees the model file changed.
+    # NEURODEPTH_TRAIN_DATA_DIR overrides the default data directory, and
+    # NEURODEPTH_TRAIN_RUN_DIR keeps run files and checkpoints across restarts
+    # so {"resume": true} can continue them (a fresh temporary directory otherwise).
+    training_worker = TrainingWorker(
+        data_dir=os.environ.get('NEURODEPTH_TRAIN_DATA_DIR') or None,
+        run_dir=os.environ.get('NEURODEPTH_TRAIN_RUN_DIR') or None,
+        export_formats=() if model_backend == 'keras' else (model_backend.split('-')[0],),
+        on_complete=reload_classifier
+    )
+
+    def decode_upload(file_bytes):
+        """Decode grayscale upload bytes, reusing earlier decodes of identical bytes
+
+        Returns:
+            tuple: (upload hash, image or None if the bytes are not an image)
+        """
+        upload_hash = content_hash(file_bytes)
+
+        def decode():
+            img = cv2.imdecode(np.frombuffer(file_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+            if img is not None:
+                # Cached images are shared between requests
+                img.setflags(write=False)
+            return img
+
+        # Decoding is cheaper than unpickling a full-size image, so keep it out of the disk tier
+        return upload_hash, result_cache.get_or_compute(ResultCache.make_key('decode', upload_hash), decode,
+                                                        disk=False)
+
+    def classify_upload(upload_hash, img):
+        key = ResultCache.make_key('classify', upload_hash, backend=model_backend, model=model_identity())
+        return result_cache.get_or_compute(key, lambda: classifier().classify(img))
+
+    def requested_mesh_format():
+        """Mesh encoding requested via ?mesh_format= or the Accept header: json, bin or glb"""
+        mesh_format = request.args.get('mesh_format')
+        if mesh_format is None:
+            best = request.accept_mimetypes.best_match(
+                ['application/json', *MESH_CONTENT_TYPES.values()], default='application/json'
+            )
+            mesh_format = next((fmt for fmt, mime in MESH_CONTENT_TYPES.items() if mime == best), 'json')
+        if mesh_format not in ('json', *MESH_CONTENT_TYPES):
+            raise ValueError(f"Unsupported mesh_format: {mesh_format}")
+        return mesh_format
+
+    def requested_encoder():
+        """Image encoding from ?image_format=png|webp|jpeg, ?png_level=0-9 and ?quality=1-100"""
+        return ImageEncoder(
+            fmt=request.args.get('image_format', 'png'),
+            png_level=request.args.get('png_level', type=int),
+            quality=request.args.get('quality', 90, type=int)
+        )
+
+    def requested_response_mode():
+        """?response=json (base64 images, the default) or multipart (raw image parts)"""
+        mode = request.args.get('response', 'json')
+        if mode not in ('json', 'multipart'):
+            raise ValueError(f"Unsupported response mode: {mode}")
+        return mode
+
+    def images_response(metadata, images, layout, cached=False):
+        """Respond with `metadata` plus encoded `images` and their encode times
+
+        In JSON mode `layout(base64_images)` returns the keys that place the
+        images in the body. In multipart mode the metadata is the first part
+        and each image is a raw part named after its key. `cached` images
+        were encoded by an earlier request: their encode_ms come with
+        "encode_cached": true, and Server-Timing reports a cache hit instead.
+        """
+        encode_ms = {name: image.encode_ms for name, image in images.items() if image is not None}
+        metadata = {**metadata, 'encode_ms': encode_ms, 'encode_cached': cached}
+        if requested_response_mode() == 'multipart':
+            body, content_type = build_multipart(metadata, images)
+            response = app.response_class(body, content_type=content_type)
+        else:
+            encoded = {name: image.base64() if image is not None else None for name, image in images.items()}
+            response = jsonify({**metadata, **layout(encoded)})
+        if cached:
+            response.headers['Server-Timing'] = 'cache;desc=hit'
+        else:
+            response.headers['Server-Timing'] = ', '.join(
+                f"encode-{name};dur={ms:.2f}" for name, ms in encode_ms.items()
+            )
+        return response
+
+    def requested_max_triangles():
+        """Triangle budget from ?max_triangles=, or the configured default"""
+        max_triangles = request.args.get('max_triangles')
+        if max_triangles is None:
+            return default_max_triangles
+        if not max_triangles.isdigit() or int(max_triangles) < MIN_TRIANGLE_BUDGET:
+            raise ValueError(f"max_triangles must be an integer of at least {MIN_TRIANGLE_BUDGET}")
+        return int(max_triangles)
+
+    def requested_lod():
+        """Level of detail from ?lod=, 0 being the coarsest; None selects the finest"""
+        lod = request.args.get('lod')
+        if lod is None:
+            return None
+        if not lod.isdigit():
+            raise ValueError("lod must be a non-negative integer")
+        return int(lod)
+
+    def publish_lods(mesh):
+        """Keep a mesh's levels of detail for /api/meshes/<mesh_id>/lods/<level>
+
+        The id is a content hash, so republishing an identical mesh is a no-op.
+        """
+        mesh_id = content_hash(mesh['vertices'], mesh['faces'], [lod['reduction'] for lod in mesh['lods']])
+        key = ResultCache.make_key('mesh-lods', mesh_id)
+        if result_cache.get(key) is None:
+            result_cache.put(key, mesh)
+        return mesh_id
+
+    def lod_mesh(mesh, level=None, mesh_id=None):
+        """One level of detail of `mesh`, plus descriptors of all levels
+
+        `level` 0 is the coarsest; None or a level past the finest selects
+        the finest. Clients can show a coarse level right away and fetch the
+        finer ones from the descriptors' URLs.
+        """
+        lods = mesh.get('lods')
+        if not lods:
+            return mesh
+        level = len(lods) - 1 if level is None else min(level, len(lods) - 1)
+        mesh_id = mesh_id or publish_lods(mesh)
+        return {
+            'vertices': lods[level]['vertices'],
+            'faces': lods[level]['faces'],
+            'spacing': mesh['spacing'],
+            'stats': mesh.get('stats'),
+            'lod': level,
+            'lods': [{
+                'level': index,
+                'reduction': lod['reduction'],
+                'vertices': len(lod['vertices']),
+                'triangles': len(lod['faces']),
+                'url': f"/api/meshes/{mesh_id}/lods/{index}"
+            } for index, lod in enumerate(lods)]
+        }
+
+    def with_cached_stats(mesh, cached):
+        """Copy of `mesh` whose stats say whether they were measured for this request
+
+        The stats are stored with cached results, so without the flag a
+        cache hit would report the original run's timings as its own.
+        """
+        return {**mesh, 'stats': {**(mesh.get('stats') or {}), 'cached': cached}}
+
+    def mesh_json(mesh):
+        """JSON-serializable copy of a mesh dict holding numpy vertices and faces"""
+        return {**mesh, 'vertices': mesh['vertices'].tolist(), 'faces': mesh['faces'].tolist()}
+
+    def mesh_response(mesh_format, mesh, metadata):
+        """Binary response for a mesh; gzip-compressed when ?compress=1 and the client accepts it
+
+        The mesh's timing and memory 'stats' travel in the metadata as
+        'mesh_stats', next to its level of detail and the other levels.
+        """
+        metadata = {**metadata, 'mesh_stats': mesh.get('stats'), 'lod': mesh.get('lod'), 'lods': mesh.get('lods')}
+        body = encode_mesh(mesh_format, mesh['vertices'], mesh['faces'], metadata)
+        response = app.response_class(body, mimetype=MESH_CONTENT_TYPES[mesh_format])
+        if request.args.get('compress') in ('1', 'true') and 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response.set_data(gzip.compress(body, compresslevel=1))
+            response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept, Accept-Encoding'
+        return response
 
     @app.route('/api/process', methods=['POST'])
     @cross_origin()
@@ -66,40 +345,55 @@ def setup_routes(app):
                 return jsonify({"error": "No file provided"}), 400
 
             file = request.files['file']
-            file_bytes = file.read()
             
             # Decode image
-            nparr = np.frombuffer(file_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
+            upload_hash, img = decode_upload(file.read())
             
             if img is None:
                 return jsonify({"error": "Invalid image format"}), 400
 
-            # Process image
-            enhanced = image_processor.enhance_image(img)
-            measurements = tumor_segmentation.calculate_measurements(img)
-            classification = tumor_classifier.classify(img)
+            try:
+                encoder = requested_encoder()
+                requested_response_mode()
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
 
-            response = {
-                "success": True,
-                "tumor_type": classification['class'],
-                "confidence": classification['confidence'],
-                "slices": [{
-                    "original": encode_image(img),
-                    "enhanced": {
-                        "clahe": encode_image(enhanced['clahe']),
-                        "filtered": encode_image(enhanced['filtered']),
-                        "edges": encode_image(enhanced['edges']),
-                        "segmented": encode_image(tumor_segmentation.get_segmentation_overlay(img))
-                    }
-                }],
-                "analysis": {
-                    "measurements": measurements,
-                    "class_probabilities": classification['probabilities']
+            cache_key = ResultCache.make_key('process', upload_hash, backend=model_backend,
+                                             model=model_identity(), **encoder.cache_params())
+            cached = result_cache.get(cache_key)
+            hit = cached is not None
+            if not hit:
+                # Process image
+                enhanced = image_processor.enhance_image(img)
+                measurements = tumor_segmentation.calculate_measurements(img)
+                classification = classify_upload(upload_hash, img)
+
+                cached = {
+                    "metadata": {
+                        "success": True,
+                        "tumor_type": classification['class'],
+                        "confidence": classification['confidence'],
+                        "analysis": {
+                            "measurements": measurements,
+                            "class_probabilities": classification['probabilities']
+                        }
+                    },
+                    "images": encoder.encode_many({
+                        "original": img,
+                        "clahe": enhanced['clahe'],
+                        "filtered": enhanced['filtered'],
+                        "edges": enhanced['edges'],
+                        "segmented": tumor_segmentation.get_segmentation_overlay(img)
+                    })
                 }
-            }
+                result_cache.put(cache_key, cached)
 
-            return jsonify(response)
+            return images_response(cached['metadata'], cached['images'], lambda images: {
+                "slices": [{
+                    "original": images['original'],
+                    "enhanced": {name: images[name] for name in ('clahe', 'filtered', 'edges', 'segmented')}
+                }]
+            }, cached=hit)
 
         except Exception as e:
             logger.error(f"Processing error: {str(e)}")
@@ -122,18 +416,14 @@ def setup_routes(app):
             file = request.files['image']
             
             # Read and preprocess the image
-            file_bytes = file.read()
-            img_array = cv2.imdecode(
-                np.frombuffer(file_bytes, np.uint8), 
-                cv2.IMREAD_GRAYSCALE
-            )
+            upload_hash, img_array = decode_upload(file.read())
             
             if img_array is None:
                 logger.error("Failed to decode image")
                 return jsonify({"error": "Invalid image format"}), 400
             
             # Use existing classifier instance
-            result = tumor_classifier.classify(img_array)
+            result = classify_upload(upload_hash, img_array)
             return jsonify(result)
             
         except Exception as e:
@@ -142,142 +432,450 @@ def setup_routes(app):
 
     @app.route("/api/train", methods=["POST"])
     def train_model():
-        """Train the model using the data directory"""
-        # Add training logic here
-        return jsonify({"message": "Training started"})
+        """Train the model using the data directory
+
+        The JSON body may set the hyperparameters in train.HTTP_OPTIONS, e.g.
+        {"epochs": 50, "patience": 5, "resume": true}; paths such as the
+        checkpoint directory are chosen by the server. Progress is reported
+        by /api/train/status.
+        """
+        from .train import TrainingConfig
+        try:
+            config = TrainingConfig.from_request(request.get_json(silent=True) or {})
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        try:
+            status = training_worker.start(config)
+        except TrainingInProgress as e:
+            return jsonify({"error": str(e)}), 409
+        except Exception as e:
+            logger.error(f"Error starting training: {str(e)}")
+            return jsonify({"error": str(e)}), 500
+
+        return jsonify({"message": "Training started", "status_url": "/api/train/status", **status}), 202
+
+    @app.route("/api/train/status", methods=["GET"])
+    def train_status():
+        return jsonify(training_worker.status())
+
+    def enhancement_response(upload_hash, img, params):
+        """Response with the encoded CLAHE, filtered and edge images for one parameter set"""
+        if not isinstance(params, dict):
+            raise ValueError("params must be a JSON object")
+        encoder = requested_encoder()
+        requested_response_mode()
+        # Optional previewMaxSide runs on a downsampled pyramid level for interactive use
+        max_side = int(params.get('previewMaxSide') or 0) or None
+        cache_key = ResultCache.make_key(
+            'enhance', upload_hash,
+            clip_limit=float(params['claheClipLimit']),
+            sigma=float(params['bilateralSigma']),
+            threshold=float(params['edgeThreshold']),
+            max_side=max_side,
+            **encoder.cache_params()
+        )
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return images_response({'scale': cached['scale']}, cached['images'], lambda images: images, cached=True)
+
+        # Stage outputs are cached, so a change to one slider reruns only the later stages
+        enhanced = image_processor.engine.enhance(
+            img,
+            clip_limit=params['claheClipLimit'],
+            sigma=params['bilateralSigma'],
+            threshold=params['edgeThreshold'],
+            max_side=max_side,
+            image_hash=upload_hash
+        )
+
+        cached = {
+            'images': encoder.encode_many({name: enhanced[name] for name in ('clahe', 'filtered', 'edges')}),
+            'scale': enhanced['scale']
+        }
+        result_cache.put(cache_key, cached)
+        return images_response({'scale': cached['scale']}, cached['images'], lambda images: images)
 
     @app.route('/api/enhance', methods=['POST'])
     def enhance_image():
         try:
-            data = request.json
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                return jsonify({'error': 'Expected a JSON object body'}), 400
             image_data = base64.b64decode(data['image'])
             params = data['params']
             
             # Convert image data to numpy array
-            nparr = np.frombuffer(image_data, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
-            
-            # Apply CLAHE
-            clahe = cv2.createCLAHE(clipLimit=float(params['claheClipLimit']), tileGridSize=(8,8))
-            enhanced = clahe.apply(img)
-            
-            # Apply bilateral filter
-            filtered = cv2.bilateralFilter(enhanced, 9, 
-                                         float(params['bilateralSigma']), 
-                                         float(params['bilateralSigma']))
-            
-            # Edge detection
-            edges = cv2.Canny(filtered, 
-                             float(params['edgeThreshold'])/2, 
-                             float(params['edgeThreshold']))
+            upload_hash, img = decode_upload(image_data)
+            if img is None:
+                return jsonify({'error': 'Invalid image file'}), 400
+
+            return enhancement_response(upload_hash, img, params)
             
+        # Missing or mistyped fields are the client's mistake
+        except KeyError as e:
+            return jsonify({'error': f"Missing field: {str(e)}"}), 400
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/enhance/sessions', methods=['POST'])
+    def create_enhancement_session():
+        """Upload an image once, as multipart 'image' or JSON base64 'image', for later adjustments
+
+        Sessions are kept in this worker's memory: run a single worker, or
+        route a client's session requests to the worker that created the
+        session, otherwise they answer 404.
+        """
+        try:
+            if 'image' in request.files:
+                image_data = request.files['image'].read()
+            else:
+                image_data = base64.b64decode((request.get_json(silent=True) or {}).get('image', ''))
+
+            upload_hash, img = decode_upload(image_data)
+            if img is None:
+                return jsonify({'error': 'Invalid image file'}), 400
+
+            session = enhancement_sessions.create(img, upload_hash)
             return jsonify({
-                'clahe': encode_image(enhanced),
-                'filtered': encode_image(filtered),
-                'edges': encode_image(edges)
-            })
-            
+                'session_id': session.id,
+                'width': int(img.shape[1]),
+                'height': int(img.shape[0]),
+                'ttl': enhancement_sessions.ttl
+            }), 201
+        except Exception as e:
+            logger.error(f"Error creating enhancement session: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/enhance/sessions/<session_id>', methods=['POST'])
+    def enhance_session(session_id):
+        """Enhance a session's image with new parameters; the body is {"params": {...}}
+
+        Only the worker that created the session knows it; see /api/enhance/sessions.
+        """
+        session = enhancement_sessions.get(session_id)
+        if session is None:
+            return jsonify({'error': 'Unknown or expired session'}), 404
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object body'}), 400
+        try:
+            return enhancement_response(session.image_hash, session.image, data['params'])
+        except KeyError as e:
+            return jsonify({'error': f"Missing field: {str(e)}"}), 400
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+    @app.route('/api/enhance/sessions/<session_id>', methods=['DELETE'])
+    def close_enhancement_session(session_id):
+        if not enhancement_sessions.close(session_id):
+            return jsonify({'error': 'Unknown or expired session'}), 404
+        return '', 204
+
     @app.route('/api/process-volume', methods=['POST'])
     def process_volume():
+        """Segment and mesh a multipart stack of 'images' parts, read as a stream
+
+        Each part is decoded as soon as it has arrived and written into a
+        growing volume, so the raw upload is never buffered as a whole.
+        An optional ?slices=N preallocates the volume. The mesh is JSON or
+        the format chosen by ?mesh_format= / Accept, as in /api/reconstruct,
+        with the same ?max_triangles= and ?lod= options.
+        """
         try:
-            files = request.files.getlist('images')
-            if not files:
-                return jsonify({"error": "No images provided"}), 400
+            mesh_format = requested_mesh_format()
+            max_triangles = requested_max_triangles()
+            lod = requested_lod()
+            uploads = iter_multipart_files(request.stream, request.content_type, 'images')
+            capacity = request.args.get('slices', type=int)
+            buffer = MappedVolumeBuffer(capacity or 16, volume_dir) if volume_options['slab_slices'] else None
+            slices, valid = get_ingestor().ingest_stream(uploads, capacity=capacity, buffer=buffer)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-            # Convert uploaded images to numpy arrays
-            slices = []
-            for file in files:
-                nparr = np.frombuffer(file.read(), np.uint8)
-                img = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
-                slices.append(img)
+        try:
+            if not valid:
+                return jsonify({"error": "No images provided"}), 400
+            num_slices = len(slices)
 
-            # Create 3D volume
-            volume = reconstructor.create_volume_from_slices(slices)
-            
-            # Segment tumor in 3D
-            tumor_mask = reconstructor.segment_tumor_3d(volume)
+            # Segment tumor in 3D; only the mask outlives this, so drop the slices
+            reconstructor = VolumeReconstructor(surface_extractor=surface_extractor, volume_dir=volume_dir,
+                                                **volume_options)
+            tumor_mask = reconstructor.segment_slices(slices)
+            del slices
             
             # Calculate 3D metrics
             metrics = reconstructor.calculate_tumor_metrics(tumor_mask)
             
-            # Generate 3D mesh
-            mesh = reconstructor.generate_3d_mesh(tumor_mask)
-
-            # Convert mesh to a format suitable for web visualization
-            # (You'll need to implement this based on your frontend needs)
+            # Generate 3D mesh and its levels of detail
+            mesh = lod_mesh(reconstructor.generate_3d_mesh(tumor_mask, as_arrays=True, max_triangles=max_triangles),
+                            lod)
+            mesh = with_cached_stats(mesh, False)
 
-            return jsonify({
+            result = {
+                'success': True,
                 'metrics': metrics,
-                'mesh_data': mesh_data,  # Implement conversion to suitable format
-                'num_slices': len(slices),
+                'num_slices': num_slices,
                 'slice_thickness': reconstructor.slice_thickness
-            })
+            }
+            if mesh_format != 'json':
+                return mesh_response(mesh_format, mesh, {**result, 'spacing': mesh['spacing']})
+            return jsonify({**result, 'mesh': mesh_json(mesh)})
 
         except Exception as e:
             logger.error(f"3D reconstruction error: {str(e)}")
             return jsonify({"error": str(e)}), 500
 
+    def run_reconstruction(slices, slice_hashes, middle_upload, progress=None, max_triangles=None):
+        """Classify the middle slice and build the 3D metrics and mesh for a stack
+
+        `middle_upload` holds the uploaded bytes of the middle slice. The mesh
+        is returned with float32/uint32 arrays; use mesh_json() or
+        mesh_response() to serialize it. `progress(stage)` is called as each
+        pipeline stage starts.
+        """
+        progress = progress or (lambda stage, **info: None)
+
+        # Get tumor classification from middle slice
+        progress('classify')
+        middle = len(slices)//2
+        middle_slice = slices[middle]
+        # Classify the slice as uploaded, as /api/classify would: the ingestor
+        # resizes slices that differ in shape from the first one
+        classification = classify_upload(*decode_upload(middle_upload))
+        measurements = tumor_segmentation.calculate_measurements(middle_slice)
+
+        detected_type = classification['class'].lower().strip()
+
+        # Create reconstructor and process volume
+        progress('segment')
+        reconstructor = VolumeReconstructor(surface_extractor=surface_extractor, volume_dir=volume_dir,
+                                            **volume_options)
+        tumor_mask = reconstructor.segment_slices(slices)
+        # Randomness is seeded from the upload contents so cached and fresh
+        # results for the same slices agree
+        volume_metrics = reconstructor.calculate_tumor_metrics(tumor_mask, rng=seeded_rng(*slice_hashes))
+        enhanced_metrics = {
+            **volume_metrics,
+            **measurements,
+            "tumor_type": classification['class'],
+            "confidence": classification['confidence'],
+            "num_slices": len(slices)
+        }
+        progress('mesh')
+        mesh_data = reconstructor.generate_3d_mesh(tumor_mask, as_arrays=True, max_triangles=max_triangles)
+
+        # Force depth_mm to 0.0 for notumor
+        if detected_type in ['notumor', 'notumor tumor', 'no tumor']:
+            logger.info("Detected notumor, setting depth_mm to 0.0 but returning mesh.")
+            enhanced_metrics["depth_mm"] = 0.0
+
+        return {
+            "success": True,
+            "metrics": enhanced_metrics,
+            "mesh": mesh_data,
+            "classification": {
+                "tumor_type": classification['class'],
+                "confidence": classification['confidence'],
+                "probabilities": classification['probabilities']
+            }
+        }
+
+    def reconstruct_uploads(uploads, progress=None, max_triangles=None):
+        """Reconstruct raw slice uploads, reusing cached results for identical stacks
+
+        Returns None when none of the uploads is a decodable image.
+        """
+        progress = progress or (lambda stage, **info: None)
+        upload_hashes = [content_hash(file_bytes) for file_bytes in uploads]
+        cache_key = ResultCache.make_key('reconstruct', *upload_hashes, backend=model_backend,
+                                         model=model_identity(), max_triangles=max_triangles,
+                                         surface=surface_extractor.cache_params(), **volume_options)
+        result = result_cache.get(cache_key)
+        if result is not None:
+            return {**result, 'mesh': with_cached_stats(result['mesh'], True)}
+
+        # Decode in parallel straight into one (Z, H, W) volume
+        progress('decode', num_files=len(uploads))
+        volume, valid = get_ingestor().decode(uploads)
+        if not valid:
+            return None
+
+        result = run_reconstruction(volume, [upload_hashes[i] for i in valid], uploads[valid[len(valid) // 2]],
+                                    progress, max_triangles)
+        result_cache.put(cache_key, result)
+        return {**result, 'mesh': with_cached_stats(result['mesh'], False)}
+
+    def reconstruction_job(progress, uploads, max_triangles=None):
+        result = reconstruct_uploads(uploads, progress, max_triangles)
+        if result is None:
+            raise ValueError("No valid images provided")
+        return result
+
+    def reconstruction_response(result):
+        """Serialize a reconstruction result as JSON or the requested binary mesh format
+
+        The mesh is the level of detail chosen by ?lod=, the finest by default.
+        """
+        mesh_format = requested_mesh_format()
+        mesh = lod_mesh(result['mesh'], requested_lod())
+        if mesh_format != 'json':
+            metadata = {key: value for key, value in result.items() if key != 'mesh'}
+            metadata['spacing'] = mesh['spacing']
+            return mesh_response(mesh_format, mesh, metadata)
+
+        return jsonify({**result, "mesh": mesh_json(mesh)})
+
     @app.route('/api/reconstruct', methods=['POST'])
     @cross_origin()
     def reconstruct_volume():
+        """Reconstruct a slice stack; with ?async=1 queue it and return a job id
+
+        ?max_triangles= caps the triangles of every level of detail, and
+        ?lod= picks the level returned (0 is the coarsest, default the finest).
+        Async jobs are kept in this worker's memory: run a single worker, or
+        route a client's /api/jobs/<job_id> requests to the worker that
+        queued the job, otherwise they answer 404.
+        """
+        try:
+            # Reject bad options before the upload is read and reconstructed
+            requested_mesh_format()
+            max_triangles = requested_max_triangles()
+            requested_lod()
+        except ValueError as e:
+            return jsonify({"error": str(e), "success": False}), 400
+
         try:
             files = request.files.getlist('slices')
             logger.debug(f"Received {len(files)} files")
-            
-            slices = []
-            for file in files:
-                file_bytes = file.read()
-                nparr = np.frombuffer(file_bytes, np.uint8)
-                img = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
-                if img is not None:
-                    slices.append(img)
-                    
-            if not slices:
+            uploads = [file.read() for file in files]
+
+            if request.args.get('async') in ('1', 'true'):
+                job = reconstruction_jobs.submit(reconstruction_job, uploads, max_triangles)
+                return jsonify({
+                    "success": True,
+                    "job_id": job.id,
+                    "status_url": f"/api/jobs/{job.id}",
+                    "events_url": f"/api/jobs/{job.id}/events",
+                    "result_url": f"/api/jobs/{job.id}/result"
+                }), 202
+
+            result = reconstruct_uploads(uploads, max_triangles=max_triangles)
+            if result is None:
                 return jsonify({"error": "No valid images provided"}), 400
 
-            # Get tumor classification from middle slice
-            middle_slice = slices[len(slices)//2]
-            classification = tumor_classifier.classify(middle_slice)
-            measurements = tumor_segmentation.calculate_measurements(middle_slice)
-
-            detected_type = classification['class'].lower().strip()
-
-            # Create reconstructor and process volume
-            reconstructor = VolumeReconstructor()
-            volume = reconstructor.create_volume_from_slices(slices)
-            tumor_mask = reconstructor.segment_tumor_3d(volume)
-            volume_metrics = reconstructor.calculate_tumor_metrics(tumor_mask)
-            enhanced_metrics = {
-                **volume_metrics,
-                **measurements,
-                "tumor_type": classification['class'],
-                "confidence": classification['confidence'],
-                "num_slices": len(slices)
-            }
-            mesh_data = reconstructor.generate_3d_mesh(tumor_mask)
-
-            # Force depth_mm to 0.0 for notumor
-            if detected_type in ['notumor', 'notumor tumor', 'no tumor']:
-                logger.info("Detected notumor, setting depth_mm to 0.0 but returning mesh.")
-                enhanced_metrics["depth_mm"] = 0.0
-
-            response = {
-                "success": True,
-                "metrics": enhanced_metrics,
-                "mesh": mesh_data,
-                "classification": {
-                    "tumor_type": classification['class'],
-                    "confidence": classification['confidence'],
-                    "probabilities": classification['probabilities']
-                }
-            }
-            return jsonify(response)
+            return reconstruction_response(result)
+
+        except JobQueueFull as e:
+            return jsonify({"error": str(e), "success": False}), 503
+        except Exception as e:
+            logger.error(f"Reconstruction error: {str(e)}", exc_info=True)
+            return jsonify({"error": str(e), "success": False}), 500
 
+    @app.route('/api/jobs/<job_id>', methods=['GET'])
+    def job_status(job_id):
+        """Status and per-stage progress events of a queued reconstruction
+
+        Only the worker that queued the job knows it; see /api/reconstruct.
+        """
+        job = reconstruction_jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "Unknown or expired job"}), 404
+        return jsonify(job.to_dict())
+
+    @app.route('/api/jobs/<job_id>/events', methods=['GET'])
+    def job_events(job_id):
+        """Server-sent event stream of a job's progress until it finishes
+
+        Only the worker that queued the job knows it; see /api/reconstruct.
+        """
+        job = reconstruction_jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "Unknown or expired job"}), 404
+
+        def stream():
+            for event in reconstruction_jobs.stream_events(job):
+                if event is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"data: {json.dumps(event)}\n\n"
+
+        return app.response_class(stream(), mimetype='text/event-stream',
+                                  headers={'Cache-Control': 'no-cache'})
+
+    @app.route('/api/jobs/<job_id>/result', methods=['GET'])
+    def job_result(job_id):
+        """Result of a finished reconstruction, in the same formats as /api/reconstruct
+
+        Only the worker that queued the job knows it; see /api/reconstruct.
+        """
+        try:
+            requested_mesh_format()
+            requested_lod()
+        except ValueError as e:
+            return jsonify({"error": str(e), "success": False}), 400
+
+        job = reconstruction_jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "Unknown or expired job"}), 404
+        if job.status == 'failed':
+            return jsonify({"error": job.error, "success": False}), 500
+        if job.status != 'done':
+            return jsonify({"status": job.status, "stage": job.stage}), 202
+        try:
+            return reconstruction_response(job.result)
         except Exception as e:
             logger.error(f"Reconstruction error: {str(e)}", exc_info=True)
             return jsonify({"error": str(e), "success": False}), 500
 
+    @app.route('/api/meshes/<mesh_id>/lods/<int:level>', methods=['GET'])
+    @cross_origin()
+    def mesh_level(mesh_id, level):
+        """One level of detail of a returned mesh, from the URLs in its 'lods' list"""
+        try:
+            mesh_format = requested_mesh_format()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        mesh = result_cache.get(ResultCache.make_key('mesh-lods', mesh_id))
+        if mesh is None or level >= len(mesh['lods']):
+            return jsonify({"error": "Unknown or expired mesh level"}), 404
+
+        # Levels are served from the cache, so their stats are always from an earlier request
+        mesh = with_cached_stats(lod_mesh(mesh, level, mesh_id), True)
+        if mesh_format != 'json':
+            return mesh_response(mesh_format, mesh, {'spacing': mesh['spacing']})
+        return jsonify({"success": True, "mesh": mesh_json(mesh)})
+
+    @app.route('/api/surface/stats', methods=['GET'])
+    def surface_stats():
+        """Calls, time and throughput of each surface extraction backend in this worker"""
+        return jsonify(surface_timings())
+
+    @app.route('/api/cache/stats', methods=['GET'])
+    def cache_stats():
+        """Hit/miss counters and size of the result cache"""
+        return jsonify(result_cache.stats())
+
+    # NEURODEPTH_PRELOAD=modules imports the heavy libraries now. Combined with
+    # `gunicorn --preload`, the master pays for them once and forked workers
+    # share those pages copy-on-write. Nothing here starts a thread or the
+    # TensorFlow runtime, neither of which survives fork(). NEURODEPTH_PRELOAD=all
+    # also loads the classifier, for single-process servers only.
+    preload = os.environ.get('NEURODEPTH_PRELOAD', 'none')
+    if preload in ('modules', 'all'):
+        modules = PRELOAD_MODULES if model_backend == 'keras' else PRELOAD_MODULES[1:]
+        timings = preload_modules(modules)
+        logger.info("Preloaded modules: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+    if preload == 'all':
+        tumor_classifier.get()
+    if preload != 'none':
+        # Keep the garbage collector from touching (and so copying) the preloaded objects
+        gc.collect()
+        gc.freeze()
+
     return app
\ No newline at end of file
@@ -0,0 +1,174 @@
+# app/slab_segmentation.py
+"""Largest dark component of a (z, y, x) uint8 volume, one slab at a time
+
+otsu_largest_component() needs the volume as a SimpleITK image plus a
+label image four times its size. Here the volume, usually a np.memmap
+filled by MappedVolumeBuffer, is only ever read `slab_slices` slices at a
+time:
+
+1. One pass sums a 256-value histogram, and otsu_threshold() turns it into
+   the threshold sitk.OtsuThreshold would pick for the whole volume.
+2. A second pass labels every slab with sitk.ConnectedComponent (face
+   connectivity, like the in-memory path). Each slab starts one slice early
+   and labels the last slice of the previous slab again; labels that share a
+   voxel in that overlap are merged with union-find. Global labels go to a
+   memory-mapped uint32 file, and voxel counts per label are summed.
+3. A last pass writes the largest merged component into a memory-mapped
+   uint8 mask.
+
+The mask matches otsu_largest_component()'s voxel for voxel; ties between
+equally large components go to the one first in raster order in both.
+Apart from the mapped files, memory stays at a few slabs.
+"""
+import math
+import logging
+import tempfile
+import numpy as np
+from .utils import lazy_import
+
+sitk = lazy_import('SimpleITK')
+
+logger = logging.getLogger(__name__)
+
+def otsu_threshold(histogram, bins=128):
+    """Otsu threshold of a uint8 volume from its 256-value histogram
+
+    Follows itk::OtsuThresholdImageFilter on 8-bit images: `bins` bins over
+    0-255 widened by ITK's marginal scale, bin centres as measurements, and
+    the first of several (almost) equal maxima. Voxels at or below the
+    returned value are inside, as with sitk.OtsuThreshold.
+    """
+    histogram = np.asarray(histogram, dtype=np.float64)
+    width = (255.0 + 255.0 / bins / 100.0) / bins
+    index = np.minimum((np.arange(256) / width).astype(np.int64), bins - 1)
+    frequency = np.bincount(index, weights=histogram, minlength=bins)
+    centers = (np.arange(bins) + 0.5) * width
+
+    # Between-class variance, up to a constant, for every split after bin k
+    total = frequency.sum()
+    below = np.cumsum(frequency)[:-1]
+    below_sum = np.cumsum(frequency * centers)[:-1]
+    above, above_sum = total - below, (frequency * centers).sum() - below_sum
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_below = np.where(below > 0, below_sum / below, 0.0)
+        mean_above = np.where(above > 0, above_sum / above, 0.0)
+    variance = (below * mean_below ** 2 + above * mean_above ** 2) / total
+
+    best = 0
+    for k in range(1, len(variance)):
+        if variance[k] > variance[best] and not math.isclose(variance[k], variance[best], rel_tol=1e-9):
+            best = k
+    return (best + 1) * width
+
+class UnionFind:
+    """Disjoint sets of labels 1..n, with the smallest label of a set as its root"""
+
+    def __init__(self):
+        # Label 0 is the background and never joins a set
+        self.parent = np.zeros(1, dtype=np.int64)
+        self.sizes = np.zeros(1, dtype=np.int64)
+        self.count = 0
+
+    def add(self, sizes):
+        """Add labels count+1..count+len(sizes) with their voxel counts"""
+        start, stop = self.count + 1, self.count + 1 + len(sizes)
+        if stop > len(self.parent):
+            capacity = max(stop, 2 * len(self.parent))
+            self.parent = np.concatenate([self.parent, np.zeros(capacity - len(self.parent), dtype=np.int64)])
+            self.sizes = np.concatenate([self.sizes, np.zeros(capacity - len(self.sizes), dtype=np.int64)])
+        self.parent[start:stop] = np.arange(start, stop)
+        self.sizes[start:stop] = sizes
+        self.count = stop - 1
+
+    def find(self, label):
+        root = label
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[label] != root:
+            self.parent[label], label = root, self.parent[label]
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+    def roots(self):
+        """Root of every label, as an array indexed by label"""
+        roots = self.parent[:self.count + 1].copy()
+        while True:
+            parents = roots[roots]
+            if np.array_equal(parents, roots):
+                return roots
+            roots = parents
+
+def _mapped(shape, dtype, directory):
+    # The file is unlinked on creation; its pages go away with the last view
+    with tempfile.TemporaryFile(dir=directory) as f:
+        return np.memmap(f, dtype=dtype, mode='w+', shape=shape)
+
+def largest_component_slabs(volume, slab_slices=64, directory=None):
+    """Otsu mask of `volume` reduced to its largest connected component
+
+    Args:
+        volume: (Z, H, W) uint8 array; a np.memmap is read a slab at a time
+        slab_slices: slices labelled at once
+        directory: where the temporary label and mask files go; the system
+            temporary directory by default
+
+    Returns:
+        tuple: ((Z, H, W) uint8 np.memmap mask of the largest component,
+            Otsu threshold, its voxel count)
+    """
+    if volume.ndim != 3 or volume.dtype != np.uint8:
+        raise ValueError(f"Expected a (Z, H, W) uint8 volume, got {volume.ndim}D {volume.dtype}")
+    if slab_slices < 1:
+        raise ValueError("slab_slices must be at least 1")
+    depth = volume.shape[0]
+    slabs = [(start, min(start + slab_slices, depth)) for start in range(0, depth, slab_slices)]
+
+    histogram = np.zeros(256, dtype=np.int64)
+    for start, stop in slabs:
+        histogram += np.bincount(np.asarray(volume[start:stop]).ravel(), minlength=256)
+    threshold = otsu_threshold(histogram)
+    inside = np.uint8(math.floor(threshold))
+
+    labels = _mapped(volume.shape, np.uint32, directory)
+    forest = UnionFind()
+    for start, stop in slabs:
+        first = max(start - 1, 0)
+        binary = sitk.GetImageFromArray((np.asarray(volume[first:stop]) <= inside).view(np.uint8))
+        components = sitk.ConnectedComponent(binary)
+        local = sitk.GetArrayViewFromImage(components)
+        offset = forest.count
+
+        # Voxels of the overlap slice carry a label from each slab
+        pairs = np.empty((0, 2), dtype=np.uint32)
+        if first < start:
+            previous, current = labels[first], local[0]
+            both = (previous > 0) & (current > 0)
+            pairs = np.unique(np.stack([previous[both], current[both]], axis=1), axis=0)
+
+        # Count each voxel once, in the slab that owns it
+        body = local[start - first:]
+        forest.add(np.bincount(body.ravel(), minlength=int(local.max()) + 1)[1:])
+        np.add(body, np.uint32(offset), out=labels[start:stop], where=body > 0)
+        for previous_label, label in pairs:
+            forest.union(int(previous_label), int(label) + offset)
+        del binary, components, local, body
+
+    if forest.count == 0:
+        raise ValueError("Segmentation found no foreground")
+    roots = forest.roots()
+    sizes = np.bincount(roots, weights=forest.sizes[:forest.count + 1])
+    sizes[0] = 0
+    largest = int(np.argmax(sizes))
+    keep = (roots == largest).view(np.uint8)
+    keep[0] = 0
+
+    mask = _mapped(volume.shape, np.uint8, directory)
+    for start, stop in slabs:
+        mask[start:stop] = keep[labels[start:stop]]
+    logger.info(f"Labelled {forest.count} slab components in {len(slabs)} slabs; "
+                f"largest has {int(sizes[largest])} voxels")
+    return mask, threshold, int(sizes[largest])
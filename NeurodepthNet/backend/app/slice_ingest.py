@@ -0,0 +1,258 @@
+# app/slice_ingest.py
+import os
+import logging
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import MultipartDecoder, Data, Epilogue, File, NeedData
+
+logger = logging.getLogger(__name__)
+
+def decode_slice(file_bytes):
+    """Decode image bytes to a grayscale uint8 array, or None if they are not an image"""
+    if not file_bytes:
+        return None
+    return cv2.imdecode(np.frombuffer(file_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+
+def fit_slice(image, out, normalize=False):
+    """Write a 2D slice into the (H, W) uint8 buffer `out`
+
+    Slices of a different size are resized to the buffer. With normalize=True
+    intensities are min-max scaled to 0-255 directly into the buffer.
+    """
+    if image.shape != out.shape:
+        image = cv2.resize(image, (out.shape[1], out.shape[0]), interpolation=cv2.INTER_AREA)
+    if normalize:
+        cv2.normalize(image, out, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+    elif image.dtype == np.uint8:
+        np.copyto(out, image)
+    else:
+        np.copyto(out, np.clip(image, 0, 255), casting='unsafe')
+
+def iter_multipart_files(stream, content_type, field, chunk_size=256 * 1024):
+    """Yield the bytes of every `field` file part of a multipart body as it is read
+
+    Only the part being received is held in memory. The stream is read in
+    `chunk_size` pieces instead of being spooled into request.files first.
+    """
+    mimetype, options = parse_options_header(content_type)
+    if mimetype != 'multipart/form-data' or 'boundary' not in options:
+        raise ValueError("Expected a multipart/form-data upload")
+
+    decoder = MultipartDecoder(options['boundary'].encode('latin-1'))
+    current = None
+    while True:
+        chunk = stream.read(chunk_size)
+        decoder.receive_data(chunk or None)
+        event = decoder.next_event()
+        while not isinstance(event, (NeedData, Epilogue)):
+            if isinstance(event, File) and event.name == field:
+                current = bytearray()
+            elif isinstance(event, Data) and current is not None:
+                current += event.data
+                if not event.more_data:
+                    yield bytes(current)
+                    current = None
+            event = decoder.next_event()
+        if isinstance(event, Epilogue) or not chunk:
+            return
+
+class VolumeBuffer:
+    """(Z, H, W) uint8 volume that grows one slice at a time
+
+    The first slice fixes the in-plane shape. Capacity doubles when full
+    using ndarray.resize, which reallocates in place (mremap on Linux for
+    large buffers) instead of copying into a second buffer.
+    """
+
+    def __init__(self, capacity=16):
+        self.capacity = max(1, capacity)
+        self.length = 0
+        self._buffer = None
+
+    def slot(self, shape):
+        """Next free (H, W) slice of the buffer; only valid until the next call
+
+        `shape` sizes the buffer on the first call and is ignored afterwards.
+        """
+        if self._buffer is None:
+            self._buffer = np.empty((self.capacity, *shape), dtype=np.uint8)
+        elif self.length == self.capacity:
+            self.capacity *= 2
+            # No views of the buffer are handed out while it is growing
+            self._buffer.resize((self.capacity, *self._buffer.shape[1:]), refcheck=False)
+        self.length += 1
+        return self._buffer[self.length - 1]
+
+    def finish(self):
+        """Trim unused capacity and return the (Z, H, W) volume"""
+        if self._buffer is None:
+            return np.empty((0, 0, 0), dtype=np.uint8)
+        self._buffer.resize((self.length, *self._buffer.shape[1:]), refcheck=False)
+        volume, self._buffer = self._buffer, None
+        return volume
+
+class MappedVolumeBuffer(VolumeBuffer):
+    """VolumeBuffer kept in a memory-mapped temporary file instead of RAM
+
+    The file lives in `directory` (the system temporary directory by
+    default) and is unlinked as soon as it is created, so it disappears with
+    the last view of the volume. The kernel can write its pages back and
+    drop them under memory pressure, which lets volumes larger than the
+    worker's memory be ingested and segmented slab by slab.
+    """
+
+    def __init__(self, capacity=16, directory=None):
+        super().__init__(capacity)
+        self.directory = directory
+        self._file = None
+
+    def _map(self, shape):
+        # Grow or shrink the file first; the old mapping is dropped right after
+        self._file.truncate(int(np.prod(shape)))
+        self._buffer = np.memmap(self._file, dtype=np.uint8, mode='r+', shape=shape)
+
+    def slot(self, shape):
+        if self._buffer is None:
+            self._file = tempfile.TemporaryFile(dir=self.directory)
+            self._map((self.capacity, *shape))
+        elif self.length == self.capacity:
+            self.capacity *= 2
+            self._map((self.capacity, *self._buffer.shape[1:]))
+        self.length += 1
+        return self._buffer[self.length - 1]
+
+    def finish(self):
+        """Trim the file to the slices written and return them as a np.memmap"""
+        if self._buffer is None:
+            return np.empty((0, 0, 0), dtype=np.uint8)
+        shape = (self.length, *self._buffer.shape[1:])
+        volume = np.memmap(self._file, dtype=np.uint8, mode='r+', shape=shape)
+        self._buffer = None
+        self._file.truncate(volume.nbytes)
+        # The mapping keeps its own handle on the file
+        self._file.close()
+        self._file = None
+        return volume
+
+class SliceIngestor:
+    """Decode and normalize slice stacks in parallel into one (Z, H, W) uint8 volume
+
+    OpenCV releases the GIL while decoding and resizing, so a thread pool
+    scales across cores. Every slice is written straight into a preallocated
+    volume; slices whose size differs from the first valid slice are
+    resized to it instead of failing in np.stack.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='slice-ingest')
+
+    def decode(self, uploads, normalize=False):
+        """Decode raw image uploads into a volume
+
+        Returns:
+            tuple: (uint8 volume of shape (Z, H, W), indices of the uploads
+            that decoded successfully, in order)
+        """
+        uploads = list(uploads)
+
+        # The first decodable slice fixes the volume's in-plane shape
+        first_index, first = None, None
+        for i, file_bytes in enumerate(uploads):
+            first = decode_slice(file_bytes)
+            if first is not None:
+                first_index = i
+                break
+        if first is None:
+            return np.empty((0, 0, 0), dtype=np.uint8), []
+
+        volume = np.empty((len(uploads), *first.shape), dtype=np.uint8)
+        fit_slice(first, volume[first_index], normalize)
+
+        def ingest(i):
+            image = decode_slice(uploads[i])
+            if image is None:
+                return False
+            fit_slice(image, volume[i], normalize)
+            return True
+
+        rest = range(first_index + 1, len(uploads))
+        valid = [first_index] + [i for i, ok in zip(rest, self._executor.map(ingest, rest)) if ok]
+
+        if len(valid) != len(uploads):
+            logger.info(f"Skipped {len(uploads) - len(valid)} undecodable slices")
+            volume = volume[valid]
+        return volume, valid
+
+    def ingest_stream(self, uploads, normalize=False, capacity=None, buffer=None):
+        """Decode a stream of raw uploads into a growing volume as they arrive
+
+        Unlike `decode`, the uploads are consumed lazily. At most
+        2 * max_workers raw or decoded slices are in flight, and each one is
+        dropped once it has been written into the volume, so memory stays
+        close to the size of the volume alone.
+
+        Args:
+            uploads: iterable of image bytes, e.g. iter_multipart_files(...)
+            normalize: min-max scale every slice to 0-255
+            capacity: expected slice count, to size the buffer up front
+            buffer: VolumeBuffer to fill, e.g. a MappedVolumeBuffer to keep
+                the volume out of memory; a new one of `capacity` by default
+
+        Returns:
+            tuple: (uint8 volume of shape (Z, H, W), indices of the uploads
+            that decoded successfully, in order)
+        """
+        volume = buffer or VolumeBuffer(capacity or 16)
+        pending = deque()
+        valid = []
+        count = 0
+
+        def write_next():
+            index, future = pending.popleft()
+            image = future.result()
+            if image is not None:
+                fit_slice(image, volume.slot(image.shape), normalize)
+                valid.append(index)
+
+        for index, file_bytes in enumerate(uploads):
+            pending.append((index, self._executor.submit(decode_slice, file_bytes)))
+            del file_bytes
+            count += 1
+            while len(pending) > 2 * self.max_workers or (pending and pending[0][1].done()):
+                write_next()
+        while pending:
+            write_next()
+
+        if len(valid) != count:
+            logger.info(f"Skipped {count - len(valid)} undecodable slices")
+        return volume.finish(), valid
+
+    def stack(self, slices, normalize=False):
+        """Stack decoded 2D slices into a (Z, H, W) uint8 volume, resizing mismatched ones"""
+        slices = list(slices)
+        if not slices:
+            return np.empty((0, 0, 0), dtype=np.uint8)
+
+        volume = np.empty((len(slices), *slices[0].shape[:2]), dtype=np.uint8)
+        list(self._executor.map(lambda i: fit_slice(slices[i], volume[i], normalize), range(len(slices))))
+        return volume
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+_shared_ingestor = None
+_shared_lock = threading.Lock()
+
+def get_ingestor():
+    """Process-wide SliceIngestor, created on first use"""
+    global _shared_ingestor
+    with _shared_lock:
+        if _shared_ingestor is None:
+            _shared_ingestor = SliceIngestor()
+        return _shared_ingestor
\ No newline at end of file
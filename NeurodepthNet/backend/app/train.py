@@ -1,12 +1,281 @@
 # app/train.py
 import os
+import sys
+import time
+import json
+import argparse
 import numpy as np
 import cv2
-from sklearn.model_selection import train_test_split
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout
-from tensorflow.keras.utils import to_categorical
+
+if __package__ in (None, ''):
+    # Run as a script (`python train.py`); `python -m app.train` needs none of this
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = 'app'
+
+from .utils import content_hash
+from .dataset_shards import current_shards
+
+IMAGE_EXTENSIONS = ('.jpg', '.png', '.jpeg')
+
+# TrainingConfig options a client may set over HTTP: (type, lowest, highest).
+# Paths and anything else that reaches the filesystem are set by the server.
+HTTP_OPTIONS = {
+    'epochs': (int, 1, 10000),
+    'batch_size': (int, 1, 4096),
+    'base_batch_size': (int, 1, 4096),
+    'base_learning_rate': (float, 1e-8, 1.0),
+    'intra_op_threads': (int, 0, os.cpu_count() or 1),
+    'inter_op_threads': (int, 0, os.cpu_count() or 1),
+    'mixed_precision': (bool, None, None),
+    'xla': (bool, None, None),
+    'checkpoint_every': (int, 1, 10000),
+    'keep_checkpoints': (int, 1, 100),
+    'resume': (bool, None, None),
+    'patience': (int, 0, 10000),
+    'min_delta': (float, 0.0, 10.0),
+    'monitor': (str, None, None),
+}
+MONITORS = ('val_loss', 'val_accuracy', 'loss', 'accuracy')
+
+def _http_option(name, value):
+    """Coerce one HTTP training option to its type and range, raising ValueError"""
+    kind, low, high = HTTP_OPTIONS[name]
+    if kind is bool:
+        if not isinstance(value, bool):
+            raise ValueError(f"{name} must be true or false")
+        return value
+    if kind is str:
+        if value not in MONITORS:
+            raise ValueError(f"{name} must be one of {', '.join(MONITORS)}")
+        return value
+
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{name} must be a number")
+    try:
+        number = kind(value)
+    except ValueError:
+        raise ValueError(f"{name} must be {'an integer' if kind is int else 'a number'}")
+    if kind is int and isinstance(value, float) and value != number:
+        raise ValueError(f"{name} must be an integer")
+    if not low <= number <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return number
+
+def cpu_supports_bf16():
+    """True when the CPU advertises native bfloat16 arithmetic (AVX512-BF16 or AMX)"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return 'avx512_bf16' in flags or 'amx_bf16' in flags
+
+class TrainingConfig:
+    """Hyperparameters and CPU runtime settings for ModelTrainer.train
+
+    The learning rate follows the linear scaling rule: it is
+    `base_learning_rate * batch_size / base_batch_size`, so raising the batch
+    size on large machines keeps the effective step size. Thread counts of 0
+    leave the TensorFlow defaults in place.
+    """
+
+    def __init__(self, epochs=250, batch_size=32, base_batch_size=32, base_learning_rate=1e-3,
+                 intra_op_threads=0, inter_op_threads=0, mixed_precision=False, xla=False,
+                 checkpoint_dir=None, checkpoint_every=1, keep_checkpoints=3, resume=False,
+                 patience=10, min_delta=0.0, monitor='val_loss'):
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.base_batch_size = base_batch_size
+        self.base_learning_rate = base_learning_rate
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.mixed_precision = mixed_precision
+        self.xla = xla
+        # Checkpoints hold weights, optimizer slots, the epoch counter and the best monitored value
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_every = checkpoint_every
+        self.keep_checkpoints = keep_checkpoints
+        self.resume = resume
+        # A patience of 0 disables early stopping
+        self.patience = patience
+        self.min_delta = min_delta
+        self.monitor = monitor
+
+    @classmethod
+    def from_dict(cls, options):
+        """Build a config from user supplied options, rejecting unknown keys"""
+        valid = set(vars(cls()))
+        unknown = set(options) - valid
+        if unknown:
+            raise ValueError(f"Unknown training options: {', '.join(sorted(unknown))}")
+        return cls(**options)
+
+    @classmethod
+    def from_request(cls, options):
+        """Build a config from an untrusted HTTP body
+
+        Only the HTTP_OPTIONS keys are accepted, each coerced to its type and
+        range; anything else raises ValueError.
+        """
+        if not isinstance(options, dict):
+            raise ValueError("Training options must be a JSON object")
+        unknown = set(options) - set(HTTP_OPTIONS)
+        if unknown:
+            raise ValueError(f"Training options not accepted over HTTP: {', '.join(sorted(unknown))}")
+        return cls(**{name: _http_option(name, value) for name, value in options.items()})
+
+    @property
+    def monitor_mode(self):
+        return 'max' if 'acc' in self.monitor else 'min'
+
+    @property
+    def learning_rate(self):
+        return self.base_learning_rate * self.batch_size / self.base_batch_size
+
+    def to_dict(self):
+        return {**vars(self), 'learning_rate': self.learning_rate}
+
+    def apply_runtime(self):
+        """Configure TensorFlow threading and precision; call before building the model"""
+        try:
+            if self.intra_op_threads:
+                tf.config.threading.set_intra_op_parallelism_threads(self.intra_op_threads)
+            if self.inter_op_threads:
+                tf.config.threading.set_inter_op_parallelism_threads(self.inter_op_threads)
+        except RuntimeError as e:
+            # Thread pools can only be sized before the TensorFlow runtime starts
+            print(f"Warning: could not set thread counts: {str(e)}")
+
+        if self.mixed_precision and not cpu_supports_bf16():
+            print("Warning: CPU lacks native bfloat16 support, training in float32")
+            self.mixed_precision = False
+        tf.keras.mixed_precision.set_global_policy('mixed_bfloat16' if self.mixed_precision else 'float32')
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    """Print and record training throughput in images per second for every epoch
+
+    The clock runs from the first training batch to the end of the last one,
+    so validation is not timed. Images are counted as the dataset wrapped by
+    count() hands them to the model, which leaves out files that
+    ignore_errors dropped.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.history = []
+        self.seen = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self._first_batch = None
+        self._last_batch = None
+
+    def count(self, dataset):
+        """Count the images of every (images, labels) batch `dataset` yields"""
+        def counted(images, labels):
+            self.seen.assign_add(tf.cast(tf.shape(labels)[0], tf.int64))
+            return images, labels
+
+        return dataset.map(counted)
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.seen.assign(0)
+        self._first_batch = self._last_batch = None
+
+    def on_train_batch_begin(self, batch, logs=None):
+        if self._first_batch is None:
+            self._first_batch = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._last_batch = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        if self._first_batch is None or self._last_batch is None:
+            return
+        elapsed = self._last_batch - self._first_batch
+        images = int(self.seen.numpy())
+        images_per_sec = images / elapsed if elapsed > 0 else 0.0
+        self.history.append(images_per_sec)
+        if logs is not None:
+            logs['images_per_sec'] = images_per_sec
+        print(f"Epoch {epoch + 1}: {images_per_sec:.1f} images/sec ({images} images in {elapsed:.1f}s)")
+
+    def summary(self):
+        """Throughput statistics over all epochs, skipping the first (tracing/caching) one when possible"""
+        steady = self.history[1:] or self.history
+        if not steady:
+            return {}
+        return {
+            'epochs': len(self.history),
+            'first_epoch_images_per_sec': self.history[0],
+            'mean_images_per_sec': float(np.mean(steady)),
+            'median_images_per_sec': float(np.median(steady)),
+            'max_images_per_sec': float(np.max(steady))
+        }
+
+class CheckpointSaver(tf.keras.callbacks.Callback):
+    """Track the epoch counter and best monitored value and save a training checkpoint
+
+    A checkpoint is written every `every` epochs and once more when training
+    ends, so early stopping or an interrupted interval never loses the last
+    completed epoch.
+    """
+
+    def __init__(self, manager, state, every=1, monitor='val_loss', mode='min'):
+        super().__init__()
+        self.manager = manager
+        self.state = state
+        self.every = max(1, int(every))
+        self.monitor = monitor
+        self.mode = mode
+        self._last_saved = int(state['epoch'].numpy())
+
+    def _improved(self, value):
+        best = float(self.state['best'].numpy())
+        return value > best if self.mode == 'max' else value < best
+
+    def _save(self):
+        epoch = int(self.state['epoch'].numpy())
+        path = self.manager.save(checkpoint_number=epoch)
+        self._last_saved = epoch
+        print(f"Saved checkpoint for epoch {epoch}: {path}")
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.state['epoch'].assign(epoch + 1)
+        value = (logs or {}).get(self.monitor)
+        if value is not None and self._improved(float(value)):
+            self.state['best'].assign(float(value))
+        if (epoch + 1) % self.every == 0:
+            self._save()
+
+    def on_train_end(self, logs=None):
+        if int(self.state['epoch'].numpy()) > self._last_saved:
+            self._save()
+
+def write_status(path, **status):
+    """Atomically replace the JSON status file read by a supervising process"""
+    status['updated_at'] = time.time()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(status, f)
+    os.replace(tmp_path, path)
+
+class StatusReporter(tf.keras.callbacks.Callback):
+    """Write per-epoch progress to a JSON status file, see write_status"""
+
+    def __init__(self, path, epochs):
+        super().__init__()
+        self.path = path
+        self.epochs = epochs
+
+    def on_epoch_end(self, epoch, logs=None):
+        write_status(
+            self.path,
+            status='running',
+            epoch=epoch + 1,
+            epochs=self.epochs,
+            logs={name: float(value) for name, value in (logs or {}).items()}
+        )
 
 class ModelTrainer:
     def __init__(self, data_dir=None):
@@ -22,6 +291,140 @@ class ModelTrainer:
         self.classes = ['glioma', 'meningioma', 'notumor', 'pituitary']
         self.num_classes = len(self.classes)
 
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        project_root = os.path.dirname(os.path.dirname(current_dir))
+        self.models_dir = os.path.join(project_root, 'models')
+        self.model_path = os.path.join(self.models_dir, 'tumor_model.h5')
+
+    def list_files(self, subset='training'):
+        """Return image paths and integer labels for a subset without reading any image"""
+        paths = []
+        labels = []
+
+        subset_dir = os.path.join(self.data_dir, subset)
+        if not os.path.exists(subset_dir):
+            raise FileNotFoundError(f"Subset directory not found: {subset_dir}")
+
+        for class_idx, class_name in enumerate(self.classes):
+            class_dir = os.path.join(subset_dir, class_name)
+            if not os.path.exists(class_dir):
+                raise FileNotFoundError(f"Class directory not found: {class_dir}")
+
+            for img_name in sorted(os.listdir(class_dir)):
+                if img_name.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.append(os.path.join(class_dir, img_name))
+                    labels.append(class_idx)
+
+        if not paths:
+            raise ValueError(f"No images found in {subset_dir}")
+
+        return paths, labels
+
+    def _decode(self, path, label):
+        image = tf.io.decode_image(tf.io.read_file(path), channels=1, expand_animations=False)
+        image = tf.image.resize(image, self.image_size)
+        # Keep uint8 until after caching so the cache file stays 1 byte per pixel
+        image = tf.cast(tf.clip_by_value(tf.round(image), 0, 255), tf.uint8)
+        return image, label
+
+    def _clear_partial_cache(self, cache_path):
+        """Remove what a run killed during its first epoch left of a tf.data file cache
+
+        A finished cache has `<cache_path>.index`. Without it, the lockfile
+        and partial data of an interrupted writer would make the next run
+        fail with "cache lockfile already exists". Only one training run
+        uses a cache at a time (TrainingWorker refuses concurrent runs).
+        """
+        if os.path.exists(f"{cache_path}.index"):
+            return
+        directory, name = os.path.split(cache_path)
+        for entry in os.listdir(directory):
+            if entry.startswith((f"{name}_", f"{name}.")):
+                print(f"Removing partial tf.data cache file {entry}")
+                os.remove(os.path.join(directory, entry))
+
+    def _normalize(self, images, labels):
+        images = tf.cast(images, tf.float32) / 255.0
+        return images, tf.one_hot(labels, self.num_classes)
+
+    def load_shards(self, subset='training'):
+        """Memory-mapped shards of a subset (python -m app.dataset_shards), or None
+
+        Shards that no longer match the source files are updated
+        incrementally first, so training never reads stale images.
+        """
+        return current_shards(os.path.join(self.data_dir, subset), self.classes, self.image_size)
+
+    def _shard_batches(self, images, labels, batch_size, shuffle):
+        """tf.data source of (N, H, W, 1) uint8 batches of memory-mapped shard rows
+
+        Row indices are shuffled every epoch and batched; each batch is then
+        read from the memory maps with one fancy-indexing gather, several
+        batches in parallel, instead of row by row from a Python generator.
+        """
+        def gather(index):
+            # Reading the rows in file order keeps the page faults sequential
+            index = np.sort(index)
+            return images[index][..., np.newaxis], labels[index].astype(np.int64)
+
+        def read(index):
+            batch_images, batch_labels = tf.numpy_function(gather, [index], (tf.uint8, tf.int64))
+            batch_images.set_shape((None, *images.shape[1:], 1))
+            batch_labels.set_shape((None,))
+            return batch_images, batch_labels
+
+        dataset = tf.data.Dataset.range(len(labels))
+        if shuffle:
+            dataset = dataset.shuffle(len(labels), reshuffle_each_iteration=True)
+        dataset = dataset.batch(batch_size)
+        return dataset.map(read, num_parallel_calls=tf.data.AUTOTUNE)
+
+    def build_dataset(self, subset='training', batch_size=32, shuffle=True,
+                      shuffle_buffer=2048, cache_dir=None):
+        """Streaming tf.data pipeline for a subset
+
+        With shards (see load_shards) batches are gathered from the memory
+        maps in a new random order each epoch. Otherwise images are decoded and
+        resized in parallel, cached as uint8 to a local file (so later epochs
+        skip decoding without holding the dataset in memory) and shuffled
+        through a bounded buffer. Either way they are batched, scaled to
+        float32 per batch and prefetched.
+
+        Returns:
+            tuple: (dataset, number of images)
+        """
+        shards = self.load_shards(subset)
+        if shards is not None:
+            images, labels = shards.arrays()
+            dataset = self._shard_batches(images, labels, batch_size, shuffle)
+            dataset = dataset.map(self._normalize, num_parallel_calls=tf.data.AUTOTUNE)
+            dataset = dataset.prefetch(tf.data.AUTOTUNE)
+            print(f"Streaming {len(labels)} {subset} images from shards in {shards.shard_dir}")
+            return dataset, len(labels)
+
+        paths, labels = self.list_files(subset)
+
+        if cache_dir is None:
+            cache_dir = os.path.join(self.data_dir, '.tfdata_cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        # A changed file list or modified image gets a fresh cache file
+        fingerprint = content_hash(*[(p, os.path.getsize(p), os.path.getmtime(p)) for p in paths])
+        cache_path = os.path.join(cache_dir, f"{subset}-{fingerprint[:16]}")
+        self._clear_partial_cache(cache_path)
+
+        dataset = tf.data.Dataset.from_tensor_slices((paths, labels))
+        dataset = dataset.map(self._decode, num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.ignore_errors()
+        dataset = dataset.cache(cache_path)
+        if shuffle:
+            dataset = dataset.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+        dataset = dataset.batch(batch_size)
+        dataset = dataset.map(self._normalize, num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.prefetch(tf.data.AUTOTUNE)
+
+        print(f"Streaming {len(paths)} {subset} images (cache: {cache_path})")
+        return dataset, len(paths)
+
     def load_data(self, subset='training'):
         images = []
         labels = []
@@ -30,6 +433,12 @@ class ModelTrainer:
         if not os.path.exists(subset_dir):
             raise FileNotFoundError(f"Subset directory not found: {subset_dir}")
 
+        # Prefer prebuilt memory-mapped shards (python -m app.dataset_shards)
+        shards = self.load_shards(subset)
+        if shards is not None:
+            print(f"Loading {subset} data from shards in {shards.shard_dir}...")
+            return shards.arrays()
+
         print(f"Loading {subset} data from {subset_dir}...")
 
         for class_idx, class_name in enumerate(self.classes):
@@ -54,7 +463,8 @@ class ModelTrainer:
 
         return np.array(images), np.array(labels)
 
-    def create_model(self):
+    def create_model(self, config=None):
+        config = config or TrainingConfig()
         self.model = Sequential([
             Conv2D(32, (3, 3), activation='relu', input_shape=(*self.image_size, 1)),
             MaxPooling2D((2, 2)),
@@ -69,61 +479,125 @@ class ModelTrainer:
             Dropout(0.5),
             Dense(64, activation='relu'),
             Dropout(0.3),
-            Dense(self.num_classes, activation='softmax')
+            # Keep the softmax in float32 under mixed precision
+            Dense(self.num_classes, activation='softmax', dtype='float32')
         ])
 
         self.model.compile(
-            optimizer='adam',
+            optimizer=tf.keras.optimizers.Adam(learning_rate=config.learning_rate),
             loss='categorical_crossentropy',
-            metrics=['accuracy']
+            metrics=['accuracy'],
+            jit_compile=config.xla
         )
 
-    def train(self):
-        try:
-            # Load training and testing data
-            print("Loading training data...")
-            X_train, y_train = self.load_data('training')
-            print("Loading testing data...")
-            X_test, y_test = self.load_data('testing')
-            
-            print(f"Training samples: {len(X_train)}")
-            print(f"Testing samples: {len(X_test)}")
+    def create_checkpoint_manager(self, checkpoint_dir, max_to_keep=3, mode='min'):
+        """Track the model, its optimizer slots, the epoch counter and the best monitored value
+
+        Returns:
+            tuple: (tf.train.CheckpointManager, dict of the epoch and best tf.Variables)
+        """
+        # Create the optimizer slots up front so a restore fills them instead of deferring
+        self.model.optimizer.build(self.model.trainable_variables)
+        state = {
+            'epoch': tf.Variable(0, dtype=tf.int64, trainable=False),
+            'best': tf.Variable(-np.inf if mode == 'max' else np.inf, dtype=tf.float64, trainable=False)
+        }
+        checkpoint = tf.train.Checkpoint(model=self.model, optimizer=self.model.optimizer, **state)
+        manager = tf.train.CheckpointManager(checkpoint, checkpoint_dir, max_to_keep=max_to_keep)
+        return manager, state
+
+    def restore_checkpoint(self, manager, state):
+        """Restore the latest checkpoint if there is one and return the epoch to continue from"""
+        if not manager.latest_checkpoint:
+            print(f"No checkpoint found in {manager.directory}, starting from scratch")
+            return 0
+        manager.checkpoint.restore(manager.latest_checkpoint).assert_existing_objects_matched()
+        epoch = int(state['epoch'].numpy())
+        print(f"Resumed from {manager.latest_checkpoint} at epoch {epoch}")
+        return epoch
 
-            # Reshape and normalize images
-            X_train = X_train.reshape(-1, *self.image_size, 1) / 255.0
-            X_test = X_test.reshape(-1, *self.image_size, 1) / 255.0
+    def train(self, config=None, callbacks=None):
+        config = config or TrainingConfig()
+        try:
+            config.apply_runtime()
+            print(f"Training configuration: {config.to_dict()}")
 
-            # Convert labels to categorical
-            y_train = to_categorical(y_train, self.num_classes)
-            y_test = to_categorical(y_test, self.num_classes)
+            # Stream training and testing data
+            print("Preparing training data...")
+            train_ds, num_train = self.build_dataset('training', batch_size=config.batch_size, shuffle=True)
+            print("Preparing testing data...")
+            test_ds, num_test = self.build_dataset('testing', batch_size=config.batch_size, shuffle=False)
+            
+            print(f"Training samples: {num_train}")
+            print(f"Testing samples: {num_test}")
 
             # Create and train model
             print("Creating the model...")
-            self.create_model()
-            
-            print("Starting training...")
+            self.create_model(config)
+            os.makedirs(self.models_dir, exist_ok=True)
+
+            checkpoint_dir = config.checkpoint_dir or os.path.join(self.models_dir, 'checkpoints')
+            manager, state = self.create_checkpoint_manager(checkpoint_dir, config.keep_checkpoints,
+                                                            config.monitor_mode)
+            initial_epoch = 0
+            if config.resume:
+                initial_epoch = self.restore_checkpoint(manager, state)
+
+            best_path = os.path.join(self.models_dir, 'tumor_model_best.h5')
+            best_value = float(state['best'].numpy())
+            throughput = ThroughputLogger()
+            train_ds = throughput.count(train_ds)
+            callbacks = [
+                throughput,
+                *(callbacks or []),
+                CheckpointSaver(manager, state, every=config.checkpoint_every,
+                                monitor=config.monitor, mode=config.monitor_mode),
+                tf.keras.callbacks.ModelCheckpoint(
+                    best_path,
+                    monitor=config.monitor,
+                    mode=config.monitor_mode,
+                    save_best_only=True,
+                    # Carry the best value over a resume so a worse epoch cannot replace the kept model
+                    initial_value_threshold=best_value if np.isfinite(best_value) else None,
+                    verbose=1
+                )
+            ]
+            if config.patience:
+                callbacks.append(tf.keras.callbacks.EarlyStopping(
+                    monitor=config.monitor,
+                    mode=config.monitor_mode,
+                    patience=config.patience,
+                    min_delta=config.min_delta,
+                    verbose=1
+                ))
+
+            print(f"Starting training at epoch {initial_epoch + 1}...")
             history = self.model.fit(
-                X_train, y_train,
-                validation_data=(X_test, y_test),
-                epochs=250,  # Increased from 1 to 10
-                batch_size=32,
+                train_ds,
+                validation_data=test_ds,
+                epochs=config.epochs,
+                initial_epoch=initial_epoch,
+                callbacks=callbacks,
                 verbose=1  # Add verbose output
             )
+            history.history['throughput'] = throughput.summary()
+            print(f"Throughput: {throughput.summary()}")
 
-            # Save model - using absolute path
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.dirname(os.path.dirname(current_dir))
-            models_dir = os.path.join(project_root, 'models')
-            os.makedirs(models_dir, exist_ok=True)
-            
-            model_path = os.path.join(models_dir, 'tumor_model.h5')
-            print(f"Saving model to: {model_path}")
-            self.model.save(model_path)
+            # Keep the best validation epoch rather than the last one
+            if os.path.exists(best_path):
+                print(f"Restoring best weights from: {best_path}")
+                self.model.load_weights(best_path)
+
+            print(f"Saving model to: {self.model_path}")
+            # Write next to the target and rename, so a serving process never loads a partial file
+            partial_path = os.path.join(self.models_dir, '.tumor_model.partial.h5')
+            self.model.save(partial_path)
+            os.replace(partial_path, self.model_path)
             print(f"Model saved successfully!")
 
             # Evaluate model
             print("\nEvaluating model...")
-            test_loss, test_accuracy = self.model.evaluate(X_test, y_test)
+            test_loss, test_accuracy = self.model.evaluate(test_ds)
             print(f"Test accuracy: {test_accuracy:.4f}")
 
             return history
@@ -132,11 +606,80 @@ class ModelTrainer:
             print(f"Error during training: {str(e)}")
             raise e
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the tumor classification model")
+    parser.add_argument('--data-dir', default=None)
+    parser.add_argument('--epochs', type=int, default=250)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--base-batch-size', type=int, default=32,
+                        help="Batch size the base learning rate was tuned for")
+    parser.add_argument('--learning-rate', type=float, default=1e-3,
+                        help="Learning rate at --base-batch-size; scaled linearly with --batch-size")
+    parser.add_argument('--intra-op-threads', type=int, default=0)
+    parser.add_argument('--inter-op-threads', type=int, default=0)
+    parser.add_argument('--mixed-precision', action='store_true', help="Use bfloat16 where the CPU supports it")
+    parser.add_argument('--xla', action='store_true', help="Compile the training step with XLA")
+    parser.add_argument('--checkpoint-dir', default=None, help="Defaults to models/checkpoints")
+    parser.add_argument('--checkpoint-every', type=int, default=1, help="Epochs between checkpoints")
+    parser.add_argument('--keep-checkpoints', type=int, default=3)
+    parser.add_argument('--resume', action='store_true', help="Continue from the latest checkpoint")
+    parser.add_argument('--patience', type=int, default=10,
+                        help="Epochs without improvement before stopping early; 0 disables")
+    parser.add_argument('--min-delta', type=float, default=0.0)
+    parser.add_argument('--monitor', default='val_loss')
+    parser.add_argument('--config', default=None,
+                        help="JSON file of TrainingConfig options; replaces the hyperparameter flags")
+    parser.add_argument('--status-file', default=None, help="Write JSON progress here after every epoch")
+    parser.add_argument('--export', nargs='*', choices=['tflite', 'onnx'], default=[],
+                        help="Export the trained model for these serving backends")
+    return parser.parse_args(argv)
+
+def config_from_args(args):
+    if args.config:
+        with open(args.config) as f:
+            return TrainingConfig.from_dict(json.load(f))
+    return TrainingConfig(
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        base_batch_size=args.base_batch_size,
+        base_learning_rate=args.learning_rate,
+        intra_op_threads=args.intra_op_threads,
+        inter_op_threads=args.inter_op_threads,
+        mixed_precision=args.mixed_precision,
+        xla=args.xla,
+        checkpoint_dir=args.checkpoint_dir,
+        checkpoint_every=args.checkpoint_every,
+        keep_checkpoints=args.keep_checkpoints,
+        resume=args.resume,
+        patience=args.patience,
+        min_delta=args.min_delta,
+        monitor=args.monitor
+    )
+
 if __name__ == "__main__":
+    args = parse_args()
     print("Starting tumor classification model training...")
-    trainer = ModelTrainer()
+    trainer = ModelTrainer(data_dir=args.data_dir)
     try:
-        history = trainer.train()
+        config = config_from_args(args)
+        callbacks = []
+        if args.status_file:
+            write_status(args.status_file, status='running', epoch=0, epochs=config.epochs)
+            callbacks.append(StatusReporter(args.status_file, config.epochs))
+
+        history = trainer.train(config, callbacks=callbacks)
+        if args.export:
+            from .model_export import ModelExporter
+            for path in ModelExporter(trainer.model_path).export(args.export):
+                print(f"Wrote {path}")
+
+        if args.status_file:
+            last_epoch = history.epoch[-1] + 1 if history.epoch else config.epochs
+            write_status(args.status_file, status='done', epoch=last_epoch, epochs=config.epochs,
+                         model_path=trainer.model_path)
         print("Training completed successfully!")
     except Exception as e:
-        print(f"Training failed: {str(e)}")
\ No newline at end of file
+        print(f"Training failed: {str(e)}")
+        if args.status_file:
+            write_status(args.status_file, status='failed', error=str(e))
+        sys.exit(1)
@@ -0,0 +1,152 @@
+# app/training_worker.py
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import threading
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TrainingInProgress(RuntimeError):
+    """Raised when a training run is started while another one is still running"""
+
+class TrainingWorker:
+    """Run `python -m app.train` in a child process and follow its progress
+
+    The child gets its own interpreter, so TensorFlow training never competes
+    with the serving process for the GIL or its memory. It reports
+    per-epoch progress through a JSON status file that `status()` reads.
+    When the child exits successfully, `on_complete(model_path)` is called
+    from the monitor thread. Routes use this callback to hot-reload the
+    classifier.
+    """
+
+    def __init__(self, data_dir=None, export_formats=(), on_complete=None, run_dir=None):
+        self.data_dir = data_dir
+        self.export_formats = tuple(export_formats)
+        self.on_complete = on_complete
+        self.run_dir = run_dir or tempfile.mkdtemp(prefix='neurodepth-train-')
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._process = None
+        self._state = {'status': 'idle'}
+
+    @property
+    def running(self):
+        with self._lock:
+            return self._process is not None and self._process.poll() is None
+
+    def _command(self, config_path, status_path):
+        command = [sys.executable, '-m', 'app.train', '--config', config_path, '--status-file', status_path]
+        if self.data_dir:
+            command += ['--data-dir', self.data_dir]
+        if self.export_formats:
+            command += ['--export', *self.export_formats]
+        return command
+
+    def start(self, config):
+        """Launch a training run for a TrainingConfig
+
+        Checkpoints go to `checkpoints` in the run directory unless the
+        config names a directory; configs built from HTTP requests never do.
+
+        Raises:
+            TrainingInProgress: if the previous run has not finished
+        """
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                raise TrainingInProgress("Training is already running")
+
+            os.makedirs(self.run_dir, exist_ok=True)
+            if config.checkpoint_dir is None:
+                config.checkpoint_dir = os.path.join(self.run_dir, 'checkpoints')
+            config_path = os.path.join(self.run_dir, 'config.json')
+            status_path = os.path.join(self.run_dir, 'status.json')
+            log_path = os.path.join(self.run_dir, 'train.log')
+            with open(config_path, 'w') as f:
+                json.dump(vars(config), f)
+            if os.path.exists(status_path):
+                os.remove(status_path)
+
+            with open(log_path, 'wb') as log_file:
+                self._process = subprocess.Popen(
+                    self._command(config_path, status_path),
+                    cwd=BACKEND_DIR,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT
+                )
+            self._state = {
+                'status': 'starting',
+                'pid': self._process.pid,
+                'config': config.to_dict(),
+                'started_at': time.time(),
+                'status_file': status_path,
+                'log_file': log_path
+            }
+            process = self._process
+
+        self.logger.info(f"Started training process {process.pid}")
+        threading.Thread(target=self._monitor, args=(process, status_path),
+                         name="training-monitor", daemon=True).start()
+        return self.status()
+
+    def _read_status(self, status_path):
+        try:
+            with open(status_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # Not written yet; the child replaces the file atomically so it is never partial
+            return {}
+
+    def _monitor(self, process, status_path):
+        returncode = process.wait()
+        progress = self._read_status(status_path)
+        update = {'finished_at': time.time(), 'returncode': returncode}
+
+        if returncode == 0 and progress.get('status') == 'done':
+            update['status'] = 'done'
+            if self.on_complete is not None:
+                try:
+                    update['model_version'] = self.on_complete(progress['model_path'])
+                    update['reloaded'] = True
+                except Exception as e:
+                    self.logger.error(f"Error loading trained model: {str(e)}")
+                    update.update(reloaded=False, error=f"Trained model could not be loaded: {str(e)}")
+        else:
+            update['status'] = 'failed'
+            update['error'] = progress.get('error') or f"Training process exited with code {returncode}"
+            self.logger.error(f"Training failed: {update['error']}")
+
+        with self._lock:
+            if self._process is process:
+                self._state.update(update)
+
+    def status(self):
+        """Current run state merged with the child's latest per-epoch progress"""
+        with self._lock:
+            state = dict(self._state)
+        if 'status_file' in state:
+            progress = self._read_status(state['status_file'])
+            # A child that reports 'done' stays 'running' until the monitor has reloaded the model
+            if state['status'] == 'starting' and progress:
+                state['status'] = 'running'
+            for key in ('epoch', 'epochs', 'logs', 'updated_at'):
+                if key in progress:
+                    state[key] = progress[key]
+        return state
+
+    def shutdown(self, timeout=10.0):
+        """Stop a running child process"""
+        with self._lock:
+            process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
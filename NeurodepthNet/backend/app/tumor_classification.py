@@ -1,38 +1,270 @@
 # app/tumor_classification.py
-import tensorflow as tf
+import abc
 import numpy as np
-from tensorflow.keras.models import load_model
 import cv2
 import logging
+import threading
+from .batching import MicroBatcher
+from .model_export import exported_model_path, model_file_identity
+
+MODEL_BACKENDS = ('keras', 'tflite', 'tflite-int8', 'onnx', 'onnx-int8')
+
+class BaseEngine(abc.ABC):
+    """Common interface of the classifier runtimes: predict() on (N, H, W, 1) float32"""
+
+    def __init__(self, image_size=(224, 224)):
+        self.image_size = image_size
+        self.logger = logging.getLogger(__name__)
+
+    @abc.abstractmethod
+    def predict(self, batch):
+        """Class probabilities, shape (N, num_classes), for a (N, H, W, 1) float32 batch"""
+
+    def warmup(self, batch_sizes=(1,)):
+        """Run the model once per batch size before serving traffic"""
+        for batch_size in batch_sizes:
+            self.predict(np.zeros((batch_size, *self.image_size, 1), dtype=np.float32))
+        self.logger.info(f"Warmed up {type(self).__name__} for batch sizes {list(batch_sizes)}")
+
+class InferenceEngine(BaseEngine):
+    """Graph-mode forward pass for a loaded Keras model
+
+    `model.predict` rebuilds its data adapter and callback machinery on every
+    call. The engine instead traces `model(x, training=False)` once into a
+    `tf.function` with a fixed (None, H, W, 1) float32 signature, so any batch
+    size reuses the same concrete graph.
+    """
+
+    def __init__(self, model, image_size=(224, 224)):
+        super().__init__(image_size)
+        import tensorflow as tf
+
+        self._tf = tf
+        self.model = model
+        self.input_signature = [
+            tf.TensorSpec(shape=(None, *image_size, 1), dtype=tf.float32)
+        ]
+        self._forward = tf.function(self._call, input_signature=self.input_signature)
+
+    @classmethod
+    def from_path(cls, model_path, image_size=(224, 224)):
+        import tensorflow as tf
+        return cls(tf.keras.models.load_model(model_path), image_size)
+
+    def _call(self, batch):
+        return self.model(batch, training=False)
+
+    def predict(self, batch):
+        """Run the traced graph on a numpy batch and return numpy probabilities"""
+        batch = self._tf.convert_to_tensor(batch, dtype=self._tf.float32)
+        return self._forward(batch).numpy()
+
+class TFLiteEngine(BaseEngine):
+    """TFLite interpreter backend; prefers the standalone tflite_runtime package"""
+
+    def __init__(self, model_path, image_size=(224, 224), num_threads=None):
+        super().__init__(image_size)
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input_index = self.interpreter.get_input_details()[0]['index']
+        self._output_index = self.interpreter.get_output_details()[0]['index']
+        self._input_shape = tuple(self.interpreter.get_input_details()[0]['shape'])
+        # The interpreter holds mutable tensor buffers, so calls are serialized
+        self._lock = threading.Lock()
+
+    def predict(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        with self._lock:
+            if batch.shape != self._input_shape:
+                self.interpreter.resize_tensor_input(self._input_index, batch.shape)
+                self.interpreter.allocate_tensors()
+                self._input_shape = batch.shape
+            self.interpreter.set_tensor(self._input_index, batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output_index).copy()
+
+class OnnxEngine(BaseEngine):
+    """ONNX Runtime backend on the CPU execution provider"""
+
+    def __init__(self, model_path, image_size=(224, 224), num_threads=None):
+        super().__init__(image_size)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+        self._input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self._input_name: batch})[0]
+
+def load_engine(backend, model_path, image_size=(224, 224), num_threads=None):
+    """Create the inference engine for `backend` from the Keras model path
+
+    Non-Keras backends load the exported file next to the model, see
+    app.model_export.exported_model_path.
+    """
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend: {backend}. Expected one of {MODEL_BACKENDS}")
+
+    path = exported_model_path(model_path, backend)
+    if backend == 'keras':
+        return InferenceEngine.from_path(path, image_size)
+    if backend.startswith('tflite'):
+        return TFLiteEngine(path, image_size, num_threads=num_threads)
+    return OnnxEngine(path, image_size, num_threads=num_threads)
 
 class TumorClassifier:
-    def __init__(self, model_path='../models/tumor_model.h5'):
-        self.model = tf.keras.models.load_model(model_path)
+    def __init__(self, model_path='../models/tumor_model.h5', backend='keras', num_threads=None,
+                 batching=False, max_batch_size=16, max_wait_ms=5.0):
         self.image_size = (224, 224)
         self.classes = ['glioma', 'meningioma', 'notumor', 'pituitary']
         self.logger = logging.getLogger(__name__)
+        self.backend = backend
+        self.model_path = model_path
+        self.num_threads = num_threads
+        # Read before loading: a file replaced meanwhile is picked up by the next reload_if_changed()
+        self.identity = model_file_identity(exported_model_path(model_path, backend))
+        self.engine = load_engine(backend, model_path, self.image_size, num_threads=num_threads)
+        # The Keras model object is only available on the 'keras' backend
+        self.model = getattr(self.engine, 'model', None)
+        # Incremented on every reload of this instance; cache keys use `identity`
+        self.version = 0
+        self.max_batch_size = max_batch_size
+        self._reload_lock = threading.Lock()
+        self.logger.info(f"Loaded tumor classifier with '{backend}' backend")
+
+        # Optional micro-batcher that merges concurrent classify() calls
+        self._batcher = None
+        if batching:
+            self._batcher = MicroBatcher(self._predict_batch, max_batch_size=max_batch_size,
+                                         max_wait_ms=max_wait_ms)
+            self.logger.info(f"Micro-batching enabled (max_batch_size={max_batch_size}, "
+                             f"max_wait_ms={max_wait_ms})")
 
     def preprocess_image(self, image):
         # Resize and normalize
         image = cv2.resize(image, self.image_size)
-        image = image.reshape(-1, *self.image_size, 1) / 255.0
+        image = image.reshape(-1, *self.image_size, 1).astype(np.float32) / 255.0
         return image
 
-    def classify(self, image):
-        preprocessed = self.preprocess_image(image)
-        prediction = self.model.predict(preprocessed)
-        class_idx = np.argmax(prediction[0])
-        confidence = float(prediction[0][class_idx])
-        
+    def _predict_batch(self, batch):
+        """Run one forward pass over a (N, 224, 224, 1) batch"""
+        # Read the engine once: a concurrent reload swaps the attribute, never the object in use
+        return self.engine.predict(batch)
+
+    def _warmup_batch_sizes(self):
+        return (1, self.max_batch_size) if self._batcher is not None else (1,)
+
+    def warmup(self):
+        """Trace and run the inference graph once so the first request is not slow"""
+        self.engine.warmup(self._warmup_batch_sizes())
+
+    def reload(self, model_path=None):
+        """Load a new model and swap it in without interrupting requests
+
+        The new engine is built and warmed up before a single attribute
+        assignment replaces the old one, so in-flight predictions finish on
+        the old model and every later one uses the new model. If loading
+        fails the current model stays in place.
+
+        Args:
+            model_path: Keras model path; defaults to the path loaded at startup
+
+        Returns:
+            int: the new model version
+        """
+        model_path = model_path or self.model_path
+        with self._reload_lock:
+            try:
+                identity = model_file_identity(exported_model_path(model_path, self.backend))
+                engine = load_engine(self.backend, model_path, self.image_size, num_threads=self.num_threads)
+                engine.warmup(self._warmup_batch_sizes())
+            except Exception as e:
+                self.logger.error(f"Error reloading model from {model_path}: {str(e)}")
+                raise
+
+            self.engine = engine
+            self.model = getattr(engine, 'model', None)
+            self.model_path = model_path
+            self.identity = identity
+            self.version += 1
+            self.logger.info(f"Reloaded tumor classifier from {model_path} (version {self.version})")
+            return self.version
+
+    def reload_if_changed(self):
+        """Reload when the served model file was replaced since it was loaded
+
+        Training hot-reloads only the worker that launched it; every other
+        worker, and a worker restarted since, catches up here.
+
+        Returns:
+            bool: whether the model was reloaded
+        """
+        path = exported_model_path(self.model_path, self.backend)
+        try:
+            if model_file_identity(path) == self.identity:
+                return False
+        except OSError:
+            # Mid-replace or removed: keep serving the loaded model
+            return False
+        self.logger.info(f"Model file {path} changed, reloading")
+        self.reload()
+        return True
+
+    def _format_prediction(self, prediction):
+        class_idx = np.argmax(prediction)
+        confidence = float(prediction[class_idx])
+
         return {
             'class': self.classes[class_idx],
             'confidence': confidence,
             'probabilities': {
                 class_name: float(prob) 
-                for class_name, prob in zip(self.classes, prediction[0])
+                for class_name, prob in zip(self.classes, prediction)
             }
         }
 
+    def classify(self, image):
+        preprocessed = self.preprocess_image(image)
+        if self._batcher is not None:
+            prediction = self._batcher.submit(preprocessed[0])
+        else:
+            prediction = self._predict_batch(preprocessed)[0]
+        return self._format_prediction(prediction)
+
+    def classify_batch(self, images):
+        """Classify several images with a single forward pass
+
+        Args:
+            images: iterable of grayscale numpy arrays (any size)
+
+        Returns:
+            list: one classification dict per image, in input order
+        """
+        images = list(images)
+        if not images:
+            return []
+
+        batch = np.concatenate([self.preprocess_image(image) for image in images], axis=0)
+        predictions = self._predict_batch(batch)
+        return [self._format_prediction(prediction) for prediction in predictions]
+
+    def close(self):
+        """Stop the background micro-batcher, if any"""
+        if self._batcher is not None:
+            self._batcher.close()
+            self._batcher = None
+
     def get_confidence(self, image):
         """Get confidence score for tumor classification
         
@@ -47,7 +279,7 @@ class TumorClassifier:
             preprocessed = self.preprocess_image(image)
             
             # Get prediction
-            prediction = self.model.predict(preprocessed)
+            prediction = self._predict_batch(preprocessed)
             
             # Return highest confidence score
             return float(np.max(prediction))
@@ -1,79 +1,122 @@
 import cv2
 import numpy as np
-from skimage import measure
-from scipy import ndimage
 import logging
+import threading
+from collections import OrderedDict
+from .utils import content_hash, lazy_import
+
+measure = lazy_import('skimage.measure')
 
 logger = logging.getLogger(__name__)
 
+class SegmentationResult:
+    """Otsu segmentation of one grayscale slice
+
+    Holds the binary mask, the largest external contour and its measurements
+    so that measurements, the overlay and segment_tumor all share one
+    threshold/findContours pass.
+    """
+
+    def __init__(self, binary, contour):
+        self.binary = binary
+        self.contour = contour
+        self.measurements = self._measure(contour)
+        self.component_mask = None
+
+    @staticmethod
+    def _measure(contour):
+        if contour is None:
+            return {
+                'area_pixels': 0,
+                'perimeter_pixels': 0,
+                'circularity': 0
+            }
+
+        # Calculate metrics
+        area = cv2.contourArea(contour)
+        perimeter = cv2.arcLength(contour, True)
+        
+        # Calculate circularity (4π * area / perimeter²)
+        circularity = (4 * np.pi * area) / (perimeter * perimeter) if perimeter > 0 else 0
+        
+        logger.info(f"Area: {area}, Perimeter: {perimeter}, Circularity: {circularity}")
+        
+        return {
+            'area_pixels': float(area),
+            'perimeter_pixels': float(perimeter),
+            'circularity': float(circularity)
+        }
+
 class TumorSegmentation:
-    def __init__(self):
+    def __init__(self, cache_size=64):
         self.mask = None
         self.contours = None
         self.logger = logging.getLogger(__name__)
-        
-    def segment_tumor(self, image):
-        """Segment tumor from the brain MRI image"""
-        # Convert to float and normalize
-        img = image.astype(float) / 255.0
-        
-        # Apply Otsu's thresholding
+
+        # LRU of SegmentationResult keyed by image content hash
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def analyze(self, image):
+        """Return the shared SegmentationResult for an image, computing it at most once"""
+        key = content_hash(image)
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self.logger.debug("Segmentation cache hit")
+                return result
+
+        # Threshold image using Otsu's method
         _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
         
-        # Remove noise using morphological operations
-        kernel = np.ones((3,3), np.uint8)
-        opening = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel, iterations=2)
+        # Find contours
+        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
-        # Find connected components
-        labels = measure.label(opening)
-        props = measure.regionprops(labels)
+        # Get largest contour (assumed to be tumor)
+        tumor_contour = max(contours, key=cv2.contourArea) if contours else None
+        result = SegmentationResult(binary, tumor_contour)
+
+        with self._cache_lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
         
-        # Get the largest connected component (assumed to be tumor)
-        if props:
+    def segment_tumor(self, image):
+        """Segment tumor from the brain MRI image"""
+        result = self.analyze(image)
+
+        if result.component_mask is None:
+            # Remove noise using morphological operations
+            kernel = np.ones((3,3), np.uint8)
+            opening = cv2.morphologyEx(result.binary, cv2.MORPH_OPEN, kernel, iterations=2)
+            
+            # Find connected components
+            labels = measure.label(opening)
+            props = measure.regionprops(labels)
+            
+            # Get the largest connected component (assumed to be tumor)
+            if not props:
+                return None
             largest = max(props, key=lambda p: p.area)
-            self.mask = (labels == largest.label).astype(np.uint8) * 255
-            self.contours, _ = cv2.findContours(self.mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            return {
-                'mask': self.mask,
-                'measurements': self.calculate_measurements(),
-                'contours': self.contours
-            }
-        return None
+            result.component_mask = (labels == largest.label).astype(np.uint8) * 255
+
+        self.mask = result.component_mask
+        self.contours, _ = cv2.findContours(self.mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        return {
+            'mask': self.mask,
+            'measurements': dict(result.measurements),
+            'contours': self.contours
+        }
     
     def calculate_measurements(self, image):
         """Calculate tumor measurements from image"""
         try:
-            # Threshold image using Otsu's method
-            _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            
-            # Find contours
-            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            if not contours:
-                return {
-                    'area_pixels': 0,
-                    'perimeter_pixels': 0,
-                    'circularity': 0
-                }
-            
-            # Get largest contour (assumed to be tumor)
-            tumor_contour = max(contours, key=cv2.contourArea)
-            
-            # Calculate metrics
-            area = cv2.contourArea(tumor_contour)
-            perimeter = cv2.arcLength(tumor_contour, True)
-            
-            # Calculate circularity (4π * area / perimeter²)
-            circularity = (4 * np.pi * area) / (perimeter * perimeter) if perimeter > 0 else 0
-            
-            self.logger.info(f"Area: {area}, Perimeter: {perimeter}, Circularity: {circularity}")
-            
-            return {
-                'area_pixels': float(area),
-                'perimeter_pixels': float(perimeter),
-                'circularity': float(circularity)
-            }
+            return dict(self.analyze(image).measurements)
             
         except Exception as e:
             self.logger.error(f"Error calculating measurements: {str(e)}")
@@ -89,18 +132,11 @@ class TumorSegmentation:
             numpy array: RGB image with colored tumor overlay
         """
         try:
-            # Threshold image using Otsu's method
-            _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            tumor_contour = self.analyze(image).contour
             
-            # Find contours
-            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            if not contours:
+            if tumor_contour is None:
                 return image
             
-            # Get largest contour (assumed to be tumor)
-            tumor_contour = max(contours, key=cv2.contourArea)
-            
             # Create RGB image from grayscale
             rgb_image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
             
@@ -0,0 +1,137 @@
+# app/utils.py
+import os
+import time
+import hashlib
+import importlib
+import threading
+import numpy as np
+
+def content_hash(*parts):
+    """Stable hex digest of numpy arrays, raw bytes and plain parameter values
+
+    Arrays contribute their dtype and shape as well as their bytes, so two
+    images with the same pixels but different layouts never collide.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(f"{part.dtype.str}{part.shape}".encode('utf-8'))
+            digest.update(np.ascontiguousarray(part).data)
+        elif isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(part)
+        else:
+            digest.update(repr(part).encode('utf-8'))
+        digest.update(b'|')
+    return digest.hexdigest()
+
+def seeded_rng(*parts):
+    """numpy Generator seeded from the content hash of `parts`
+
+    Identical inputs draw identical random streams, so results that use
+    randomness stay deterministic and safe to cache.
+    """
+    return np.random.default_rng(int(content_hash(*parts), 16))
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access
+
+    Heavy dependencies such as TensorFlow, VTK, SimpleITK, scikit-image and
+    SciPy take seconds and hundreds of MB to import, so a worker should only
+    pay for the ones its requests actually use.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        if self._module is None:
+            # The import system serializes concurrent imports of the same module
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+def lazy_import(name):
+    """Return a LazyModule for `name`, e.g. `sitk = lazy_import('SimpleITK')`"""
+    return LazyModule(name)
+
+def preload_modules(names):
+    """Import modules now and return the seconds each one took"""
+    timings = {}
+    for name in names:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+class LazyInstance:
+    """Build an object with `factory` on the first `get()`, exactly once across threads"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._instance is not None
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+def current_rss_mb():
+    """Resident set size of this process in MB, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024.0 * 1024.0)
+
+class PeakMemory:
+    """Sample the process RSS on a thread while a block runs
+
+    `peak_mb` is the highest RSS seen above the RSS at entry. VTK and ITK
+    release the GIL in their filters, so the sampler keeps running while
+    they allocate. The RSS is process-wide: concurrent requests count too.
+
+        with PeakMemory() as memory:
+            surface.Update()
+        logger.info(f"peak +{memory.peak_mb:.1f} MB")
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.baseline_mb = None
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb() - self.baseline_mb)
+
+    def __enter__(self):
+        self.baseline_mb = current_rss_mb()
+        if self.baseline_mb is not None:
+            self.peak_mb = 0.0
+            self._thread = threading.Thread(target=self._sample, name='peak-memory', daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak_mb = max(self.peak_mb, current_rss_mb() - self.baseline_mb)
+        return False
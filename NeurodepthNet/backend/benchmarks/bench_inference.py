@@ -0,0 +1,52 @@
+# benchmarks/bench_inference.py
+"""Compare Keras model.predict against the graph-mode InferenceEngine
+
+Usage:
+    python benchmarks/bench_inference.py --model ../models/tumor_model.h5
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import numpy as np
+from app.tumor_classification import TumorClassifier
+
+def measure(fn, batch, iterations, warmup=5):
+    for _ in range(warmup):
+        fn(batch)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(batch)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+def main():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(os.path.dirname(current_dir))
+    default_model = os.path.join(project_root, 'models', 'tumor_model.h5')
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=default_model)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    args = parser.parse_args()
+
+    classifier = TumorClassifier(model_path=args.model)
+    classifier.warmup()
+
+    print(f"{'batch':>5} {'path':<16} {'p50 ms':>9} {'p99 ms':>9}")
+    for batch_size in args.batch_sizes:
+        batch = np.random.rand(batch_size, *classifier.image_size, 1).astype(np.float32)
+        paths = {
+            'model.predict': lambda x: classifier.model.predict(x, verbose=0),
+            'InferenceEngine': classifier.engine.predict,
+        }
+        for name, fn in paths.items():
+            p50, p99 = measure(fn, batch, args.iterations)
+            print(f"{batch_size:>5} {name:<16} {p50:>9.2f} {p99:>9.2f}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,112 @@
+# benchmarks/bench_mesh_enhancer.py
+"""Time vectorized MeshEnhancer against the original per-face/per-vertex loops
+
+Both versions run from the same seed on marching-cubes spheres of doubling
+radius; the script reports timings and the largest absolute difference
+between outputs.
+
+Usage:
+    python benchmarks/bench_mesh_enhancer.py --max-faces 500000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import numpy as np
+from skimage import measure
+from app.mesh_enhancer import MeshEnhancer
+
+# The per-face/per-vertex loops MeshEnhancer replaced; tests/test_mesh_enhancer.py
+# checks the vectorized versions against these
+def reference_spikes(vertices, faces, base_intensity=5.0, rng=None):
+    vertex_normals = np.zeros_like(vertices)
+    weights = np.zeros(len(vertices))
+    for face in faces:
+        v0, v1, v2 = vertices[face]
+        normal = np.cross(v1 - v0, v2 - v0)
+        length = np.linalg.norm(normal)
+        if length > 0:
+            normal = normal / length
+            weight = rng.uniform(1.5, 3.0)
+            vertex_normals[face] += normal * weight
+            weights[face] += weight
+    mask = weights > 0
+    vertex_normals[mask] /= weights[mask, np.newaxis]
+
+    spike_factors = np.zeros(len(vertices))
+    for i in range(len(vertices)):
+        height_factor = np.cos(vertices[i, 1] * 0.3) * 2
+        radial_factor = np.sin(np.arctan2(vertices[i, 0], vertices[i, 2]) * 3)
+        random_factor = rng.uniform(0.8, 2.0)
+        spike_factors[i] = (height_factor + radial_factor + random_factor) * base_intensity
+
+    enhanced_vertices = vertices.copy()
+    enhanced_vertices += vertex_normals * spike_factors[:, np.newaxis] * base_intensity
+    return enhanced_vertices
+
+def reference_features(vertices, faces, rng=None):
+    edges = set()
+    for face in faces:
+        for i in range(3):
+            edges.add(tuple(sorted([face[i], face[(i + 1) % 3]])))
+    edge_vertices = set()
+    for edge in edges:
+        edge_vertices.update(edge)
+
+    enhanced_vertices = vertices.copy()
+    for i in range(len(vertices)):
+        if i in edge_vertices:
+            factor = rng.uniform(1.5, 2.5)
+            enhanced_vertices[i] += (vertices[i] - np.mean(vertices, axis=0)) * factor
+        else:
+            factor = rng.uniform(0.8, 1.2)
+            enhanced_vertices[i] *= factor
+    return enhanced_vertices
+
+def sphere_mesh(radius):
+    """Marching-cubes sphere; face count grows with radius squared"""
+    size = 2 * radius + 5
+    grid = np.indices((size, size, size)) - size // 2
+    volume = (np.sqrt((grid ** 2).sum(axis=0)) <= radius).astype(np.float32)
+    vertices, faces, _, _ = measure.marching_cubes(volume, level=0.5)
+    return vertices.astype(float), faces
+
+def timed(fn, seed, *args):
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    result = fn(*args, rng=rng)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-faces', type=int, default=200000)
+    parser.add_argument('--reference-max-faces', type=int, default=50000,
+                        help="Skip the slow loop versions above this size")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'faces':>8} {'function':<24} {'loop s':>8} {'vector s':>9} {'speedup':>8} {'max diff':>10}")
+    radius = 8
+    while True:
+        vertices, faces = sphere_mesh(radius)
+        if len(faces) > args.max_faces:
+            break
+        cases = [
+            ('create_dramatic_spikes', MeshEnhancer.create_dramatic_spikes, reference_spikes),
+            ('enhance_features', MeshEnhancer.enhance_features, reference_features),
+        ]
+        for name, fast_fn, slow_fn in cases:
+            fast, fast_s = timed(fast_fn, args.seed, vertices, faces)
+            if len(faces) <= args.reference_max_faces:
+                slow, slow_s = timed(slow_fn, args.seed, vertices, faces)
+                diff = float(np.max(np.abs(fast - slow)))
+                print(f"{len(faces):>8} {name:<24} {slow_s:>8.3f} {fast_s:>9.4f} "
+                      f"{slow_s / fast_s:>7.0f}x {diff:>10.2e}")
+            else:
+                print(f"{len(faces):>8} {name:<24} {'-':>8} {fast_s:>9.4f} {'-':>8} {'-':>10}")
+        radius *= 2
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,134 @@
+# benchmarks/bench_process_volume.py
+"""Peak memory and time of /api/process-volume for a large slice upload
+
+A multipart body with `--slices` synthetic PNG slices is written to a
+temporary file once. Each measurement then runs in a fresh interpreter
+that streams the file as the request body:
+    ingest-buffered  request.files + decode of every upload at once (the old path)
+    ingest-stream    iter_multipart_files + SliceIngestor.ingest_stream
+    endpoint         the full /api/process-volume request, mesh as ?mesh_format=bin
+Peak RSS is reported above the RSS the worker had before the request, with
+the reconstruction libraries already imported.
+
+Usage:
+    python benchmarks/bench_process_volume.py
+    python benchmarks/bench_process_volume.py --slices 500 --size 512
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import resource
+import subprocess
+import tempfile
+import time
+import numpy as np
+
+BOUNDARY = 'neurodepth-bench-boundary'
+MODES = ('ingest-buffered', 'ingest-stream', 'endpoint')
+
+def current_rss_mb():
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024.0 * 1024.0)
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def write_upload(path, num_slices, size, seed=0):
+    """Multipart body of low-noise slices with a bright sphere in the middle third"""
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[:size, :size]
+    radius = size / 4
+    with open(path, 'wb') as f:
+        for z in range(num_slices):
+            image = rng.normal(60, 3, size=(size, size))
+            dz = (z - num_slices / 2) / (num_slices / 6) * radius
+            r2 = radius ** 2 - dz ** 2
+            if r2 > 0:
+                image[(yy - size / 2) ** 2 + (xx - size / 2) ** 2 < r2] += 120
+            png = cv2.imencode('.png', np.clip(image, 0, 255).astype(np.uint8))[1].tobytes()
+            f.write(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="images"; '
+                    f'filename="{z:04d}.png"\r\nContent-Type: image/png\r\n\r\n'.encode('utf-8'))
+            f.write(png)
+            f.write(b'\r\n')
+        f.write(f'--{BOUNDARY}--\r\n'.encode('utf-8'))
+
+def run_worker(mode, path):
+    content_type = f'multipart/form-data; boundary={BOUNDARY}'
+    size = os.path.getsize(path)
+    report = {}
+
+    if mode == 'endpoint':
+        from flask import Flask
+        from app.routes import setup_routes
+        from app.utils import preload_modules
+        app = Flask(__name__)
+        setup_routes(app)
+        client = app.test_client()
+        # Keep the one-off cost of the lazy imports out of the request's peak
+        preload_modules(['vtk', 'vtkmodules.util.numpy_support', 'SimpleITK'])
+    else:
+        from werkzeug.formparser import parse_form_data
+        from app.slice_ingest import get_ingestor, iter_multipart_files
+        get_ingestor()
+
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        if mode == 'endpoint':
+            response = client.post('/api/process-volume?mesh_format=bin', input_stream=f,
+                                   content_type=content_type, content_length=size)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            report['mesh_bytes'] = len(response.data)
+        elif mode == 'ingest-stream':
+            volume, valid = get_ingestor().ingest_stream(iter_multipart_files(f, content_type, 'images'))
+            report['volume_shape'] = list(volume.shape)
+        else:
+            _, _, files = parse_form_data({'wsgi.input': f, 'CONTENT_TYPE': content_type,
+                                           'CONTENT_LENGTH': str(size), 'REQUEST_METHOD': 'POST'})
+            uploads = [file.read() for file in files.getlist('images')]
+            volume, valid = get_ingestor().decode(uploads)
+            report['volume_shape'] = list(volume.shape)
+
+    report['seconds'] = time.perf_counter() - start
+    report['peak_mb'] = peak_rss_mb() - baseline
+    print(json.dumps(report))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--slices', type=int, default=500)
+    parser.add_argument('--size', type=int, default=512)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--worker', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'upload.bin')
+        write_upload(path, args.slices, args.size)
+        upload_mb = os.path.getsize(path) / (1024.0 * 1024.0)
+        volume_mb = args.slices * args.size * args.size / (1024.0 * 1024.0)
+        print(f"{args.slices} slices of {args.size}x{args.size}: upload {upload_mb:.1f} MB, "
+              f"volume {volume_mb:.1f} MB")
+
+        print(f"{'mode':<16} {'seconds':>8} {'peak +MB':>9}")
+        for mode in args.modes:
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', mode, path],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{mode}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+                continue
+            report = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{mode:<16} {report['seconds']:>8.2f} {report['peak_mb']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/bench_slab_segmentation.py
+"""Peak memory and time of whole-volume versus slab-by-slab segmentation
+
+A synthetic (--slices, --size, --size) uint8 volume, bright noise around
+a dark sphere, is written to a file once. Each measurement then runs in a
+fresh interpreter:
+    in-memory  np.fromfile + create_volume_from_slices + segment_tumor_3d
+    slabs      np.memmap of the file + segment_slices with --slab-slices
+Peak RSS is reported above the worker's RSS before it loaded the volume,
+with SimpleITK already imported. It counts the resident pages of mapped
+files, which the kernel can drop again, so the anonymous memory (resident
+minus file-backed) is sampled as well. Both modes must give the same voxel
+count.
+
+Usage:
+    python benchmarks/bench_slab_segmentation.py
+    python benchmarks/bench_slab_segmentation.py --slices 400 --size 512 --slab-slices 32
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+import numpy as np
+
+MODES = ('in-memory', 'slabs')
+
+def current_rss_mb(anonymous=False):
+    with open('/proc/self/statm') as f:
+        fields = f.read().split()
+    pages = int(fields[1]) - (int(fields[2]) if anonymous else 0)
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024.0 * 1024.0)
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def write_volume(path, num_slices, size, seed=0):
+    """Bright noisy slices with a dark sphere in the middle third, written one by one"""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[:size, :size]
+    radius = size / 4
+    with open(path, 'wb') as f:
+        for z in range(num_slices):
+            image = rng.normal(180, 10, size=(size, size))
+            dz = (z - num_slices / 2) / (num_slices / 6) * radius
+            r2 = radius ** 2 - dz ** 2
+            if r2 > 0:
+                image[(yy - size / 2) ** 2 + (xx - size / 2) ** 2 < r2] -= 120
+            np.clip(image, 0, 255).astype(np.uint8).tofile(f)
+
+def run_worker(mode, path, shape, slab_slices):
+    import SimpleITK as sitk
+    from app.reconstruction import VolumeReconstructor
+
+    baseline, anon_baseline = current_rss_mb(), current_rss_mb(anonymous=True)
+    anon_peak, done = [anon_baseline], threading.Event()
+
+    def sample():
+        while not done.wait(0.005):
+            anon_peak[0] = max(anon_peak[0], current_rss_mb(anonymous=True))
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    if mode == 'slabs':
+        slices = np.memmap(path, dtype=np.uint8, mode='r', shape=shape)
+        mask = VolumeReconstructor(slab_slices=slab_slices).segment_slices(slices)
+    else:
+        slices = np.fromfile(path, dtype=np.uint8).reshape(shape)
+        reconstructor = VolumeReconstructor()
+        volume = reconstructor.create_volume_from_slices(slices)
+        del slices
+        mask = reconstructor.segment_tumor_3d(volume)
+    seconds = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    voxels = int(sitk.GetArrayViewFromImage(mask).sum(dtype=np.int64))
+    print(json.dumps({'seconds': seconds, 'peak_mb': peak_rss_mb() - baseline,
+                      'anon_peak_mb': anon_peak[0] - anon_baseline, 'voxels': voxels}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--slices', type=int, default=256)
+    parser.add_argument('--size', type=int, default=512)
+    parser.add_argument('--slab-slices', type=int, default=32)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--worker', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    shape = (args.slices, args.size, args.size)
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], shape, args.slab_slices)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'volume.raw')
+        write_volume(path, args.slices, args.size)
+        print(f"{args.slices} slices of {args.size}x{args.size}: volume "
+              f"{os.path.getsize(path) / (1024.0 * 1024.0):.1f} MB, slabs of {args.slab_slices}")
+
+        print(f"{'mode':<10} {'seconds':>8} {'peak +MB':>9} {'anon +MB':>9} {'voxels':>10}")
+        for mode in args.modes:
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', mode, path,
+                                   '--slices', str(args.slices), '--size', str(args.size),
+                                   '--slab-slices', str(args.slab_slices)],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{mode}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+                continue
+            report = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{mode:<10} {report['seconds']:>8.2f} {report['peak_mb']:>9.1f} "
+                  f"{report['anon_peak_mb']:>9.1f} {report['voxels']:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_startup.py
+"""Worker startup time and memory, per module and per NEURODEPTH_PRELOAD mode
+
+Every measurement runs in a fresh interpreter. The first table lists the
+import time of each heavy dependency, and the RSS it adds, in isolation.
+The second table times `setup_routes` for each preload mode and then the
+first /api/enhance request (cv2 only) and the first /api/classify request
+(loads the model). It also shows the RSS after each step.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --modes none modules
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import argparse
+import base64
+import importlib
+import json
+import subprocess
+import time
+import numpy as np
+
+MODULES = ('cv2', 'flask', 'tensorflow', 'vtk', 'SimpleITK', 'skimage.measure', 'scipy.ndimage',
+           'app.routes')
+MODES = ('none', 'modules', 'all')
+
+def current_rss_mb():
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024.0 * 1024.0)
+
+def sample_image_bytes(seed=0):
+    import cv2
+
+    image = np.random.default_rng(seed).integers(0, 256, size=(512, 512), dtype=np.uint8)
+    return cv2.imencode('.png', image)[1].tobytes()
+
+def run_import_worker(name):
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    importlib.import_module(name)
+    print(json.dumps({
+        'import_s': time.perf_counter() - start,
+        'rss_mb': current_rss_mb() - rss_before,
+    }))
+
+def run_app_worker(mode):
+    os.environ['NEURODEPTH_PRELOAD'] = mode
+    report = {}
+
+    start = time.perf_counter()
+    from flask import Flask
+    from app.routes import setup_routes
+    app = Flask(__name__)
+    setup_routes(app)
+    report['setup_s'] = time.perf_counter() - start
+    report['setup_rss_mb'] = current_rss_mb()
+
+    client = app.test_client()
+    image_bytes = sample_image_bytes()
+
+    start = time.perf_counter()
+    response = client.post('/api/enhance', json={
+        'image': base64.b64encode(image_bytes).decode('utf-8'),
+        'params': {'claheClipLimit': 2.0, 'bilateralSigma': 75, 'edgeThreshold': 200}
+    })
+    report['enhance_ms'] = (time.perf_counter() - start) * 1000.0
+    report['enhance_rss_mb'] = current_rss_mb()
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    start = time.perf_counter()
+    response = client.post('/api/classify', data={'image': (io.BytesIO(image_bytes), 'slice.png')},
+                           content_type='multipart/form-data')
+    report['classify_ms'] = (time.perf_counter() - start) * 1000.0
+    report['classify_rss_mb'] = current_rss_mb()
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    print(json.dumps(report))
+
+def run_subprocess(*worker_args):
+    cmd = [sys.executable, os.path.abspath(__file__), '--worker', *worker_args]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(f"{' '.join(worker_args)}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=list(MODULES))
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--worker', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        kind, name = args.worker
+        if kind == 'import':
+            run_import_worker(name)
+        else:
+            run_app_worker(name)
+        return
+
+    print(f"{'module':<18} {'import s':>9} {'+RSS MB':>9}")
+    for name in args.modules:
+        report = run_subprocess('import', name)
+        if report is not None:
+            print(f"{name:<18} {report['import_s']:>9.2f} {report['rss_mb']:>9.1f}")
+
+    print(f"\n{'preload':<8} {'setup s':>8} {'RSS MB':>8} {'enhance ms':>11} {'RSS MB':>8} "
+          f"{'classify ms':>12} {'RSS MB':>8}")
+    for mode in args.modes:
+        report = run_subprocess('app', mode)
+        if report is not None:
+            print(f"{mode:<8} {report['setup_s']:>8.2f} {report['setup_rss_mb']:>8.1f} "
+                  f"{report['enhance_ms']:>11.1f} {report['enhance_rss_mb']:>8.1f} "
+                  f"{report['classify_ms']:>12.1f} {report['classify_rss_mb']:>8.1f}")
+
+if __name__ == "__main__":
+    main()
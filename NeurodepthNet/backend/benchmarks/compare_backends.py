@@ -0,0 +1,124 @@
+# benchmarks/compare_backends.py
+"""Check exported classifier backends against the Keras reference
+
+Every backend runs in its own subprocess so that import time and peak RSS
+are not polluted by the others. A backend passes when it predicts the same
+class as Keras on every reference image and its probabilities stay within
+the tolerance:
+    tflite, onnx            max |p - p_keras| <= 1e-4
+    tflite-int8, onnx-int8  max |p - p_keras| <= 2e-2
+
+Usage:
+    python -m app.model_export --formats tflite onnx
+    python benchmarks/compare_backends.py --images ../data/testing/glioma
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import resource
+import subprocess
+import time
+import numpy as np
+
+TOLERANCES = {
+    'keras': 0.0,
+    'tflite': 1e-4,
+    'onnx': 1e-4,
+    'tflite-int8': 2e-2,
+    'onnx-int8': 2e-2,
+}
+
+def load_reference_images(image_dir, limit, seed=0):
+    import cv2
+
+    if image_dir:
+        names = sorted(n for n in os.listdir(image_dir) if n.lower().endswith(('.png', '.jpg', '.jpeg')))
+        images = [cv2.imread(os.path.join(image_dir, n), cv2.IMREAD_GRAYSCALE) for n in names[:limit]]
+        return [img for img in images if img is not None]
+
+    # Without a reference set fall back to deterministic synthetic slices
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, size=(256, 256), dtype=np.uint8) for _ in range(limit)]
+
+def run_worker(args):
+    """Load one backend, classify the reference set and print a JSON report"""
+    start = time.perf_counter()
+    from app.tumor_classification import TumorClassifier
+    classifier = TumorClassifier(model_path=args.model, backend=args.worker)
+    load_s = time.perf_counter() - start
+
+    images = load_reference_images(args.images, args.limit)
+    batch = np.concatenate([classifier.preprocess_image(img) for img in images], axis=0)
+    classifier.warmup()
+
+    latencies = []
+    for i in range(len(batch)):
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            classifier.engine.predict(batch[i:i + 1])
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    probabilities = classifier.engine.predict(batch)
+    print(json.dumps({
+        'probabilities': probabilities.tolist(),
+        'load_s': load_s,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    }))
+
+def main():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(os.path.dirname(current_dir))
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=os.path.join(project_root, 'models', 'tumor_model.h5'))
+    parser.add_argument('--images', default=None, help="Directory of reference images")
+    parser.add_argument('--limit', type=int, default=32)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--backends', nargs='+', default=list(TOLERANCES))
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    reports = {}
+    for backend in ['keras'] + [b for b in args.backends if b != 'keras']:
+        cmd = [sys.executable, os.path.abspath(__file__), '--worker', backend,
+               '--model', args.model, '--limit', str(args.limit), '--repeat', str(args.repeat)]
+        if args.images:
+            cmd += ['--images', args.images]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{backend}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+            continue
+        reports[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    if 'keras' not in reports:
+        print("Keras reference backend failed, nothing to compare")
+        sys.exit(1)
+
+    reference = np.array(reports['keras']['probabilities'])
+    print(f"{'backend':<12} {'same class':>10} {'max diff':>10} {'tol':>8} {'load s':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>8}")
+    failed = False
+    for backend, report in reports.items():
+        probabilities = np.array(report['probabilities'])
+        same_class = np.mean(np.argmax(probabilities, axis=1) == np.argmax(reference, axis=1))
+        max_diff = float(np.max(np.abs(probabilities - reference)))
+        ok = same_class == 1.0 and max_diff <= TOLERANCES[backend]
+        failed = failed or not ok
+        print(f"{backend:<12} {same_class:>10.0%} {max_diff:>10.2e} {TOLERANCES[backend]:>8.0e} "
+              f"{report['load_s']:>8.2f} {report['p50_ms']:>8.2f} {report['p99_ms']:>8.2f} "
+              f"{report['peak_rss_mb']:>8.1f}{'' if ok else '  FAIL'}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
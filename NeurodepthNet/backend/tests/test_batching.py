@@ -0,0 +1,92 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+import unittest
+import numpy as np
+from app.batching import MicroBatcher
+
+class TestMicroBatcher(unittest.TestCase):
+    def setUp(self):
+        self.batch_sizes = []
+
+        def predict(batch):
+            self.batch_sizes.append(len(batch))
+            return batch.reshape(len(batch), -1).sum(axis=1, keepdims=True)
+
+        self.batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=50)
+
+    def tearDown(self):
+        self.batcher.close()
+
+    def test_single_request(self):
+        """A lone request is served once the wait window expires"""
+        result = self.batcher.submit(np.full((2, 2), 3.0))
+        self.assertEqual(float(result[0]), 12.0)
+        self.assertEqual(self.batch_sizes, [1])
+
+    def test_concurrent_requests_are_batched(self):
+        """Requests from several threads share forward passes and keep their own results"""
+        results = {}
+
+        def worker(i):
+            results[i] = float(self.batcher.submit(np.full((2, 2), float(i)))[0])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, {i: 4.0 * i for i in range(20)})
+        self.assertEqual(sum(self.batch_sizes), 20)
+        self.assertLess(len(self.batch_sizes), 20)
+        self.assertTrue(all(size <= 8 for size in self.batch_sizes))
+
+    def test_errors_propagate_to_callers(self):
+        """A failing forward pass is raised in every waiting caller"""
+        def fail(batch):
+            raise RuntimeError("boom")
+
+        batcher = MicroBatcher(fail, max_batch_size=4, max_wait_ms=1)
+        try:
+            with self.assertRaises(RuntimeError):
+                batcher.submit(np.zeros((2, 2)))
+        finally:
+            batcher.close()
+
+    def test_short_prediction_fails_every_caller(self):
+        """A forward pass returning too few rows fails the whole batch instead of hanging"""
+        batcher = MicroBatcher(lambda batch: batch.sum(axis=(1, 2))[:-1], max_batch_size=4, max_wait_ms=50)
+        try:
+            futures = [batcher.submit_async(np.ones((2, 2))) for _ in range(3)]
+            for future in futures:
+                with self.assertRaises(RuntimeError):
+                    future.result(timeout=2)
+        finally:
+            batcher.close()
+
+    def test_close_during_submit(self):
+        """A request being queued while close() starts is still served"""
+        batcher = MicroBatcher(lambda batch: batch.sum(axis=(1, 2)), max_batch_size=4, max_wait_ms=0)
+        put = batcher._queue.put
+        closing = threading.Thread(target=batcher.close)
+
+        def slow_put(entry):
+            if entry is not None:
+                # Give close() the chance to run between the closed check and the put
+                closing.start()
+                time.sleep(0.05)
+            put(entry)
+
+        batcher._queue.put = slow_put
+        future = batcher.submit_async(np.ones((2, 2)))
+        closing.join()
+        self.assertEqual(float(future.result(timeout=1)), 4.0)
+        with self.assertRaises(RuntimeError):
+            batcher.submit_async(np.ones((2, 2)))
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
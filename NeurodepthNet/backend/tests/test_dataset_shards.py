@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import unittest
+import numpy as np
+import cv2
+from app.data_loader import DataLoader
+from app.dataset_shards import ShardBuilder, ShardDataset, current_shards, default_shard_dir
+
+class TestDatasetShards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self.tmp.name
+        self.classes = ['no_tumor', 'tumor']
+        for class_idx, class_name in enumerate(self.classes):
+            os.makedirs(os.path.join(self.data_dir, class_name))
+            for i in range(3):
+                self.write(class_name, f"{i}.png", 40 * class_idx + i)
+        self.builder = ShardBuilder(self.data_dir, self.classes, image_size=(32, 32))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, class_name, filename, value):
+        image = np.full((48, 40), value, dtype=np.uint8)
+        cv2.imwrite(os.path.join(self.data_dir, class_name, filename), image)
+
+    def test_build_and_memmap_load(self):
+        """A first build shards every image and loads back as zero-copy memmaps"""
+        self.assertEqual(self.builder.build()['added'], 6)
+
+        images, labels = ShardDataset(default_shard_dir(self.data_dir)).arrays()
+        self.assertIsInstance(images, np.memmap)
+        self.assertEqual(images.shape, (6, 32, 32))
+        self.assertEqual(sorted(labels.tolist()), [0, 0, 0, 1, 1, 1])
+        self.assertEqual(sorted(images[:, 0, 0].tolist()), [0, 1, 2, 40, 41, 42])
+
+    def test_incremental_rebuild(self):
+        """Only new or changed files are decoded again; deleted files drop out"""
+        self.builder.build()
+        self.write('tumor', '0.png', 99)
+        self.write('tumor', 'new.png', 77)
+        os.remove(os.path.join(self.data_dir, 'no_tumor', '2.png'))
+
+        stats = self.builder.build()
+        self.assertEqual((stats['added'], stats['unchanged'], stats['removed']), (2, 4, 1))
+
+        images, labels = ShardDataset(default_shard_dir(self.data_dir)).arrays()
+        self.assertEqual(len(images), 6)
+        self.assertEqual(sorted(images[:, 0, 0].tolist()), [0, 1, 41, 42, 77, 99])
+
+    def test_is_current(self):
+        """Added, changed or removed source files make the shards stale; touching one does not"""
+        self.assertFalse(self.builder.is_current())
+        self.builder.build()
+        self.assertTrue(self.builder.is_current())
+
+        path = os.path.join(self.data_dir, 'tumor', '1.png')
+        os.utime(path, ns=(0, 0))
+        self.assertTrue(self.builder.is_current())
+        self.write('tumor', '1.png', 200)
+        self.assertFalse(self.builder.is_current())
+        self.builder.build()
+        os.remove(path)
+        self.assertFalse(self.builder.is_current())
+
+    def test_noop_rebuild(self):
+        self.builder.build()
+        self.assertEqual(self.builder.build()['added'], 0)
+
+    def test_current_shards_updates_stale(self):
+        """Changed source files are sharded before the shards are handed out"""
+        self.assertIsNone(current_shards(self.data_dir, self.classes, (32, 32)))
+        self.builder.build()
+        self.write('tumor', '0.png', 99)
+
+        images, _ = current_shards(self.data_dir, self.classes, (32, 32)).arrays()
+        self.assertEqual(sorted(images[:, 0, 0].tolist()), [0, 1, 2, 41, 42, 99])
+        self.assertTrue(self.builder.is_current())
+
+    def test_data_loader_reads_current_shards(self):
+        """DataLoader never serves images from shards older than the files"""
+        loader = DataLoader(self.data_dir)
+        loader.build_shards()
+        os.remove(os.path.join(self.data_dir, 'no_tumor', '2.png'))
+        self.write('tumor', '1.png', 77)
+
+        images, labels = loader.load_dataset()
+        self.assertEqual(images.shape, (5, 224, 224))
+        self.assertEqual(sorted(zip(images[:, 0, 0].tolist(), labels.tolist())),
+                         [(0, 0), (1, 0), (40, 1), (42, 1), (77, 1)])
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
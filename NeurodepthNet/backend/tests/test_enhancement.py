@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import numpy as np
+import cv2
+import threading
+from app.enhancement import EnhancementEngine, EnhancementSessions, pyramid_level
+
+class TestEnhancementEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = EnhancementEngine(max_workers=4, strip_rows=64)
+        rng = np.random.default_rng(0)
+        self.image = cv2.GaussianBlur(rng.integers(0, 256, size=(300, 200), dtype=np.uint8), (0, 0), 2)
+
+    def tearDown(self):
+        self.engine.shutdown()
+
+    def test_matches_single_pass_pipeline(self):
+        """Strip-parallel output equals CLAHE, bilateral and Canny on the whole image"""
+        result = self.engine.enhance(self.image, clip_limit=2.0, sigma=75, threshold=200)
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(self.image)
+        filtered = cv2.bilateralFilter(clahe, 9, 75, 75)
+        np.testing.assert_array_equal(result['clahe'], clahe)
+        np.testing.assert_array_equal(result['filtered'], filtered)
+        np.testing.assert_array_equal(result['edges'], cv2.Canny(filtered, 100, 200))
+        self.assertEqual(result['scale'], 1.0)
+
+    def test_threshold_change_reuses_earlier_stages(self):
+        """Only the Canny stage is recomputed when only the threshold changes"""
+        first = self.engine.enhance(self.image, threshold=200)
+        misses = self.engine.cache.stats()['misses']
+        second = self.engine.enhance(self.image, threshold=120)
+        self.assertIs(second['clahe'], first['clahe'])
+        self.assertIs(second['filtered'], first['filtered'])
+        self.assertEqual(self.engine.cache.stats()['misses'], misses + 1)
+
+    def test_preview_level(self):
+        """A preview runs on the pyramid level that fits max_side"""
+        self.assertEqual(pyramid_level((300, 200), None), 0)
+        self.assertEqual(pyramid_level((300, 200), 100), 2)
+        result = self.engine.enhance(self.image, max_side=160)
+        self.assertEqual(result['edges'].shape, (150, 100))
+        self.assertEqual(result['scale'], 0.5)
+
+    def test_clahe_objects_are_reused_per_thread(self):
+        """A thread reuses its CLAHE object per clip limit; other threads get their own"""
+        first = self.engine.clahe_filter(2.0)
+        self.assertIs(self.engine.clahe_filter(2.0), first)
+        self.assertIsNot(self.engine.clahe_filter(3.0), first)
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.engine.clahe_filter(2.0)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], first)
+
+class TestEnhancementSessions(unittest.TestCase):
+    def setUp(self):
+        self.image = np.zeros((8, 8), dtype=np.uint8)
+
+    def test_lru_eviction(self):
+        """The least recently used session is dropped beyond max_sessions"""
+        sessions = EnhancementSessions(max_sessions=2)
+        first = sessions.create(self.image)
+        second = sessions.create(self.image)
+        sessions.get(first.id)
+        sessions.create(self.image)
+        self.assertIs(sessions.get(first.id), first)
+        self.assertIsNone(sessions.get(second.id))
+        self.assertEqual(len(sessions), 2)
+
+    def test_expiry_and_close(self):
+        """Idle sessions expire after ttl and can be closed explicitly"""
+        sessions = EnhancementSessions(ttl=0)
+        self.assertIsNone(sessions.get(sessions.create(self.image).id))
+
+        sessions = EnhancementSessions()
+        session = sessions.create(self.image)
+        self.assertFalse(session.image.flags.writeable)
+        self.assertTrue(sessions.close(session.id))
+        self.assertFalse(sessions.close(session.id))
+
+if __name__ == '__main__':
+    unittest.main()
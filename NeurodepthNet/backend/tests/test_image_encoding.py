@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import json
+import unittest
+import numpy as np
+import cv2
+from werkzeug.formparser import parse_form_data
+from app.image_encoding import ImageEncoder, build_multipart
+
+class TestImageEncoding(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = cv2.GaussianBlur(rng.integers(0, 256, size=(128, 128), dtype=np.uint8), (0, 0), 2)
+
+    def decode(self, encoded):
+        return cv2.imdecode(np.frombuffer(encoded.data, np.uint8), cv2.IMREAD_UNCHANGED)
+
+    def test_png_is_lossless_at_every_level(self):
+        """PNG levels change size and speed, never pixels"""
+        fast = ImageEncoder(png_level=0).encode(self.image)
+        small = ImageEncoder(png_level=9).encode(self.image)
+        np.testing.assert_array_equal(self.decode(fast), self.image)
+        np.testing.assert_array_equal(self.decode(small), self.image)
+        self.assertLess(len(small.data), len(fast.data))
+        self.assertEqual(fast.content_type, 'image/png')
+        self.assertGreaterEqual(fast.encode_ms, 0.0)
+
+    def test_lossy_formats_and_cache_params(self):
+        """WebP/JPEG encode with their quality, which is part of the cache key"""
+        for fmt, mime in (('webp', 'image/webp'), ('jpeg', 'image/jpeg')):
+            encoder = ImageEncoder(fmt=fmt, quality=70)
+            encoded = encoder.encode(self.image)
+            self.assertEqual(encoded.content_type, mime)
+            self.assertEqual(self.decode(encoded).shape[:2], self.image.shape)
+            self.assertEqual(encoder.cache_params(), {'image_format': fmt, 'quality': 70})
+        with self.assertRaises(ValueError):
+            ImageEncoder(fmt='gif')
+        with self.assertRaises(ValueError):
+            ImageEncoder(png_level=10)
+
+    def test_encode_many_keeps_names_and_order(self):
+        """Images encoded in parallel come back under their names, None stays None"""
+        encoded = ImageEncoder().encode_many({'a': self.image, 'b': None, 'c': self.image.T.copy()})
+        self.assertEqual(list(encoded), ['a', 'b', 'c'])
+        self.assertIsNone(encoded['b'])
+        np.testing.assert_array_equal(self.decode(encoded['c']), self.image.T)
+
+    def test_multipart_round_trip(self):
+        """The multipart body parses as a form with the metadata and raw image parts"""
+        images = ImageEncoder().encode_many({'clahe': self.image, 'edges': self.image})
+        body, content_type = build_multipart({'scale': 0.5}, images)
+        _, form, files = parse_form_data({
+            'wsgi.input': io.BytesIO(body),
+            'CONTENT_TYPE': content_type,
+            'CONTENT_LENGTH': str(len(body)),
+            'REQUEST_METHOD': 'POST'
+        })
+        self.assertEqual(json.loads(form['metadata']), {'scale': 0.5})
+        self.assertEqual(sorted(files), ['clahe', 'edges'])
+        self.assertEqual(files['clahe'].read(), images['clahe'].data)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+import unittest
+from app.jobs import JobManager, JobQueueFull
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = JobManager(max_workers=1, max_pending=2, result_ttl=60)
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def test_progress_events_and_result(self):
+        """Streams see every stage in order and the job ends with its result"""
+        def pipeline(progress, value):
+            for stage in ('decode', 'classify', 'segment', 'mesh'):
+                progress(stage)
+            return value * 2
+
+        job = self.manager.submit(pipeline, 21)
+        stages = [event['stage'] for event in self.manager.stream_events(job) if event]
+
+        self.assertEqual(stages, ['queued', 'decode', 'classify', 'segment', 'mesh', 'done'])
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(self.manager.get(job.id).result, 42)
+
+    def test_failure_is_recorded(self):
+        def pipeline(progress):
+            progress('decode')
+            raise ValueError("No valid images provided")
+
+        job = self.manager.submit(pipeline)
+        events = [event for event in self.manager.stream_events(job) if event]
+
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error, "No valid images provided")
+        self.assertEqual(events[-1]['status'], 'failed')
+
+    def test_pending_limit(self):
+        """Submissions beyond max_pending are rejected"""
+        release = threading.Event()
+        blocked = lambda progress: release.wait(5)
+        self.manager.submit(blocked)
+        self.manager.submit(blocked)
+        try:
+            with self.assertRaises(JobQueueFull):
+                self.manager.submit(blocked)
+        finally:
+            release.set()
+
+    def test_finished_jobs_expire(self):
+        manager = JobManager(result_ttl=0)
+        try:
+            job = manager.submit(lambda progress: None)
+            list(manager.stream_events(job))
+            time.sleep(0.01)
+            self.assertIsNone(manager.get(job.id))
+        finally:
+            manager.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
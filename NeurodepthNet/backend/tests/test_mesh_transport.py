@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import struct
+import unittest
+import numpy as np
+from app.mesh_transport import pack_mesh, unpack_mesh, pack_glb
+
+class TestMeshTransport(unittest.TestCase):
+    def setUp(self):
+        self.vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=np.float64)
+        self.faces = np.array([[0, 1, 2], [0, 1, 3], [0, 2, 3], [1, 2, 3]], dtype=np.int64)
+
+    def test_bin_round_trip(self):
+        """Packed meshes decode to float32 vertices, uint32 faces and the metadata"""
+        data = pack_mesh(self.vertices, self.faces, {'metrics': {'volume_mm3': 1.5}})
+        vertices, faces, metadata = unpack_mesh(data)
+
+        self.assertEqual(vertices.dtype, np.float32)
+        self.assertEqual(faces.dtype, np.uint32)
+        np.testing.assert_array_equal(vertices, self.vertices)
+        np.testing.assert_array_equal(faces, self.faces)
+        self.assertEqual(metadata, {'metrics': {'volume_mm3': 1.5}})
+
+    def test_bin_rejects_foreign_data(self):
+        with self.assertRaises(ValueError):
+            unpack_mesh(b'\x00' * 32)
+
+    def test_glb_layout(self):
+        """GLB output has a valid header, 4-byte aligned chunks and matching accessors"""
+        data = pack_glb(self.vertices, self.faces, {'spacing': [1.0, 1.0, 3.0]})
+        magic, version, length = struct.unpack_from('<4sII', data, 0)
+        self.assertEqual((magic, version, length), (b'glTF', 2, len(data)))
+
+        json_length, json_type = struct.unpack_from('<I4s', data, 12)
+        self.assertEqual(json_type, b'JSON')
+        self.assertEqual(json_length % 4, 0)
+        gltf = json.loads(data[20:20 + json_length])
+        self.assertEqual(gltf['accessors'][0]['count'], 4)
+        self.assertEqual(gltf['accessors'][1]['count'], 12)
+        self.assertEqual(gltf['asset']['extras'], {'spacing': [1.0, 1.0, 3.0]})
+
+        bin_length, bin_type = struct.unpack_from('<I4s', data, 20 + json_length)
+        self.assertEqual(bin_type, b'BIN\x00')
+        start = 28 + json_length
+        faces = np.frombuffer(data, dtype=np.uint32, count=12, offset=start + 48).reshape(-1, 3)
+        np.testing.assert_array_equal(faces, self.faces)
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,98 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stat
+import tempfile
+import types
+import unittest
+from unittest import mock
+import tensorflow as tf
+from app.model_export import ModelExporter, exported_model_path, replacing
+
+class TestModelExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmp.name, 'tumor_model.h5')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_replacing_leaves_file_on_failure(self):
+        """A failed write keeps the old file and leaves no temporary behind"""
+        path = os.path.join(self.tmp.name, 'model.tflite')
+        with open(path, 'wb') as f:
+            f.write(b'old')
+        with self.assertRaises(RuntimeError):
+            with replacing(path) as tmp_path, open(tmp_path, 'wb') as f:
+                f.write(b'partial')
+                raise RuntimeError("conversion failed")
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'old')
+        self.assertEqual(os.listdir(self.tmp.name), ['model.tflite'])
+
+    def test_replacing_sets_file_mode(self):
+        """A new file gets the umask default and a replaced one keeps its mode, not mkstemp's 0600"""
+        path = os.path.join(self.tmp.name, 'model.tflite')
+        mask = os.umask(0o022)
+        try:
+            with replacing(path) as tmp_path, open(tmp_path, 'wb') as f:
+                f.write(b'new')
+        finally:
+            os.umask(mask)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o644)
+
+        os.chmod(path, 0o640)
+        with replacing(path) as tmp_path, open(tmp_path, 'wb') as f:
+            f.write(b'newer')
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o640)
+
+    def test_tflite_export_replaces_file(self):
+        """An export swaps in a new file instead of rewriting the one a server may have mapped"""
+        model = tf.keras.Sequential([tf.keras.Input(shape=(224, 224, 1)), tf.keras.layers.GlobalAveragePooling2D(),
+                                     tf.keras.layers.Dense(4, activation='softmax')])
+        model.save(self.model_path)
+        exporter = ModelExporter(self.model_path)
+        output_path = exporter.export_tflite()
+        self.assertEqual(output_path, exported_model_path(self.model_path, 'tflite'))
+        inode = os.stat(output_path).st_ino
+
+        with open(output_path, 'rb') as mapped:
+            exporter.export_tflite()
+            # The open handle still reads the complete old model
+            self.assertGreater(len(mapped.read()), 0)
+        self.assertNotEqual(os.stat(output_path).st_ino, inode)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['tumor_model.h5', 'tumor_model.tflite'])
+
+    def test_onnx_export_converts_once(self):
+        """The int8 ONNX model is quantized from the float file instead of converting again"""
+        conversions = []
+
+        def from_keras(model, input_signature, opset, output_path):
+            conversions.append(output_path)
+            with open(output_path, 'wb') as f:
+                f.write(b'onnx')
+
+        def quantize_dynamic(source, target, weight_type):
+            with open(source, 'rb') as src, open(target, 'wb') as f:
+                f.write(src.read() + b'-' + weight_type)
+
+        modules = {
+            'tf2onnx': types.SimpleNamespace(convert=types.SimpleNamespace(from_keras=from_keras)),
+            'onnxruntime': types.ModuleType('onnxruntime'),
+            'onnxruntime.quantization': types.SimpleNamespace(
+                quantize_dynamic=quantize_dynamic, QuantType=types.SimpleNamespace(QInt8=b'int8'))
+        }
+        exporter = ModelExporter(self.model_path)
+        exporter._model = object()
+        with mock.patch.dict(sys.modules, modules):
+            outputs = exporter.export(['onnx'])
+
+        self.assertEqual(len(conversions), 1)
+        self.assertEqual(outputs, [exported_model_path(self.model_path, 'onnx'),
+                                   exported_model_path(self.model_path, 'onnx-int8')])
+        with open(outputs[1], 'rb') as f:
+            self.assertEqual(f.read(), b'onnx-int8')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import numpy as np
+import SimpleITK as sitk
+from app.reconstruction import VolumeReconstructor, expand_bbox, lod_targets
+from app.surface_extraction import volume_to_vtk_image
+
+def ellipsoid_volume(shape=(24, 96, 128), center=(14, 40, 80), radii=(5, 14, 20), seed=0):
+    """Bright noisy volume with one dark ellipsoid, which Otsu marks as inside"""
+    rng = np.random.default_rng(seed)
+    z, y, x = np.mgrid[:shape[0], :shape[1], :shape[2]]
+    volume = rng.normal(180, 10, size=shape)
+    inside = sum(((axis - c) / r) ** 2 for axis, c, r in zip((z, y, x), center, radii)) < 1
+    volume[inside] = 50
+    return np.clip(volume, 0, 255).astype(np.uint8)
+
+class TestVolumeReconstructor(unittest.TestCase):
+    def setUp(self):
+        self.reconstructor = VolumeReconstructor()
+        self.volume = self.reconstructor.create_volume_from_slices(ellipsoid_volume())
+
+    def test_expand_bbox(self):
+        """Boxes grow by the margin, scale up from shrunk grids and stay inside the image"""
+        self.assertEqual(expand_bbox((2, 5, 0, 4, 4, 2), 3, (10, 10, 10)), ([0, 2, 0], [9, 8, 5]))
+        # A box that reaches the last bin of a 10 // 4 grid covers the leftover voxels
+        self.assertEqual(expand_bbox((1, 0, 0, 1, 1, 1), 0, (10, 10, 10), [4, 4, 1]), ([4, 0, 0], [6, 4, 1]))
+
+    def test_coarse_segmentation_matches_full(self):
+        """Segmenting a shrunk volume first and refining in its ROI gives the same mask"""
+        full = self.reconstructor.segment_tumor_3d(self.volume)
+        refined = self.reconstructor.segment_tumor_3d(self.volume, shrink=4)
+        self.assertEqual(refined.GetSize(), full.GetSize())
+        self.assertEqual(refined.GetOrigin(), full.GetOrigin())
+        np.testing.assert_array_equal(sitk.GetArrayViewFromImage(refined), sitk.GetArrayViewFromImage(full))
+
+    def test_slab_segmentation_matches_full(self):
+        """Stacks longer than a slab are segmented slab by slab into the same mask"""
+        full = self.reconstructor.segment_tumor_3d(self.volume)
+        slabs = VolumeReconstructor(slab_slices=5).segment_slices(ellipsoid_volume())
+        self.assertEqual(slabs.GetSpacing(), full.GetSpacing())
+        np.testing.assert_array_equal(sitk.GetArrayViewFromImage(slabs), sitk.GetArrayViewFromImage(full))
+
+    def test_cropped_mesh_matches_full_grid(self):
+        """Meshing the tumor's ROI gives the full-grid mesh in world coordinates"""
+        mask = self.reconstructor.segment_tumor_3d(self.volume)
+        cropped = self.reconstructor.generate_3d_mesh(mask, as_arrays=True)
+        self.reconstructor.roi_margin = None
+        full = self.reconstructor.generate_3d_mesh(mask, as_arrays=True)
+
+        np.testing.assert_allclose(cropped['vertices'], full['vertices'], atol=1e-4)
+        np.testing.assert_array_equal(cropped['faces'], full['faces'])
+        # x, y in pixels and z in 3 mm slices around the ellipsoid
+        low, high = cropped['vertices'].min(axis=0), cropped['vertices'].max(axis=0)
+        np.testing.assert_allclose(low, [60, 26, 9 * 3], atol=3)
+        np.testing.assert_allclose(high, [100, 54, 19 * 3], atol=3)
+
+    def test_crop_preserves_origin(self):
+        """The cropped mask starts at the physical point of its first voxel"""
+        mask = self.reconstructor.segment_tumor_3d(self.volume)
+        cropped = self.reconstructor.crop_to_tumor(mask)
+        self.assertLess(cropped.GetNumberOfPixels(), mask.GetNumberOfPixels())
+        index = mask.TransformPhysicalPointToIndex(cropped.GetOrigin())
+        self.assertEqual(cropped[0, 0, 0], mask[index])
+        self.assertEqual(index, (59, 25, 8))
+
+class TestMeshGeometry(unittest.TestCase):
+    def setUp(self):
+        self.reconstructor = VolumeReconstructor(roi_margin=None)
+        # An asymmetric box so that swapped or scrambled axes show up
+        array = np.zeros((12, 40, 60), dtype=np.uint8)
+        array[3:9, 10:20, 5:45] = 1
+        self.mask = sitk.GetImageFromArray(array)
+        self.mask.SetSpacing((0.5, 2.0, 3.0))
+        self.mask.SetOrigin((-10.0, 4.0, 100.0))
+
+    def test_vtk_image_shares_the_voxel_buffer(self):
+        """The VTK scalars point into the SimpleITK buffer in x-fastest order"""
+        view = sitk.GetArrayViewFromImage(self.mask)
+        vtk_image = volume_to_vtk_image(view, self.mask.GetSpacing(), self.mask.GetOrigin())
+        scalars = vtk_image.GetPointData().GetScalars()
+
+        self.assertEqual(int(scalars.GetVoidPointer(0).split('_')[1], 16), view.ctypes.data)
+        self.assertEqual(vtk_image.GetDimensions(), (60, 40, 12))
+        for z, y, x in [(3, 10, 5), (8, 19, 44), (9, 19, 44), (3, 10, 45), (2, 15, 20)]:
+            self.assertEqual(vtk_image.GetScalarComponentAsDouble(x, y, z, 0), view[z, y, x])
+
+    def test_mesh_round_trip(self):
+        """Vertices enclose the box in world coordinates, axis by axis"""
+        mesh = self.reconstructor.generate_3d_mesh(self.mask, as_arrays=True)
+        low, high = mesh['vertices'].min(axis=0), mesh['vertices'].max(axis=0)
+
+        # Voxel centres 5..44, 10..19 and 3..8; the 0.5 iso-surface sits half a voxel
+        # out, and smoothing moves it by about a millimetre
+        origin, spacing = np.array(self.mask.GetOrigin()), np.array(self.mask.GetSpacing())
+        np.testing.assert_allclose(low, origin + (np.array([5, 10, 3]) - 0.5) * spacing, atol=1.5)
+        np.testing.assert_allclose(high, origin + (np.array([44, 19, 8]) + 0.5) * spacing, atol=1.5)
+        self.assertEqual(mesh['spacing'], [0.5, 2.0, 3.0])
+        self.assertIn('peak_rss_mb', mesh['stats'])
+        self.assertEqual(mesh['stats']['surface_backend'], 'discrete-flying-edges')
+
+    def test_single_slice(self):
+        """A one-slice mask is padded with background and still meshes"""
+        array = np.zeros((1, 32, 32), dtype=np.uint8)
+        array[0, 8:24, 8:24] = 1
+        mesh = self.reconstructor.generate_3d_mesh(sitk.GetImageFromArray(array), as_arrays=True)
+        self.assertGreater(len(mesh['faces']), 0)
+        np.testing.assert_allclose(mesh['vertices'][:, :2].min(axis=0), [7.5, 7.5], atol=1.0)
+
+class TestLevelsOfDetail(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        z, y, x = np.mgrid[:30, :100, :100]
+        array = (((z - 15) / 10) ** 2 + ((y - 50) / 35) ** 2 + ((x - 50) / 30) ** 2 < 1).astype(np.uint8)
+        cls.mask = sitk.GetImageFromArray(array)
+        cls.mask.SetSpacing((1.0, 1.0, 3.0))
+
+    def test_lod_targets(self):
+        """Budgets drop the levels above them and add one that just fits"""
+        self.assertEqual(lod_targets(1000, (0.9, 0.0, 0.7)), [0.0, 0.7, 0.9])
+        self.assertEqual(lod_targets(1000, (0.9, 0.7, 0.0), max_triangles=2000), [0.0, 0.7, 0.9])
+        self.assertEqual(lod_targets(1000, (0.9, 0.7, 0.0), max_triangles=200), [0.8, 0.9])
+
+    def test_levels_coarse_to_fine(self):
+        """Levels follow their reductions, and the finest is the base mesh"""
+        mesh = VolumeReconstructor().generate_3d_mesh(self.mask, as_arrays=True)
+        lods = mesh['lods']
+        self.assertEqual([lod['reduction'] for lod in lods], [0.9, 0.7, 0.0])
+        self.assertIs(mesh['faces'], lods[-1]['faces'])
+
+        base = len(lods[-1]['faces'])
+        for lod in lods[:-1]:
+            self.assertAlmostEqual(len(lod['faces']) / base, 1.0 - lod['reduction'], delta=0.03)
+            self.assertLess(lod['faces'].max(), len(lod['vertices']))
+
+    def test_triangle_budget(self):
+        """No level exceeds the budget, and the finest level uses most of it"""
+        reconstructor = VolumeReconstructor()
+        base = len(reconstructor.generate_3d_mesh(self.mask, as_arrays=True)['faces'])
+        budget = base // 5
+        lods = reconstructor.generate_3d_mesh(self.mask, as_arrays=True, max_triangles=budget)['lods']
+
+        self.assertEqual(lods[0]['reduction'], 0.9)
+        self.assertLessEqual(len(lods[-1]['faces']), budget)
+        self.assertGreater(len(lods[-1]['faces']), 0.95 * budget)
+
+    def test_invalid_reductions(self):
+        with self.assertRaises(ValueError):
+            VolumeReconstructor(lod_reductions=(0.5, 1.0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import pickle
+import unittest
+from unittest import mock
+import numpy as np
+from app.result_cache import ResultCache
+
+class TestResultCache(unittest.TestCase):
+    def test_keys_depend_on_content_and_params(self):
+        """Identical bytes and parameters map to the same key"""
+        key = ResultCache.make_key('enhance', b'image', sigma=75.0)
+        self.assertEqual(key, ResultCache.make_key('enhance', b'image', sigma=75.0))
+        self.assertNotEqual(key, ResultCache.make_key('enhance', b'image', sigma=50.0))
+        self.assertNotEqual(key, ResultCache.make_key('enhance', b'other', sigma=75.0))
+        self.assertNotEqual(key, ResultCache.make_key('process', b'image', sigma=75.0))
+
+    def test_hits_misses_and_size_eviction(self):
+        """Entries are evicted least recently used first once max_bytes is exceeded"""
+        cache = ResultCache(max_bytes=3000)
+        for name in ('a', 'b'):
+            cache.put(name, np.zeros(1000, dtype=np.uint8))
+        cache.get('a')
+        cache.put('c', np.zeros(1000, dtype=np.uint8))
+        cache.put('d', np.zeros(1000, dtype=np.uint8))
+
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        stats = cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertLessEqual(stats['bytes'], 3000)
+
+    def test_get_or_compute_skips_none(self):
+        """None results are not cached"""
+        cache = ResultCache()
+        calls = []
+        compute = lambda: calls.append(1)
+        cache.get_or_compute('k', compute)
+        cache.get_or_compute('k', compute)
+        self.assertEqual(len(calls), 2)
+
+    def test_disk_tier_survives_restart(self):
+        """A new cache instance reads entries written by a previous one"""
+        with tempfile.TemporaryDirectory() as tmp:
+            ResultCache(disk_dir=tmp).put('k', {'class': 'glioma'})
+            cache = ResultCache(disk_dir=tmp)
+            self.assertEqual(cache.get('k'), {'class': 'glioma'})
+            self.assertEqual(cache.stats()['disk_hits'], 1)
+
+    def test_disk_tier_scanned_only_over_budget(self):
+        """Written bytes are counted, and the directory is only scanned to trim it"""
+        value = np.zeros(1000, dtype=np.uint8)
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(disk_dir=tmp, disk_max_bytes=3 * size + size // 2)
+            with mock.patch('app.result_cache.os.scandir', wraps=os.scandir) as scandir:
+                for name in ('a', 'b', 'c', 'c'):
+                    cache.put(name, value)
+                self.assertEqual(scandir.call_count, 0)
+                self.assertEqual(cache.stats()['disk_bytes'], 3 * size)
+
+                cache.put('d', value)
+                self.assertEqual(scandir.call_count, 1)
+            self.assertEqual(cache.stats()['disk_bytes'], 3 * size)
+            self.assertEqual(len(os.listdir(tmp)), 3)
+            self.assertIn('d.pkl', os.listdir(tmp))
+
+    def test_memory_only_entries(self):
+        """disk=False entries never reach the disk tier"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(disk_dir=tmp)
+            cache.get_or_compute('decode-k', lambda: np.ones(4), disk=False)
+            self.assertEqual(os.listdir(tmp), [])
+            self.assertIsNotNone(cache.get('decode-k', disk=False))
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import numpy as np
+import cv2
+from app.tumor_segmentation import TumorSegmentation
+
+class TestTumorSegmentation(unittest.TestCase):
+    def setUp(self):
+        self.segmentation = TumorSegmentation(cache_size=2)
+        self.image = np.zeros((128, 128), dtype=np.uint8)
+        cv2.circle(self.image, (64, 64), 20, 200, -1)
+
+    def test_measurements(self):
+        """The largest Otsu contour is measured"""
+        measurements = self.segmentation.calculate_measurements(self.image)
+        self.assertAlmostEqual(measurements['area_pixels'], np.pi * 20 ** 2, delta=100)
+        self.assertGreater(measurements['circularity'], 0.8)
+
+    def test_result_is_shared_across_paths(self):
+        """Measurements, overlay and segment_tumor reuse one cached result"""
+        result = self.segmentation.analyze(self.image)
+        self.segmentation.calculate_measurements(self.image)
+        overlay = self.segmentation.get_segmentation_overlay(self.image.copy())
+        segmented = self.segmentation.segment_tumor(self.image)
+
+        self.assertIs(self.segmentation.analyze(self.image.copy()), result)
+        self.assertEqual(overlay.shape, (128, 128, 3))
+        self.assertEqual(segmented['measurements'], result.measurements)
+        self.assertIs(segmented['mask'], result.component_mask)
+
+    def test_cache_is_bounded(self):
+        """Old entries are evicted once the cache is full"""
+        first = self.segmentation.analyze(self.image)
+        for value in (1, 2):
+            self.segmentation.analyze(np.full((16, 16), value, dtype=np.uint8))
+        self.assertIsNot(self.segmentation.analyze(self.image), first)
+
+    def test_empty_image(self):
+        """An image without foreground yields zero measurements"""
+        blank = np.zeros((32, 32), dtype=np.uint8)
+        self.assertEqual(self.segmentation.calculate_measurements(blank)['area_pixels'], 0)
+        self.assertIs(self.segmentation.get_segmentation_overlay(blank), blank)
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
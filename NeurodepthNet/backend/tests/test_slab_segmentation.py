@@ -0,0 +1,83 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import numpy as np
+import SimpleITK as sitk
+from app.reconstruction import otsu_largest_component
+from app.slab_segmentation import UnionFind, largest_component_slabs, otsu_threshold
+
+def dark_blobs(shape, count, seed):
+    """Noisy bright volume with `count` dark ellipsoids of random size"""
+    rng = np.random.default_rng(seed)
+    volume = rng.normal(170, 30, size=shape)
+    z, y, x = np.ogrid[:shape[0], :shape[1], :shape[2]]
+    for _ in range(count):
+        center = [rng.integers(0, extent) for extent in shape]
+        radii = [rng.uniform(1, extent / 2 + 1) for extent in shape]
+        inside = sum(((axis - c) / r) ** 2 for axis, c, r in zip((z, y, x), center, radii)) < 1
+        volume[inside] = rng.normal(60, 20)
+    return np.clip(volume, 0, 255).astype(np.uint8)
+
+class TestOtsuThreshold(unittest.TestCase):
+    def test_matches_simpleitk(self):
+        """The threshold from a histogram splits voxels exactly like sitk.OtsuThreshold"""
+        rng = np.random.default_rng(0)
+        for trial in range(60):
+            if trial % 3 == 0:
+                low = int(rng.integers(0, 250))
+                volume = rng.integers(low, min(255, low + int(rng.integers(1, 8))) + 1, size=(2, 16, 16))
+            else:
+                volume = rng.normal(rng.uniform(20, 230), rng.uniform(1, 50), size=(2, 16, 16))
+            volume = np.clip(volume, 0, 255).astype(np.uint8)
+
+            otsu_filter = sitk.OtsuThresholdImageFilter()
+            expected = sitk.GetArrayFromImage(otsu_filter.Execute(sitk.GetImageFromArray(volume)))
+            threshold = otsu_threshold(np.bincount(volume.ravel(), minlength=256))
+            np.testing.assert_array_equal(volume <= threshold, expected.astype(bool))
+            self.assertEqual(int(threshold), otsu_filter.GetThreshold())
+
+class TestUnionFind(unittest.TestCase):
+    def test_smallest_label_is_root(self):
+        forest = UnionFind()
+        forest.add([3, 1, 4])
+        forest.add([1, 5])
+        forest.union(5, 2)
+        forest.union(4, 5)
+        self.assertEqual(forest.count, 5)
+        np.testing.assert_array_equal(forest.roots(), [0, 1, 2, 3, 2, 2])
+
+class TestLargestComponentSlabs(unittest.TestCase):
+    def test_matches_in_memory_segmentation(self):
+        """Every slab size gives the mask and threshold of the whole-volume path"""
+        for seed in range(8):
+            volume = dark_blobs((20, 32, 36), count=4, seed=seed)
+            expected, threshold, _ = otsu_largest_component(sitk.GetImageFromArray(volume))
+            expected = sitk.GetArrayFromImage(expected)
+            for slab_slices in (1, 3, 8, 64):
+                mask, slab_threshold, voxels = largest_component_slabs(volume, slab_slices)
+                np.testing.assert_array_equal(mask, expected)
+                self.assertEqual(int(slab_threshold), int(threshold))
+                self.assertEqual(voxels, expected.sum())
+
+    def test_component_joined_in_a_later_slab(self):
+        """Two arms that only meet in the last slab are merged into one component"""
+        volume = np.full((12, 20, 20), 200, dtype=np.uint8)
+        volume[:, 3:6, 3:6] = 20
+        volume[:, 3:6, 14:17] = 20
+        volume[11, 3:6, 3:17] = 20
+        # Larger than either arm, smaller than both together
+        volume[:3, 10:18, 6:14] = 20
+
+        mask, _, voxels = largest_component_slabs(volume, slab_slices=4)
+        self.assertEqual(voxels, 2 * 12 * 9 + 3 * 8)
+        self.assertTrue(mask[0, 4, 4] and mask[0, 4, 15])
+        self.assertFalse(mask[0, 12, 8])
+
+    def test_rejects_other_dtypes(self):
+        with self.assertRaises(ValueError):
+            largest_component_slabs(np.zeros((4, 8, 8), dtype=np.float32))
+
+if __name__ == '__main__':
+    unittest.main()
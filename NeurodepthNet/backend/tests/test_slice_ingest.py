@@ -0,0 +1,98 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import unittest
+import numpy as np
+import cv2
+from app.slice_ingest import SliceIngestor, VolumeBuffer, MappedVolumeBuffer, iter_multipart_files
+
+def encode(image):
+    return cv2.imencode('.png', image)[1].tobytes()
+
+def multipart_body(parts, boundary='test-boundary'):
+    chunks = []
+    for name, data in parts:
+        chunks.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                      f'filename="{name}.png"\r\nContent-Type: image/png\r\n\r\n'.encode('utf-8'))
+        chunks.append(data + b'\r\n')
+    chunks.append(f'--{boundary}--\r\n'.encode('utf-8'))
+    return b''.join(chunks), f'multipart/form-data; boundary={boundary}'
+
+class TestSliceIngestor(unittest.TestCase):
+    def setUp(self):
+        self.ingestor = SliceIngestor(max_workers=4)
+
+    def tearDown(self):
+        self.ingestor.shutdown()
+
+    def test_decode_in_order(self):
+        slices = [np.full((16, 24), i * 10, dtype=np.uint8) for i in range(10)]
+        volume, valid = self.ingestor.decode([encode(s) for s in slices])
+
+        self.assertEqual(volume.shape, (10, 16, 24))
+        self.assertEqual(volume.dtype, np.uint8)
+        self.assertEqual(valid, list(range(10)))
+        np.testing.assert_array_equal(volume[:, 0, 0], np.arange(10) * 10)
+
+    def test_mismatched_sizes_and_invalid_uploads(self):
+        """Slices are resized to the first valid one and undecodable uploads dropped"""
+        uploads = [b'not an image', encode(np.full((16, 16), 50, np.uint8)),
+                   encode(np.full((32, 20), 80, np.uint8)), b'', encode(np.full((8, 8), 90, np.uint8))]
+        volume, valid = self.ingestor.decode(uploads)
+
+        self.assertEqual(valid, [1, 2, 4])
+        self.assertEqual(volume.shape, (3, 16, 16))
+        np.testing.assert_array_equal(volume[:, 5, 5], [50, 80, 90])
+
+    def test_nothing_decodable(self):
+        volume, valid = self.ingestor.decode([b'x', b'y'])
+        self.assertEqual(valid, [])
+        self.assertEqual(volume.size, 0)
+
+    def test_stack_normalizes(self):
+        ramp = np.tile(np.arange(50, 150, dtype=np.uint8), (4, 1))
+        volume = self.ingestor.stack([ramp, np.full((4, 100), 7, np.uint8)], normalize=True)
+
+        self.assertEqual((volume[0].min(), volume[0].max()), (0, 255))
+        self.assertEqual(volume[1].max(), 0)
+
+    def test_ingest_stream_matches_decode(self):
+        """Streaming ingestion grows past its initial capacity and matches decode"""
+        uploads = [encode(np.full((16, 24), i * 10, dtype=np.uint8)) for i in range(10)]
+        uploads.insert(3, b'not an image')
+        expected, expected_valid = self.ingestor.decode(uploads)
+        volume, valid = self.ingestor.ingest_stream(iter(uploads), capacity=2)
+
+        self.assertEqual(valid, expected_valid)
+        np.testing.assert_array_equal(volume, expected)
+        self.assertTrue(volume.flags.c_contiguous)
+
+    def test_iter_multipart_files(self):
+        """Only parts of the requested field are yielded, whatever the read size"""
+        images = [encode(np.full((8, 8), i, np.uint8)) for i in range(3)]
+        body, content_type = multipart_body([('images', images[0]), ('other', b'x'),
+                                             ('images', images[1]), ('images', images[2])])
+        for chunk_size in (7, 1024 * 1024):
+            parts = list(iter_multipart_files(io.BytesIO(body), content_type, 'images', chunk_size=chunk_size))
+            self.assertEqual(parts, images)
+        with self.assertRaises(ValueError):
+            list(iter_multipart_files(io.BytesIO(body), 'application/json', 'images'))
+
+    def test_ingest_stream_into_mapped_file(self):
+        """A memory-mapped buffer grows like the in-memory one and gives the same volume"""
+        uploads = [encode(np.full((16, 24), i * 10, dtype=np.uint8)) for i in range(10)]
+        expected, _ = self.ingestor.decode(uploads)
+        volume, valid = self.ingestor.ingest_stream(iter(uploads), buffer=MappedVolumeBuffer(capacity=3))
+
+        self.assertIsInstance(volume, np.memmap)
+        self.assertEqual(valid, list(range(10)))
+        np.testing.assert_array_equal(volume, expected)
+
+    def test_volume_buffer_empty(self):
+        self.assertEqual(VolumeBuffer().finish().size, 0)
+        self.assertEqual(MappedVolumeBuffer().finish().size, 0)
+
+if __name__ == '__main__':
+    unittest.main()
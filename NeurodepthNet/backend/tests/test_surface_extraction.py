@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import unittest
+import numpy as np
+from app.surface_extraction import SURFACE_BACKENDS, SurfaceExtractor, polydata_arrays, surface_timings
+
+def signed_volume(vertices, faces):
+    """Enclosed volume of a closed triangle mesh; positive for outward-facing triangles"""
+    corners = vertices[faces].astype(np.float64)
+    return np.einsum('ij,ij->i', corners[:, 0], np.cross(corners[:, 1], corners[:, 2])).sum() / 6.0
+
+class TestSurfaceExtractor(unittest.TestCase):
+    def setUp(self):
+        z, y, x = np.mgrid[:24, :40, :48]
+        self.volume = (((z - 12) / 8) ** 2 + ((y - 20) / 12) ** 2 + ((x - 24) / 16) ** 2 < 1).astype(np.uint8)
+        self.volume.setflags(write=False)
+        self.spacing, self.origin = (0.5, 1.0, 3.0), (10.0, -5.0, 2.0)
+
+    def test_backends_agree(self):
+        """Every backend gives the same outward surface of a binary mask in world coordinates"""
+        expected_volume = 4 / 3 * np.pi * (16 * 0.5) * (12 * 1.0) * (8 * 3.0)
+        bounds = []
+        for backend in SURFACE_BACKENDS:
+            surface = SurfaceExtractor(backend).extract(self.volume, 0.5, self.spacing, self.origin)
+            vertices, faces = polydata_arrays(surface.polydata)
+            self.assertEqual(surface.backend, backend)
+            self.assertAlmostEqual(signed_volume(vertices, faces) / expected_volume, 1.0, delta=0.05)
+            bounds.append((vertices.min(axis=0), vertices.max(axis=0)))
+
+        for low, high in bounds:
+            np.testing.assert_allclose(low, bounds[0][0], atol=1e-4)
+            np.testing.assert_allclose(high, bounds[0][1], atol=1e-4)
+        # The ellipsoid spans x 8.5..39.5 voxels of 0.5 mm from x = 10
+        np.testing.assert_allclose([bounds[0][0][0], bounds[0][1][0]], [14.25, 29.75], atol=0.3)
+
+    def test_skimage_step_size(self):
+        """Larger steps sample fewer voxels and give fewer triangles"""
+        fine = SurfaceExtractor('skimage').extract(self.volume).polydata.GetNumberOfPolys()
+        coarse = SurfaceExtractor('skimage', step_size=2).extract(self.volume).polydata.GetNumberOfPolys()
+        self.assertLess(coarse, fine / 2)
+
+    def test_auto_selection(self):
+        extractor = SurfaceExtractor(coarse_voxels=64 ** 3, coarse_step=3)
+        self.assertEqual(extractor.select_backend((64, 64, 64)), ('flying-edges', 1))
+        self.assertEqual(extractor.select_backend((64, 64, 64), labels=True), ('discrete-flying-edges', 1))
+        self.assertEqual(extractor.select_backend((65, 64, 64)), ('skimage', 3))
+        self.assertEqual(SurfaceExtractor('marching-cubes').select_backend((512, 512, 512)), ('marching-cubes', 1))
+        with self.assertRaises(ValueError):
+            SurfaceExtractor('voxels')
+
+    def test_empty_volume_and_timings(self):
+        """A volume without a crossing yields an empty surface, and every call is timed"""
+        calls = surface_timings().get('skimage', {}).get('calls', 0)
+        for backend in SURFACE_BACKENDS:
+            surface = SurfaceExtractor(backend).extract(np.zeros((4, 4, 4), dtype=np.uint8))
+            vertices, faces = polydata_arrays(surface.polydata)
+            self.assertEqual((len(vertices), len(faces)), (0, 0))
+        self.assertEqual(surface_timings()['skimage']['calls'], calls + 1)
+
+if __name__ == '__main__':
+    unittest.main()
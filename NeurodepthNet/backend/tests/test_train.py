@@ -0,0 +1,152 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import unittest
+import numpy as np
+import cv2
+from app.dataset_shards import ShardBuilder, default_shard_dir
+from app.train import ModelTrainer, ThroughputLogger, TrainingConfig
+
+class TestTrainingCheckpoints(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.checkpoint_dir = os.path.join(self.tmp.name, 'checkpoints')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_config_from_dict(self):
+        """Options map onto TrainingConfig and unknown keys are rejected"""
+        config = TrainingConfig.from_dict({'epochs': 5, 'patience': 2, 'resume': True})
+        self.assertEqual(config.epochs, 5)
+        self.assertEqual(config.patience, 2)
+        self.assertTrue(config.resume)
+        self.assertEqual(config.monitor_mode, 'min')
+        self.assertEqual(TrainingConfig(monitor='val_accuracy').monitor_mode, 'max')
+        with self.assertRaises(ValueError):
+            TrainingConfig.from_dict({'epochz': 5})
+
+    def test_config_from_request(self):
+        """HTTP options are whitelisted, coerced to their types and bounded"""
+        config = TrainingConfig.from_request({'epochs': '5', 'batch_size': 64.0, 'resume': True,
+                                              'monitor': 'val_accuracy'})
+        self.assertEqual((config.epochs, config.batch_size, config.resume), (5, 64, True))
+        self.assertIsNone(config.checkpoint_dir)
+        for options in ({'checkpoint_dir': '/etc'}, {'epochs': 'many'}, {'epochs': 0}, {'batch_size': 1.5},
+                        {'resume': 'yes'}, {'monitor': 'lr'}, {'base_learning_rate': float('nan')},
+                        {'epochs': None}, ['epochs']):
+            with self.assertRaises(ValueError):
+                TrainingConfig.from_request(options)
+
+    def test_restore_weights_optimizer_and_epoch(self):
+        """A restored checkpoint brings back weights, optimizer slots, epoch and best value"""
+        trainer = ModelTrainer(data_dir=self.tmp.name)
+        trainer.create_model()
+        manager, state = trainer.create_checkpoint_manager(self.checkpoint_dir)
+        for variable in trainer.model.optimizer.variables:
+            variable.assign(np.full(tuple(variable.shape), 3).astype(variable.numpy().dtype))
+        state['epoch'].assign(7)
+        state['best'].assign(0.25)
+        manager.save(checkpoint_number=7)
+        weights = [w.copy() for w in trainer.model.get_weights()]
+
+        restored = ModelTrainer(data_dir=self.tmp.name)
+        restored.create_model()
+        restored_manager, restored_state = restored.create_checkpoint_manager(self.checkpoint_dir)
+        self.assertEqual(restored.restore_checkpoint(restored_manager, restored_state), 7)
+        self.assertEqual(float(restored_state['best'].numpy()), 0.25)
+        for expected, actual in zip(weights, restored.model.get_weights()):
+            np.testing.assert_array_equal(expected, actual)
+        for variable in restored.model.optimizer.variables:
+            self.assertTrue(np.all(variable.numpy() == 3))
+
+    def test_restore_without_checkpoint(self):
+        """Resuming with an empty checkpoint directory starts from epoch 0"""
+        trainer = ModelTrainer(data_dir=self.tmp.name)
+        trainer.create_model()
+        manager, state = trainer.create_checkpoint_manager(self.checkpoint_dir)
+        self.assertEqual(trainer.restore_checkpoint(manager, state), 0)
+
+class TestBuildDataset(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.trainer = ModelTrainer(data_dir=self.tmp.name)
+        self.subset_dir = os.path.join(self.tmp.name, 'training')
+        for class_idx, class_name in enumerate(self.trainer.classes):
+            os.makedirs(os.path.join(self.subset_dir, class_name))
+            for i in range(2):
+                self.write(class_name, f"{i}.png", 10 * class_idx + i)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, class_name, filename, value):
+        cv2.imwrite(os.path.join(self.subset_dir, class_name, filename), np.full((40, 48), value, dtype=np.uint8))
+
+    def pixel_values(self, dataset):
+        """First pixel of every image (back on the 0-255 scale) and its class index"""
+        values = []
+        for images, labels in dataset:
+            values += zip(np.rint(images.numpy()[:, 0, 0, 0] * 255).astype(int).tolist(),
+                          np.argmax(labels.numpy(), axis=1).tolist())
+        return sorted(values)
+
+    def test_files_feed_the_dataset(self):
+        """Without shards images are decoded from the files and unreadable ones are skipped"""
+        with open(os.path.join(self.subset_dir, 'glioma', 'broken.png'), 'wb') as f:
+            f.write(b'not an image')
+
+        dataset, count = self.trainer.build_dataset('training', batch_size=3, shuffle=False)
+        self.assertEqual(count, 9)
+        values = [(0, 0), (1, 0), (10, 1), (11, 1), (20, 2), (21, 2), (30, 3), (31, 3)]
+        self.assertEqual(self.pixel_values(dataset), values)
+        # The second pass comes from the decode cache
+        self.assertEqual(self.pixel_values(dataset), values)
+        self.assertTrue(os.listdir(os.path.join(self.tmp.name, '.tfdata_cache')))
+
+    def test_partial_cache_is_replaced(self):
+        """Leftovers of a run killed during its first epoch do not block the next one"""
+        dataset, _ = self.trainer.build_dataset('training', batch_size=3, shuffle=False)
+        expected = self.pixel_values(dataset)
+        cache_dir = os.path.join(self.tmp.name, '.tfdata_cache')
+        name = next(entry[:-len('.index')] for entry in os.listdir(cache_dir) if entry.endswith('.index'))
+        for entry in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, entry))
+        for leftover in (f"{name}_0.lockfile", f"{name}_0.data-00000-of-00001.tempstate123"):
+            open(os.path.join(cache_dir, leftover), 'wb').close()
+
+        dataset, _ = self.trainer.build_dataset('training', batch_size=3, shuffle=False)
+        self.assertEqual(self.pixel_values(dataset), expected)
+        self.assertIn(f"{name}.index", os.listdir(cache_dir))
+
+    def test_throughput_counts_images_seen(self):
+        """Throughput counts the images that reach the model, not the files listed"""
+        with open(os.path.join(self.subset_dir, 'glioma', 'broken.png'), 'wb') as f:
+            f.write(b'not an image')
+        dataset, _ = self.trainer.build_dataset('training', batch_size=3, shuffle=True)
+        self.trainer.create_model()
+
+        throughput = ThroughputLogger()
+        self.trainer.model.fit(throughput.count(dataset), validation_data=dataset, epochs=2,
+                               callbacks=[throughput], verbose=0)
+        self.assertEqual(int(throughput.seen.numpy()), 8)
+        self.assertEqual(len(throughput.history), 2)
+        self.assertGreater(throughput.summary()['mean_images_per_sec'], 0)
+
+    def test_shards_feed_the_dataset(self):
+        """With shards the pipeline reads them, updating stale ones first, and skips the decode cache"""
+        ShardBuilder(self.subset_dir, self.trainer.classes, image_size=self.trainer.image_size).build()
+        self.write('pituitary', '1.png', 99)
+
+        dataset, count = self.trainer.build_dataset('training', batch_size=3, shuffle=True)
+        self.assertEqual(count, 8)
+        self.assertEqual(self.pixel_values(dataset), [(0, 0), (1, 0), (10, 1), (11, 1), (20, 2), (21, 2),
+                                                      (30, 3), (99, 3)])
+        self.assertTrue(ShardBuilder(self.subset_dir, self.trainer.classes, default_shard_dir(self.subset_dir),
+                                     self.trainer.image_size).is_current())
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, '.tfdata_cache')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+import tempfile
+import unittest
+from app.train import TrainingConfig
+from app.training_worker import TrainingWorker, TrainingInProgress
+
+# Stands in for `python -m app.train`: report one epoch, then finish
+FAKE_TRAINER = """
+import json, os, sys, time
+status_path = sys.argv[1]
+def write(**status):
+    with open(status_path + '.tmp', 'w') as f:
+        json.dump(status, f)
+    os.replace(status_path + '.tmp', status_path)
+write(status='running', epoch=1, epochs=2, logs={'loss': 0.5})
+time.sleep(float(sys.argv[2]))
+if sys.argv[3] == 'fail':
+    write(status='failed', error='out of data')
+    sys.exit(1)
+write(status='done', epoch=2, epochs=2, model_path='trained.h5')
+"""
+
+class FakeTrainingWorker(TrainingWorker):
+    def __init__(self, outcome='done', duration=0.2, **kwargs):
+        super().__init__(**kwargs)
+        self.outcome = outcome
+        self.duration = duration
+
+    def _command(self, config_path, status_path):
+        return [sys.executable, '-c', FAKE_TRAINER, status_path, str(self.duration), self.outcome]
+
+class TestTrainingWorker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.reloaded = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def on_complete(self, model_path):
+        self.reloaded.append(model_path)
+        return len(self.reloaded)
+
+    def wait_finished(self, worker, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status = worker.status()
+            if status['status'] in ('done', 'failed'):
+                return status
+            time.sleep(0.05)
+        self.fail("Training worker did not finish")
+
+    def test_successful_run_reloads_model(self):
+        """A finished run reports its progress and hands the model to on_complete"""
+        worker = FakeTrainingWorker(run_dir=self.tmp.name, on_complete=self.on_complete)
+        self.assertEqual(worker.status()['status'], 'idle')
+        worker.start(TrainingConfig(epochs=2))
+        with open(os.path.join(self.tmp.name, 'config.json')) as f:
+            written = json.load(f)
+        self.assertEqual(written['epochs'], 2)
+        # Checkpoints stay inside the run directory
+        self.assertEqual(written['checkpoint_dir'], os.path.join(self.tmp.name, 'checkpoints'))
+
+        status = self.wait_finished(worker)
+        self.assertEqual(status['status'], 'done')
+        self.assertEqual(status['epoch'], 2)
+        self.assertTrue(status['reloaded'])
+        self.assertEqual(status['model_version'], 1)
+        self.assertEqual(self.reloaded, ['trained.h5'])
+
+    def test_failed_run(self):
+        """A failing child reports its error and leaves the served model alone"""
+        worker = FakeTrainingWorker(outcome='fail', run_dir=self.tmp.name, on_complete=self.on_complete)
+        worker.start(TrainingConfig())
+        status = self.wait_finished(worker)
+        self.assertEqual(status['status'], 'failed')
+        self.assertEqual(status['error'], 'out of data')
+        self.assertEqual(self.reloaded, [])
+
+    def test_single_run_at_a_time(self):
+        """Starting while a run is in progress is refused"""
+        worker = FakeTrainingWorker(duration=2.0, run_dir=self.tmp.name)
+        worker.start(TrainingConfig())
+        try:
+            with self.assertRaises(TrainingInProgress):
+                worker.start(TrainingConfig())
+        finally:
+            worker.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
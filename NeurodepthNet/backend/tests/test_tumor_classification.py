@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import unittest
+import numpy as np
+import tensorflow as tf
+from app.tumor_classification import BaseEngine, TumorClassifier
+
+def save_model(path, bias):
+    """Tiny (224, 224, 1) -> 4 classifier whose prediction is decided by `bias`"""
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(224, 224, 1)),
+        tf.keras.layers.AveragePooling2D(32),
+        tf.keras.layers.Flatten(),
+        tf.keras.layers.Dense(4, activation='softmax')
+    ])
+    model.layers[-1].set_weights([np.zeros((49, 4), np.float32), np.array(bias, np.float32)])
+    # Replace atomically, as training does
+    partial_path = f"{path}.partial.h5"
+    model.save(partial_path)
+    os.replace(partial_path, path)
+
+class TestBaseEngine(unittest.TestCase):
+    def test_predict_is_abstract(self):
+        """An engine has to implement predict() to be instantiated"""
+        with self.assertRaises(TypeError):
+            BaseEngine()
+
+        class Constant(BaseEngine):
+            def predict(self, batch):
+                return np.full((len(batch), 4), 0.25, dtype=np.float32)
+
+        Constant(image_size=(8, 8)).warmup((1, 2))
+
+class TestModelIdentity(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmp.name, 'tumor_model.h5')
+        save_model(self.model_path, [5, 0, 0, 0])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reload_when_file_replaced(self):
+        """Another process replacing the model file is picked up on the next check"""
+        classifier = TumorClassifier(model_path=self.model_path)
+        image = np.zeros((64, 64), dtype=np.uint8)
+        identity = classifier.identity
+        self.assertFalse(classifier.reload_if_changed())
+        self.assertEqual(classifier.classify(image)['class'], 'glioma')
+
+        save_model(self.model_path, [0, 0, 0, 5])
+        self.assertTrue(classifier.reload_if_changed())
+        self.assertNotEqual(classifier.identity, identity)
+        self.assertEqual(classifier.classify(image)['class'], 'pituitary')
+        self.assertFalse(classifier.reload_if_changed())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import unittest
+import numpy as np
+from app.utils import lazy_import, LazyInstance, PeakMemory
+
+class TestLazyHelpers(unittest.TestCase):
+    def test_lazy_import_defers_until_attribute_access(self):
+        """The module is imported by the first attribute access, not by lazy_import"""
+        sys.modules.pop('colorsys', None)
+        colorsys = lazy_import('colorsys')
+        self.assertNotIn('colorsys', sys.modules)
+        self.assertEqual(colorsys.rgb_to_hsv(1.0, 0.0, 0.0), (0.0, 1.0, 1.0))
+        self.assertIn('colorsys', sys.modules)
+
+    def test_lazy_instance_builds_once(self):
+        """Concurrent first calls share a single factory call"""
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def factory():
+            calls.append(1)
+            return object()
+
+        lazy = LazyInstance(factory)
+        self.assertFalse(lazy.loaded)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(lazy.get())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(lazy.loaded)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    @unittest.skipUnless(os.path.exists('/proc/self/statm'), "needs /proc")
+    def test_peak_memory_sees_freed_allocations(self):
+        """A buffer allocated and freed inside the block still shows in the peak"""
+        with PeakMemory(interval=0.001) as memory:
+            buffer = np.ones(64 * 1024 * 1024, dtype=np.uint8)
+            threading.Event().wait(0.05)
+            del buffer
+        self.assertGreater(memory.peak_mb, 48)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Card, Row, Col } from 'react-bootstrap';
 import Volume3DViewer from './Volume3DViewer';
 import ClassificationVisual from './ClassificationVisual';
@@ -15,6 +15,7 @@ const ImageUpload = () => {
     const [error, setError] = useState(null);
     const [view3D, setView3D] = useState(false);
     const [processingStage, setProcessingStage] = useState('');
+    const reconstructionRequest = useRef(0);
 
     const handleFileSelect = (event) => {
         if (!event.target.files || event.target.files.length === 0) {
@@ -67,9 +68,32 @@ const ImageUpload = () => {
         }
     };
 
+    // Replace the coarse mesh with each finer level of detail, finest last
+    const loadFinerLods = async (mesh, requestId) => {
+        const finer = (mesh?.lods || []).filter(lod => lod.level > mesh.lod);
+        try {
+            for (const lod of finer) {
+                const response = await fetch(`http://localhost:5000${lod.url}`);
+                const data = await response.json();
+                if (!response.ok) throw new Error(data.error || 'Loading mesh detail failed');
+
+                // A newer reconstruction has started; leave its mesh alone
+                if (requestId !== reconstructionRequest.current) return;
+                setResults(prev => ({
+                    ...prev,
+                    reconstruction: { ...prev.reconstruction, mesh: data.mesh }
+                }));
+            }
+        } catch (err) {
+            // The coarser mesh is already on screen, so keep showing it
+            console.error('Mesh level of detail error:', err);
+        }
+    };
+
     const handle3DReconstruction = async () => {
         if (selectedFiles.length < 1) return;
 
+        const requestId = ++reconstructionRequest.current;
         setLoading(true);
         setError(null);
 
@@ -77,7 +101,8 @@ const ImageUpload = () => {
         selectedFiles.forEach(file => formData.append('slices', file));
 
         try {
-            const response = await fetch('http://localhost:5000/api/reconstruct', {
+            // Start with the coarsest level of detail so the viewer shows up quickly
+            const response = await fetch('http://localhost:5000/api/reconstruct?lod=0', {
                 method: 'POST',
                 body: formData
             });
@@ -91,11 +116,13 @@ const ImageUpload = () => {
                 metrics: data.metrics || prev.metrics // update metrics if present in reconstruction response
             }));
             setView3D(true);
+            setLoading(false);
+            await loadFinerLods(data.mesh, requestId);
         } catch (err) {
             console.error('3D reconstruction error:', err);
             setError(err.message);
         } finally {
-            setLoading(false);
+            if (requestId === reconstructionRequest.current) setLoading(false);
         }
     };
 
@@ -5,6 +5,7 @@ import './Volume3DViewer.css';
 
 const Volume3DViewer = ({ meshData, metrics, tumorType }) => {
     const mountRef = useRef(null);
+    const viewRef = useRef(null);
 
     // Log incoming props
     useEffect(() => {
@@ -25,8 +26,10 @@ const Volume3DViewer = ({ meshData, metrics, tumorType }) => {
         return numVal.toFixed(2);
     };
 
+    // Scene, camera and renderer live as long as the viewer
     useEffect(() => {
-        if (!meshData?.vertices || !mountRef.current) return;
+        const mount = mountRef.current;
+        if (!mount) return;
 
         // Scene setup
         const scene = new THREE.Scene();
@@ -35,7 +38,7 @@ const Volume3DViewer = ({ meshData, metrics, tumorType }) => {
         // Camera setup
         const camera = new THREE.PerspectiveCamera(
             75,
-            mountRef.current.clientWidth / mountRef.current.clientHeight,
+            mount.clientWidth / mount.clientHeight,
             0.1,
             1000
         );
@@ -43,8 +46,47 @@ const Volume3DViewer = ({ meshData, metrics, tumorType }) => {
 
         // Renderer setup
         const renderer = new THREE.WebGLRenderer({ antialias: true });
-        renderer.setSize(mountRef.current.clientWidth, mountRef.current.clientHeight);
-        mountRef.current.appendChild(renderer.domElement);
+        renderer.setSize(mount.clientWidth, mount.clientHeight);
+        mount.appendChild(renderer.domElement);
+
+        // Lighting
+        const ambientLight = new THREE.AmbientLight(0xffffff, 0.5);
+        scene.add(ambientLight);
+
+        const directionalLight = new THREE.DirectionalLight(0xffffff, 0.8);
+        directionalLight.position.set(0, 1, 1);
+        scene.add(directionalLight);
+
+        // Controls
+        const controls = new OrbitControls(camera, renderer.domElement);
+        controls.enableDamping = true;
+
+        viewRef.current = { scene, camera, framed: false };
+
+        // Animation
+        let frame;
+        const animate = () => {
+            frame = requestAnimationFrame(animate);
+            controls.update();
+            renderer.render(scene, camera);
+        };
+        animate();
+
+        // Cleanup
+        return () => {
+            cancelAnimationFrame(frame);
+            controls.dispose();
+            renderer.dispose();
+            mount.removeChild(renderer.domElement);
+            viewRef.current = null;
+        };
+    }, []);
+
+    // Swap in each mesh as it arrives; finer levels of detail replace the
+    // coarse one without resetting the camera the user has moved
+    useEffect(() => {
+        const view = viewRef.current;
+        if (!meshData?.vertices || !view) return;
 
         // Create mesh
         const geometry = new THREE.BufferGeometry();
@@ -67,37 +109,19 @@ const Volume3DViewer = ({ meshData, metrics, tumorType }) => {
         });
 
         const mesh = new THREE.Mesh(geometry, material);
-        scene.add(mesh);
-
-        // Lighting
-        const ambientLight = new THREE.AmbientLight(0xffffff, 0.5);
-        scene.add(ambientLight);
 
-        const directionalLight = new THREE.DirectionalLight(0xffffff, 0.8);
-        directionalLight.position.set(0, 1, 1);
-        scene.add(directionalLight);
-
-        // Controls
-        const controls = new OrbitControls(camera, renderer.domElement);
-        controls.enableDamping = true;
-
-        // Center mesh
+        // Center mesh; frame the camera on the first one only
         geometry.computeBoundingSphere();
         const { center, radius } = geometry.boundingSphere;
         mesh.position.sub(center);
-        camera.position.z = radius * 3;
-
-        // Animation
-        const animate = () => {
-            requestAnimationFrame(animate);
-            controls.update();
-            renderer.render(scene, camera);
-        };
-        animate();
+        if (!view.framed) {
+            view.camera.position.z = radius * 3;
+            view.framed = true;
+        }
+        view.scene.add(mesh);
 
-        // Cleanup
         return () => {
-            mountRef.current?.removeChild(renderer.domElement);
+            view.scene.remove(mesh);
             geometry.dispose();
             material.dispose();
         };